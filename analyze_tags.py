@@ -4,6 +4,7 @@ import json
 import sys
 from collections import Counter, defaultdict
 from app.db import database
+from app.post_loader import load_posts, POST_COLUMNS
 from app.enhanced_recommender import EnhancedRecommender
 
 async def analyze_post_tags():
@@ -18,18 +19,8 @@ async def analyze_post_tags():
         await database.connect()
         print("✅ Veritabanı bağlantısı kuruldu")
         
-        # Tüm postları çek
-        posts_query = "SELECT * FROM posts ORDER BY created_at DESC"
-        posts = await database.fetch_all(posts_query)
-        posts_list = [dict(row) for row in posts]
-        
-        # Etiketleri düzenle
-        for post in posts_list:
-            if isinstance(post.get("tags"), str):
-                try:
-                    post["tags"] = json.loads(post["tags"])
-                except:
-                    post["tags"] = []
+        # Tüm postları parça parça çek (etiketler çözülmüş halde)
+        posts_list = await load_posts(POST_COLUMNS)
         
         print(f"📊 Toplam {len(posts_list)} post analiz ediliyor")
         
@@ -160,21 +151,10 @@ async def analyze_post_tags():
         print("-" * 40)
         
         # Son 30 günlük postları al
-        recent_query = """
-            SELECT * FROM posts 
-            WHERE created_at >= NOW() - INTERVAL '30 days'
-            ORDER BY created_at DESC
-        """
-        recent_posts = await database.fetch_all(recent_query)
-        recent_posts_list = [dict(row) for row in recent_posts]
-        
-        # Etiketleri düzenle
-        for post in recent_posts_list:
-            if isinstance(post.get("tags"), str):
-                try:
-                    post["tags"] = json.loads(post["tags"])
-                except:
-                    post["tags"] = []
+        recent_posts_list = await load_posts(
+            ('id', 'tags', 'created_at'),
+            where="created_at >= NOW() - INTERVAL '30 days'"
+        )
         
         recent_tags = []
         for post in recent_posts_list:
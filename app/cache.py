@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Boyut (LRU) ve süre (TTL) sınırlı, thread-safe anahtar-değer önbelleği.
+
+    İsabet / ıskalama / tahliye sayaçlarını izleme için tutar.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: Optional[float] = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.monotonic() - stored_at > self.ttl
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Anahtarın değerini döndürür; yoksa veya süresi dolmuşsa default"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry[1]):
+                if entry is not None:
+                    del self._entries[key]
+                    self.evictions += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        """Değeri kaydeder, gerekirse en eski kullanılanı tahliye eder"""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Anahtarı önbellekten siler"""
+        with self._lock:
+            if self._entries.pop(key, None) is None:
+                return False
+            self.invalidations += 1
+            return True
+
+    def clear(self):
+        """Tüm kayıtları siler"""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._expired(entry[1])
+
+    def stats(self) -> Dict[str, Any]:
+        """İzleme için önbellek sayaçlarını döndürür"""
+        requests = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / requests, 4) if requests else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+_MISSING = object()
+
+
+class UserProfileCache(LRUCache):
+    """
+    Kullanıcı profilleri için dict benzeri arayüze sahip LRU/TTL önbelleği.
+
+    Veritabanında hiç satırı olmayan kullanıcılar ayrı bir negatif önbellekte
+    tutulur; böylece profilsiz kullanıcılar her istekte veritabanına gitmez.
+    """
+
+    def __init__(self, max_size: int = 100000, ttl: Optional[float] = 3600.0,
+                 negative_ttl: Optional[float] = 300.0):
+        super().__init__(max_size=max_size, ttl=ttl)
+        self.missing = LRUCache(max_size=max_size, ttl=negative_ttl)
+
+    def __getitem__(self, user_id: Hashable) -> Any:
+        profile = self.get(user_id, _MISSING)
+        if profile is _MISSING:
+            raise KeyError(user_id)
+        return profile
+
+    def __setitem__(self, user_id: Hashable, profile: Any):
+        self.put(user_id, profile)
+        self.missing.invalidate(user_id)
+
+    def __delitem__(self, user_id: Hashable):
+        if not self.invalidate(user_id):
+            raise KeyError(user_id)
+
+    def __iter__(self):
+        return iter([user_id for user_id, _ in self.items()])
+
+    def items(self):
+        """Süresi dolmamış (kullanıcı, profil) çiftleri"""
+        with self._lock:
+            return [(user_id, entry[0]) for user_id, entry in self._entries.items()
+                    if not self._expired(entry[1])]
+
+    def mark_missing(self, user_id: Hashable):
+        """Kullanıcıyı veritabanında profili olmayanlar arasına ekler"""
+        self.missing.put(user_id, True)
+
+    def forget(self, user_id: Hashable):
+        """Kullanıcının profilini ve negatif kaydını siler (sonraki erişimde yeniden yüklenir)"""
+        self.invalidate(user_id)
+        self.missing.invalidate(user_id)
+
+    def is_missing(self, user_id: Hashable) -> bool:
+        """Kullanıcının profilsiz olduğu yakın zamanda doğrulandı mı"""
+        return self.missing.get(user_id, False)
+
+    def replace_all(self, profiles: Dict[Hashable, Any]):
+        """
+        Tüm profilleri (toplu yükleme) verilen haritayla değiştirir
+        """
+        with self._lock:
+            self._entries.clear()
+            stored_at = time.monotonic()
+            for user_id, profile in profiles.items():
+                self._entries[user_id] = (profile, stored_at)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        self.missing.clear()
+
+    def to_dict(self) -> Dict[Hashable, Any]:
+        """Kaydetmek için profillerin düz dict kopyası"""
+        return dict(self.items())
+
+    def stats(self) -> Dict[str, Any]:
+        """İzleme için profil ve negatif önbellek sayaçlarını döndürür"""
+        stats = super().stats()
+        stats["negative_size"] = len(self.missing)
+        stats["negative_hits"] = self.missing.hits
+        return stats
@@ -0,0 +1,215 @@
+import asyncio
+import json
+from typing import Any, Dict, Optional, Set
+import asyncpg
+from app.db import DATABASE_URL
+from app.enhanced_recommender import INTERACTION_WEIGHTS
+
+CHANNEL = "recommender_changes"
+
+# İzlenen tablolar -> tetiklenen işlemler
+WATCHED_TABLES = {
+    'posts': 'INSERT OR UPDATE',
+    'likes': 'INSERT',
+    'comments': 'INSERT',
+    'user_tag_interactions': 'INSERT OR UPDATE'
+}
+
+# Satırın yalnızca anahtar alanları gönderilir (NOTIFY yükü 8000 bayt ile sınırlı)
+_TRIGGER_FUNCTION = """
+    CREATE OR REPLACE FUNCTION {schema}notify_recommender_change() RETURNS trigger AS $$
+    DECLARE
+        row_data jsonb := to_jsonb(NEW);
+    BEGIN
+        PERFORM pg_notify('{channel}', jsonb_build_object(
+            'table', lower(TG_TABLE_NAME),
+            'op', TG_OP,
+            'id', row_data -> 'id',
+            'user_id', row_data -> 'user_id',
+            'post_id', row_data -> 'post_id'
+        )::text);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+
+def _dsn() -> str:
+    """databases URL'sini asyncpg'nin kabul ettiği biçime çevirir"""
+    return DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def _schema_prefix(schema: Optional[str]) -> str:
+    return f"{schema}." if schema else ""
+
+
+async def install_triggers(connection, schema: Optional[str] = None):
+    """
+    posts, Likes, Comments ve user_tag_interactions tablolarına NOTIFY
+    tetikleyicilerini kurar (tekrar çalıştırılabilir)
+    """
+    prefix = _schema_prefix(schema)
+    await connection.execute(_TRIGGER_FUNCTION.format(schema=prefix, channel=CHANNEL))
+    for table, events in WATCHED_TABLES.items():
+        await connection.execute(f"DROP TRIGGER IF EXISTS recommender_change ON {prefix}{table}")
+        await connection.execute(f"""
+            CREATE TRIGGER recommender_change AFTER {events} ON {prefix}{table}
+            FOR EACH ROW EXECUTE FUNCTION {prefix}notify_recommender_change()
+        """)
+
+
+async def drop_triggers(connection, schema: Optional[str] = None):
+    """Kurulan tetikleyicileri ve fonksiyonu kaldırır"""
+    prefix = _schema_prefix(schema)
+    for table in WATCHED_TABLES:
+        await connection.execute(f"DROP TRIGGER IF EXISTS recommender_change ON {prefix}{table}")
+    await connection.execute(f"DROP FUNCTION IF EXISTS {prefix}notify_recommender_change()")
+
+
+class ChangeListener:
+    """
+    Postgres LISTEN/NOTIFY ile post ve etkileşim değişikliklerini dinler.
+
+    Bildirimler ayrı bir asyncpg bağlantısında alınır. Like / yorum olayları
+    profile hemen (O(post etiketleri)) uygulanır; yeni / güncellenen postlar ve
+    user_tag_interactions değişiklikleri debounce süresi boyunca biriktirilip
+    toplu işlenir: postlar watermark tabanlı artımlı ingest ile eklenir, profili
+    değişen kullanıcıların önbellekteki profili düşürülür ve bir sonraki istekte
+    veritabanından yüklenir. Bağlantı koparsa yeniden bağlanılır ve kaçırılan
+    postlar watermark sayesinde ilk ingest'te alınır.
+    """
+
+    def __init__(self, recommender, dsn: Optional[str] = None, debounce: float = 1.0,
+                 reconnect_delay: float = 5.0):
+        self.recommender = recommender
+        self.dsn = dsn or _dsn()
+        self.debounce = debounce
+        self.reconnect_delay = reconnect_delay
+        self._connection = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._posts_changed = False
+        self._profile_users: Set[int] = set()
+        self.events = 0
+        self.ingests = 0
+        self.errors = 0
+
+    def handle(self, payload: Dict[str, Any]):
+        """
+        Tek bir değişiklik bildirimini işler veya toplu işleme için biriktirir
+        """
+        self.events += 1
+        table = payload.get('table')
+        if table == 'posts':
+            self._posts_changed = True
+        elif table in ('likes', 'comments'):
+            interaction_type = 'like' if table == 'likes' else 'comment'
+            user_id, post_id = payload.get('user_id'), payload.get('post_id')
+            if user_id is None or post_id is None:
+                return
+            self.recommender.update_user_interactions(
+                user_id, post_id, interaction_type, INTERACTION_WEIGHTS[interaction_type]
+            )
+            counter = self.recommender.INTERACTION_COUNTERS[interaction_type]
+            self.recommender.update_post_counters(post_id, {counter: 1})
+            return
+        elif table == 'user_tag_interactions':
+            if payload.get('user_id') is None:
+                return
+            self._profile_users.add(payload['user_id'])
+        else:
+            return
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _on_notify(self, connection, pid, channel, payload: str):
+        try:
+            self.handle(json.loads(payload))
+        except Exception as e:
+            self.errors += 1
+            print(f"❌ Değişiklik bildirimi işlenemedi: {e}")
+
+    async def process_pending(self):
+        """
+        Biriken post ve profil değişikliklerini toplu işler
+        """
+        if self._posts_changed:
+            self._posts_changed = False
+            if self.recommender.feature_matrix is not None:
+                result = await self.recommender.ingest_new_posts()
+                self.ingests += 1
+                if result['added'] or result['refreshed']:
+                    print(f"📥 {result['added']} yeni post eklendi, {result['refreshed']} post güncellendi")
+
+        users, self._profile_users = self._profile_users, set()
+        for user_id in users:
+            self.recommender.drop_user_profile(user_id)
+
+    async def _connect(self):
+        self._connection = await asyncpg.connect(self.dsn)
+        await self._connection.add_listener(CHANNEL, self._on_notify)
+        print(f"👂 {CHANNEL} kanalı dinleniyor")
+
+    async def _close(self):
+        if self._connection is not None and not self._connection.is_closed():
+            await self._connection.close()
+        self._connection = None
+
+    async def _run(self):
+        while True:
+            try:
+                if self._connection is None or self._connection.is_closed():
+                    await self._connect()
+                    # Bağlantı yokken gelen postları yakala
+                    self._posts_changed = True
+
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.reconnect_delay)
+                except asyncio.TimeoutError:
+                    pass
+                if not self._posts_changed and not self._profile_users:
+                    continue
+
+                # Ardışık bildirimleri tek seferde işlemek için kısa bekle
+                await asyncio.sleep(self.debounce)
+                self._wakeup.clear()
+                await self.process_pending()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                print(f"❌ Değişiklik dinleyici hatası: {e}")
+                await self._close()
+                await asyncio.sleep(self.reconnect_delay)
+
+    def start(self):
+        """
+        Dinleyiciyi mevcut event loop'ta başlatır
+        """
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """
+        Dinleyiciyi durdurur ve bağlantıyı kapatır
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+        await self._close()
+
+    def stats(self) -> Dict[str, Any]:
+        """İzleme için dinleyici sayaçları"""
+        return {
+            'connected': self._connection is not None and not self._connection.is_closed(),
+            'events': self.events,
+            'ingests': self.ingests,
+            'errors': self.errors
+        }
@@ -1,17 +1,42 @@
-import re
 import json
 import numpy as np
-from typing import List, Dict, Any, Set, Tuple
+from scipy import sparse
+from typing import List, Dict, Any, Set, Tuple, Optional
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.metrics.pairwise import cosine_similarity
 from collections import Counter, defaultdict
 import joblib
 import os
 from datetime import datetime
+from app.post_store import PostStore
+from app.topk import sparse_row_top_k
+from app.online_tfidf import HashedTfidfVectorizer
+from app.text_pipeline import TextPipeline, clean_text, post_document
+
+# İçerik vektörleştirme modları: 'tfidf' sözlüklü TfidfVectorizer (yeni postlar
+# sabit sözlükle dönüştürülür), 'hashing' sabit boyutlu hash uzayı ve artımlı IDF
+VECTORIZER_MODES = ('tfidf', 'hashing')
+
+# Kümeleme modları: 'kmeans' tam KMeans (yeni postlar sabit merkezlerle atanır),
+# 'online' MiniBatchKMeans (yeni postlarla partial_fit, küme anahtar kelimeleri güncellenir)
+CLUSTERING_MODES = ('kmeans', 'online')
 
 class SmartContentAnalyzer:
-    def __init__(self):
+    # Online modda partial_fit'e verilen mini-batch boyutu
+    ONLINE_BATCH_SIZE = 1024
+    # Yeni postların merkezlere ortalama uzaklığı eğitimdekinin bu katını aşınca
+    # (en az DRIFT_MIN_POSTS yeni post ile) tam yeniden kümeleme gerekir
+    DRIFT_THRESHOLD = 1.5
+    DRIFT_MIN_POSTS = 200
+    
+    def __init__(self, vectorizer_mode: Optional[str] = None, clustering_mode: Optional[str] = None):
+        self.vectorizer_mode = vectorizer_mode or os.getenv("CONTENT_VECTORIZER", "tfidf")
+        if self.vectorizer_mode not in VECTORIZER_MODES:
+            raise ValueError(f"Geçersiz vektörleştirme modu: {self.vectorizer_mode}")
+        self.clustering_mode = clustering_mode or os.getenv("CONTENT_CLUSTERING", "kmeans")
+        if self.clustering_mode not in CLUSTERING_MODES:
+            raise ValueError(f"Geçersiz kümeleme modu: {self.clustering_mode}")
         self.vectorizer = None
         self.kmeans_model = None
         self.feature_matrix = None
@@ -19,6 +44,14 @@ class SmartContentAnalyzer:
         self.cluster_keywords = {}
         self.post_keywords = {}
         self.posts_data = []
+        self.post_store = PostStore()
+        self.text_pipeline = TextPipeline()
+        # Online kümeleme durumu: küme başına TF-IDF toplamları / post sayıları ve kayma ölçümü
+        self.cluster_sums = None
+        self.cluster_sizes = None
+        self.baseline_distance = 0.0
+        self.drift_distance_sum = 0.0
+        self.drift_posts = 0
         
         # Türkçe ve İngilizce stop words
         self.stop_words = {
@@ -36,47 +69,24 @@ class SmartContentAnalyzer:
     
     def clean_text(self, text: str) -> str:
         """Türkçe ve İngilizce metinleri temizler"""
-        if not text:
-            return ""
-        
-        text = text.lower()
-        # URL'leri kaldır
-        text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
-        # Mention ve hashtag'leri temizle
-        text = re.sub(r'[@#]\w+', '', text)
-        # Türkçe ve İngilizce karakterler dışındakileri kaldır
-        text = re.sub(r'[^\w\sçğıöşüÇĞIİÖŞÜ]', ' ', text)
-        # Fazla boşlukları temizle
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
+        return clean_text(text)
     
     def extract_content_keywords(self, posts: List[Dict[str, Any]], 
-                               max_features: int = 1000) -> Dict[int, List[str]]:
+                               max_features: int = 1000,
+                               post_store: Optional[PostStore] = None) -> Dict[int, List[str]]:
         """
         Her post için title + content'ten anahtar kelime çıkarır
         """
         print(f"📝 {len(posts)} post için içerik analizi başlıyor...")
         
-        documents = []
-        post_ids = []
         self.posts_data = posts
+        self.post_store = post_store if post_store is not None else PostStore(posts)
+        post_ids = [post['id'] for post in posts]
         
-        for post in posts:
-            # Title + content birleştir (title'a 3x ağırlık)
-            title = post.get('title', '') or ''
-            content = post.get('content', '') or ''
-            
-            # Title'ı 3 kez tekrarla (daha önemli)
-            combined_text = f"{title} {title} {title} {content}"
-            cleaned_text = self.clean_text(combined_text)
-            
-            documents.append(cleaned_text)
-            post_ids.append(post['id'])
+        # Metin temizleme (TEXT_PIPELINE_WORKERS > 1 ise süreç havuzunda)
+        documents = list(self.text_pipeline.post_documents(posts))
         
-        # TF-IDF ile vektörleştir
-        self.vectorizer = TfidfVectorizer(
-            max_features=max_features,
+        vectorizer_params = dict(
             stop_words=list(self.stop_words),
             min_df=2,  # En az 2 dokümanda geçmeli
             max_df=0.8,  # %80'den fazla dokümanda geçmemeli
@@ -84,23 +94,45 @@ class SmartContentAnalyzer:
             sublinear_tf=True,
             token_pattern=r'\b[a-zA-ZçğıöşüÇĞIİÖŞÜ]{2,}\b'  # Türkçe karakterler dahil
         )
+        if self.vectorizer_mode == 'hashing':
+            # Sabit hash uzayı: sözlük kırpılmaz, yeni postlar IDF'i günceller
+            self.vectorizer = HashedTfidfVectorizer(**vectorizer_params)
+        else:
+            # TF-IDF ile vektörleştir
+            self.vectorizer = TfidfVectorizer(max_features=max_features, **vectorizer_params)
         
         self.feature_matrix = self.vectorizer.fit_transform(documents)
         feature_names = self.vectorizer.get_feature_names_out()
         
         # Her post için en önemli kelimeleri çıkar
-        post_keywords = {}
-        for i, post_id in enumerate(post_ids):
-            scores = self.feature_matrix[i].toarray()[0]
-            # En yüksek 10 kelimeyi al
-            top_indices = scores.argsort()[-10:][::-1]
-            keywords = [feature_names[idx] for idx in top_indices if scores[idx] > 0]
-            post_keywords[post_id] = keywords
+        post_keywords = self._top_keywords(self.feature_matrix, post_ids, feature_names)
         
         self.post_keywords = post_keywords
-        print(f"✅ İçerik analizi tamamlandı. {len(feature_names)} benzersiz kelime bulundu.")
+        if self.vectorizer_mode == 'hashing':
+            n_terms = self.vectorizer.stats()['buckets_used']
+        else:
+            n_terms = len(feature_names)
+        print(f"✅ İçerik analizi tamamlandı. {n_terms} benzersiz kelime bulundu.")
         return post_keywords
     
+    def _document(self, post: Dict[str, Any]) -> str:
+        """Postun vektörleştirilecek metni (title'a 3x ağırlık)"""
+        return post_document(post.get('title'), post.get('content'))
+    
+    def _top_keywords(self, matrix, post_ids: List[int], feature_names) -> Dict[int, List[str]]:
+        """
+        TF-IDF matrisinin her satırı için en yüksek skorlu 10 kelime.
+        Seçim satırlar yoğunlaştırılmadan yalnızca dolu hücreler üzerinden yapılır;
+        eşit skorlarda sözlük sırası korunur.
+        """
+        offsets, columns, _ = sparse_row_top_k(matrix, 10)
+        keywords = np.asarray(feature_names, dtype=object)[columns].tolist()
+        offsets = offsets.tolist()
+        return {
+            post_id: keywords[offsets[i]:offsets[i + 1]]
+            for i, post_id in enumerate(post_ids)
+        }
+    
     def cluster_posts(self, n_clusters: int = None) -> Dict[int, int]:
         """
         Postları benzer içeriklere göre kümeler
@@ -122,58 +154,126 @@ class SmartContentAnalyzer:
         
         print(f"🎯 {n_clusters} kümeye ayırma işlemi başlıyor...")
         
-        # K-Means kümeleme
-        self.kmeans_model = KMeans(
-            n_clusters=n_clusters,
-            random_state=42,
-            n_init=10,
-            max_iter=100
-        )
+        if self.clustering_mode == 'online':
+            # Mini-batch K-Means; sonradan yeni postlarla partial_fit edilir
+            self.kmeans_model = MiniBatchKMeans(
+                n_clusters=n_clusters,
+                random_state=42,
+                batch_size=self.ONLINE_BATCH_SIZE,
+                n_init=3,
+                max_iter=100
+            )
+        else:
+            # K-Means kümeleme
+            self.kmeans_model = KMeans(
+                n_clusters=n_clusters,
+                random_state=42,
+                n_init=10,
+                max_iter=100
+            )
         
         cluster_labels = self.kmeans_model.fit_predict(self.feature_matrix)
         
         # Post ID'leri ile küme etiketlerini eşleştir
-        post_ids = [post['id'] for post in self.posts_data]
-        for i, post_id in enumerate(post_ids):
-            self.post_clusters[post_id] = int(cluster_labels[i])
+        self.post_store.set_clusters(cluster_labels)
+        self.post_clusters = dict(zip(self.post_store.ids.tolist(), cluster_labels.tolist()))
         
         # Her küme için anahtar kelimeleri çıkar
-        self._extract_cluster_keywords()
+        if self.clustering_mode == 'online':
+            self._reset_cluster_stats(cluster_labels)
+        else:
+            self._extract_cluster_keywords(cluster_labels)
         
         print(f"✅ Kümeleme tamamlandı. {len(set(cluster_labels))} küme oluşturuldu.")
         return self.post_clusters
     
-    def _extract_cluster_keywords(self):
-        """Her küme için karakteristik anahtar kelimeleri bulur"""
+    def _extract_cluster_keywords(self, labels: np.ndarray):
+        """
+        Her küme için karakteristik anahtar kelimeleri bulur. Tüm kümelerin TF-IDF
+        toplamları üyelik matrisiyle tek çarpımda hesaplanır.
+        """
+        cluster_sums = np.asarray((self._cluster_indicator(labels) @ self.feature_matrix).todense())
+        cluster_sizes = np.bincount(labels, minlength=self.kmeans_model.n_clusters)
+        self.cluster_keywords = {}
+        self._update_cluster_keywords(np.flatnonzero(cluster_sizes), cluster_sums)
+    
+    def _cluster_indicator(self, labels: np.ndarray) -> sparse.csr_matrix:
+        """(küme x post) 0/1 üyelik matrisi"""
+        n_clusters = self.kmeans_model.n_clusters
+        return sparse.csr_matrix(
+            (np.ones(len(labels)), (labels, np.arange(len(labels)))),
+            shape=(n_clusters, len(labels))
+        )
+    
+    def _reset_cluster_stats(self, labels: np.ndarray):
+        """
+        Online mod için küme toplamlarını, boyutlarını ve kayma referansını
+        tüm postlardan oluşturur
+        """
+        n_clusters = self.kmeans_model.n_clusters
+        self.cluster_sums = np.asarray((self._cluster_indicator(labels) @ self.feature_matrix).todense())
+        self.cluster_sizes = np.bincount(labels, minlength=n_clusters)
+        # Eğitimde postların en yakın merkeze ortalama kare uzaklığı
+        self.baseline_distance = self.kmeans_model.inertia_ / max(len(labels), 1)
+        self.drift_distance_sum = 0.0
+        self.drift_posts = 0
+        self.cluster_keywords = {}
+        self._update_cluster_keywords(np.unique(labels))
+    
+    def _update_cluster_keywords(self, cluster_ids, cluster_sums: Optional[np.ndarray] = None):
+        """Verilen kümelerin anahtar kelimelerini küme toplamlarından yeniler"""
+        if cluster_sums is None:
+            cluster_sums = self.cluster_sums
         feature_names = self.vectorizer.get_feature_names_out()
-        
-        for cluster_id in set(self.post_clusters.values()):
-            # Bu kümedeki postları bul
-            cluster_post_indices = [
-                i for i, post_id in enumerate([post['id'] for post in self.posts_data])
-                if self.post_clusters.get(post_id) == cluster_id
-            ]
-            
-            if not cluster_post_indices:
-                continue
-            
-            # Bu kümedeki postların TF-IDF skorlarını topla
-            cluster_tfidf = self.feature_matrix[cluster_post_indices].sum(axis=0).A1
-            
+        for cluster_id in cluster_ids:
+            cluster_tfidf = cluster_sums[cluster_id]
             # En yüksek skorlu 15 kelimeyi al
             top_indices = cluster_tfidf.argsort()[-15:][::-1]
-            cluster_keywords = [feature_names[i] for i in top_indices if cluster_tfidf[i] > 0]
-            
-            self.cluster_keywords[cluster_id] = cluster_keywords
+            self.cluster_keywords[int(cluster_id)] = [feature_names[i] for i in top_indices if cluster_tfidf[i] > 0]
+    
+    def _partial_fit_clusters(self, matrix) -> np.ndarray:
+        """
+        Yeni postlarla MiniBatchKMeans'i mini-batch'ler halinde günceller ve
+        kümelerini atar. Kayma güncellemeden önceki merkezlere uzaklıkla ölçülür;
+        küme toplamları ve değişen kümelerin anahtar kelimeleri artımlı yenilenir.
+        """
+        distances = self.kmeans_model.transform(matrix).min(axis=1)
+        self.drift_distance_sum += float(np.square(distances).sum())
+        self.drift_posts += matrix.shape[0]
+        
+        for start in range(0, matrix.shape[0], self.ONLINE_BATCH_SIZE):
+            self.kmeans_model.partial_fit(matrix[start:start + self.ONLINE_BATCH_SIZE])
+        labels = self.kmeans_model.predict(matrix)
+        
+        self.cluster_sums += np.asarray((self._cluster_indicator(labels) @ matrix).todense())
+        self.cluster_sizes += np.bincount(labels, minlength=self.kmeans_model.n_clusters)
+        self._update_cluster_keywords(np.unique(labels))
+        return labels
+    
+    def cluster_drift(self) -> float:
+        """
+        Son tam kümelemeden beri gelen postların merkezlere ortalama kare
+        uzaklığının eğitimdeki ortalamaya oranı (1.0 = eğitimdeki kadar uyumlu)
+        """
+        if not self.drift_posts or self.baseline_distance <= 0:
+            return 0.0
+        return (self.drift_distance_sum / self.drift_posts) / self.baseline_distance
+    
+    def needs_recluster(self) -> bool:
+        """Online modda kayma eşiği aşıldı mı"""
+        return (self.clustering_mode == 'online'
+                and self.drift_posts >= self.DRIFT_MIN_POSTS
+                and self.cluster_drift() > self.DRIFT_THRESHOLD)
     
-    def analyze_posts(self, posts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def analyze_posts(self, posts: List[Dict[str, Any]],
+                      post_store: Optional[PostStore] = None) -> Dict[str, Any]:
         """
         Ana analiz fonksiyonu - tüm postları analiz eder
         """
         print(f"🚀 {len(posts)} post için tam analiz başlıyor...")
         
         # 1. İçerik anahtar kelimeleri
-        content_keywords = self.extract_content_keywords(posts)
+        content_keywords = self.extract_content_keywords(posts, post_store=post_store)
         
         # 2. Kümeleme
         post_clusters = self.cluster_posts()
@@ -182,39 +282,9 @@ class SmartContentAnalyzer:
         results = {}
         for post in posts:
             post_id = post['id']
-            
-            # Mevcut manuel etiketler
-            existing_tags = post.get('tags', []) or []
-            if isinstance(existing_tags, str):
-                try:
-                    existing_tags = json.loads(existing_tags)
-                except:
-                    existing_tags = []
-            
-            # İçerik anahtar kelimeleri
-            content_keys = content_keywords.get(post_id, [])
-            
-            # Küme anahtar kelimeleri
-            cluster_id = post_clusters.get(post_id, -1)
-            cluster_keys = self.cluster_keywords.get(cluster_id, [])[:5]  # En önemli 5'i
-            
-            # Hepsini birleştir (tekrarları kaldır, sırayı koru)
-            all_keywords = existing_tags.copy()
-            for keyword in content_keys + cluster_keys:
-                if keyword not in all_keywords:
-                    all_keywords.append(keyword)
-            
-            results[post_id] = {
-                'post_id': post_id,
-                'title': post.get('title', ''),
-                'content_preview': (post.get('content', '') or '')[:150] + '...',
-                'original_tags': existing_tags,
-                'content_keywords': content_keys,
-                'cluster_id': cluster_id,
-                'cluster_keywords': cluster_keys,
-                'enhanced_tags': all_keywords,
-                'analysis_timestamp': datetime.now().isoformat()
-            }
+            results[post_id] = self._post_result(
+                post, content_keywords.get(post_id, []), post_clusters.get(post_id, -1)
+            )
         
         summary = {
             'post_analysis': results,
@@ -227,6 +297,82 @@ class SmartContentAnalyzer:
         print(f"✅ Analiz tamamlandı! {len(results)} post analiz edildi.")
         return summary
     
+    def _post_result(self, post: Dict[str, Any], content_keys: List[str], cluster_id: int) -> Dict[str, Any]:
+        """Manuel etiketler, içerik ve küme anahtar kelimelerinden postun analiz sonucu"""
+        # Mevcut manuel etiketler
+        existing_tags = post.get('tags', []) or []
+        if isinstance(existing_tags, str):
+            try:
+                existing_tags = json.loads(existing_tags)
+            except:
+                existing_tags = []
+        
+        # Küme anahtar kelimeleri
+        cluster_keys = self.cluster_keywords.get(cluster_id, [])[:5]  # En önemli 5'i
+        
+        # Hepsini birleştir (tekrarları kaldır, sırayı koru)
+        all_keywords = existing_tags.copy()
+        for keyword in content_keys + cluster_keys:
+            if keyword not in all_keywords:
+                all_keywords.append(keyword)
+        
+        return {
+            'post_id': post['id'],
+            'title': post.get('title', ''),
+            'content_preview': (post.get('content', '') or '')[:150] + '...',
+            'original_tags': existing_tags,
+            'content_keywords': content_keys,
+            'cluster_id': cluster_id,
+            'cluster_keywords': cluster_keys,
+            'enhanced_tags': all_keywords,
+            'analysis_timestamp': datetime.now().isoformat()
+        }
+    
+    def analyze_new_posts(self, posts: List[Dict[str, Any]], rows: np.ndarray) -> Dict[int, Dict[str, Any]]:
+        """
+        Post deposuna eklenmiş yeni postları eğitilmiş modellerle analiz eder.
+        
+        Varsayılan modlarda metinler fit edilmiş TF-IDF vectorizer ile dönüştürülür
+        ve kümeler mevcut KMeans modeliyle atanır; sözlük, küme merkezleri ve küme
+        anahtar kelimeleri değişmez. 'hashing' vektörleştirme modunda yeni postların
+        doküman frekansları IDF'e eklenir ve sözlük dışı terimler de anahtar kelime
+        olabilir. 'online' kümeleme modunda model yeni postlarla partial_fit edilir
+        ve değişen kümelerin anahtar kelimeleri yenilenir. Maliyet korpusa değil
+        yeni post sayısına bağlıdır.
+        
+        Args:
+            posts: Yeni postlar
+            rows: Postların post_store'daki satırları
+        
+        Returns:
+            post_id -> analiz sonucu (analyze_posts ile aynı biçimde)
+        """
+        if self.vectorizer is None or self.kmeans_model is None:
+            raise ValueError("Önce analyze_posts çağırın!")
+        
+        post_ids = [post['id'] for post in posts]
+        documents = [self._document(post) for post in posts]
+        if self.vectorizer_mode == 'hashing':
+            matrix = self.vectorizer.partial_fit_transform(documents)
+        else:
+            matrix = self.vectorizer.transform(documents)
+        if self.clustering_mode == 'online':
+            labels = self._partial_fit_clusters(matrix)
+        else:
+            labels = self.kmeans_model.predict(matrix)
+        content_keywords = self._top_keywords(matrix, post_ids, self.vectorizer.get_feature_names_out())
+        
+        self.feature_matrix = sparse.vstack([self.feature_matrix, matrix], format='csr')
+        self.posts_data = self.post_store.posts
+        self.post_store.set_clusters(labels, rows)
+        self.post_clusters.update(zip(post_ids, labels.tolist()))
+        self.post_keywords.update(content_keywords)
+        
+        return {
+            post_id: self._post_result(post, content_keywords[post_id], cluster_id)
+            for post, post_id, cluster_id in zip(posts, post_ids, labels.tolist())
+        }
+    
     def get_similar_posts(self, post_id: int, top_n: int = 5) -> List[Dict[str, Any]]:
         """Belirli bir posta benzer postları bulur"""
         if post_id not in self.post_clusters:
@@ -234,34 +380,16 @@ class SmartContentAnalyzer:
         
         # Aynı kümedeki postları bul
         target_cluster = self.post_clusters[post_id]
-        similar_post_ids = [
-            pid for pid, cluster in self.post_clusters.items() 
-            if cluster == target_cluster and pid != post_id
-        ]
+        rows = self.post_store.rows_in_cluster(target_cluster)
+        rows = rows[self.post_store.ids[rows] != post_id][:top_n]
         
         # Post verilerini döndür
-        similar_posts = []
-        for pid in similar_post_ids[:top_n]:
-            post_data = next((p for p in self.posts_data if p['id'] == pid), None)
-            if post_data:
-                similar_posts.append(post_data)
-        
-        return similar_posts
+        return [self.post_store.posts[row] for row in rows]
     
     def get_posts_by_topic(self, cluster_id: int, top_n: int = 10) -> List[Dict[str, Any]]:
         """Belirli bir konudaki postları döndürür"""
-        topic_post_ids = [
-            pid for pid, cluster in self.post_clusters.items() 
-            if cluster == cluster_id
-        ]
-        
-        topic_posts = []
-        for pid in topic_post_ids[:top_n]:
-            post_data = next((p for p in self.posts_data if p['id'] == pid), None)
-            if post_data:
-                topic_posts.append(post_data)
-        
-        return topic_posts
+        rows = self.post_store.rows_in_cluster(cluster_id)[:top_n]
+        return [self.post_store.posts[row] for row in rows]
     
     def save_models(self, filepath: str = "models/"):
         """Eğitilmiş modelleri kaydet"""
@@ -276,7 +404,14 @@ class SmartContentAnalyzer:
         analysis_data = {
             'post_clusters': self.post_clusters,
             'cluster_keywords': self.cluster_keywords,
-            'post_keywords': self.post_keywords
+            'post_keywords': self.post_keywords,
+            'cluster_stats': {
+                'cluster_sums': self.cluster_sums,
+                'cluster_sizes': self.cluster_sizes,
+                'baseline_distance': self.baseline_distance,
+                'drift_distance_sum': self.drift_distance_sum,
+                'drift_posts': self.drift_posts
+            }
         }
         joblib.dump(analysis_data, f"{filepath}/analysis_results.pkl")
         
@@ -287,13 +422,18 @@ class SmartContentAnalyzer:
         try:
             if os.path.exists(f"{filepath}/content_vectorizer.pkl"):
                 self.vectorizer = joblib.load(f"{filepath}/content_vectorizer.pkl")
+                # Mod kaydedilen vectorizer'dan belirlenir
+                self.vectorizer_mode = 'hashing' if isinstance(self.vectorizer, HashedTfidfVectorizer) else 'tfidf'
             if os.path.exists(f"{filepath}/content_kmeans.pkl"):
                 self.kmeans_model = joblib.load(f"{filepath}/content_kmeans.pkl")
+                self.clustering_mode = 'online' if isinstance(self.kmeans_model, MiniBatchKMeans) else 'kmeans'
             if os.path.exists(f"{filepath}/analysis_results.pkl"):
                 analysis_data = joblib.load(f"{filepath}/analysis_results.pkl")
                 self.post_clusters = analysis_data.get('post_clusters', {})
                 self.cluster_keywords = analysis_data.get('cluster_keywords', {})
                 self.post_keywords = analysis_data.get('post_keywords', {})
+                for name, value in analysis_data.get('cluster_stats', {}).items():
+                    setattr(self, name, value)
             
             print(f"✅ Modeller {filepath} klasöründen yüklendi.")
             return True
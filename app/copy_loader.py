@@ -0,0 +1,293 @@
+import struct
+import numpy as np
+from datetime import timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.db import database
+from app.post_store import PostStore
+from app.post_loader import decode_tags
+
+# PostgreSQL ikili COPY biçimi: imza + bayraklar (int32) + başlık uzantısı uzunluğu (int32)
+COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+PG_EPOCH = np.datetime64('2000-01-01T00:00:00', 'us')
+
+# Alan türü -> (sabit bayt uzunluğu, big-endian numpy türü); None = değişken uzunluk
+FIELD_KINDS = {
+    'int4': (4, '>i4'),
+    'int8': (8, '>i8'),
+    'float8': (8, '>f8'),
+    'bool': (1, '?'),
+    'timestamptz': (8, '>i8'),
+    'text': (None, None)
+}
+
+# posts tablosunun sabit genişlikli sütunları (NULL'lar sorguda doldurulur)
+POST_FIXED_FIELDS = (
+    ('id', 'int8', 'id::int8'),
+    ('user_id', 'int8', 'user_id::int8'),
+    ('likes_count', 'int8', 'COALESCE(likes_count, 0)::int8'),
+    ('comments_count', 'int8', 'COALESCE(comments_count, 0)::int8'),
+    ('shares_count', 'int8', 'COALESCE(shares_count, 0)::int8'),
+    ('views_count', 'int8', 'COALESCE(views_count, 0)::int8'),
+    ('community_id', 'int8', 'COALESCE(community_id, -1)::int8'),
+    ('created_at', 'timestamptz', 'created_at::timestamptz')
+)
+
+# posts tablosunun değişken genişlikli / NULL olabilen sütunları
+POST_TEXT_FIELDS = (
+    ('title', 'text', 'title::text'),
+    ('content', 'text', 'content::text'),
+    ('media_url', 'text', 'media_url::text'),
+    ('visibility', 'text', 'visibility::text'),
+    ('tags', 'text', 'tags::text'),
+    ('updated_at', 'timestamptz', 'updated_at::timestamptz'),
+    ('allow_comments', 'bool', 'allow_comments'),
+    ('is_pinned', 'bool', 'is_pinned')
+)
+
+# Etkileşim tabloları: (tablo, zaman sütunu)
+INTERACTION_TABLES = {
+    'like': ('Likes', 'liked_at'),
+    'comment': ('Comments', 'created_at')
+}
+
+USER_TAG_FIELDS = (
+    ('user_id', 'int8', 'user_id::int8'),
+    ('tag', 'text', 'tag::text'),
+    ('interaction_type', 'text', 'interaction_type::text'),
+    ('interaction_count', 'int8', 'COALESCE(interaction_count, 0)::int8'),
+    ('last_interacted_at', 'timestamptz', 'last_interacted_at::timestamptz')
+)
+
+
+def _body_offset(buffer: bytes) -> int:
+    """Başlığı doğrular ve ilk satırın başladığı konumu döndürür"""
+    if not buffer.startswith(COPY_SIGNATURE):
+        raise ValueError("Geçersiz ikili COPY başlığı")
+    extension_length = struct.unpack_from('>i', buffer, len(COPY_SIGNATURE) + 4)[0]
+    return len(COPY_SIGNATURE) + 8 + extension_length
+
+
+def _timestamps(values: np.ndarray) -> np.ndarray:
+    """2000-01-01 UTC'den itibaren mikrosaniye değerlerini UTC datetime64[us] dizisine çevirir"""
+    return PG_EPOCH + values.astype('timedelta64[us]')
+
+
+def _aware_datetimes(stamps: np.ndarray) -> List[Any]:
+    """
+    UTC datetime64 dizisini, fetch_all yolunun timestamptz sütunlarında döndürdüğü
+    gibi timezone'lu datetime listesine çevirir (NaT -> None)
+    """
+    return [None if value is None else value.replace(tzinfo=timezone.utc)
+            for value in stamps.astype(object)]
+
+
+def decode_copy_binary(buffer: bytes, fields: Sequence[Tuple[str, str]]) -> Dict[str, Any]:
+    """
+    İkili COPY çıktısını sütunlara çözer.
+
+    Tüm alanlar sabit genişlikli ve NULL içermiyorsa satırlar tek bir yapılandırılmış
+    NumPy dtype ile np.frombuffer üzerinden kopyasız okunur. Aksi halde satırlar
+    sırayla çözülür; NULL değerler None (zaman damgalarında NaT) olur.
+
+    Returns:
+        sütun adı -> NumPy dizisi (text sütunları için str/None listesi)
+    """
+    offset = _body_offset(buffer)
+    # Son iki bayt -1 (int16) bitiş işaretidir
+    body_end = len(buffer) - 2
+    sizes = [FIELD_KINDS[kind][0] for _, kind in fields]
+
+    if all(size is not None for size in sizes):
+        columns = _decode_fixed(buffer, offset, body_end, fields)
+        if columns is not None:
+            return columns
+
+    return _decode_rows(buffer, offset, body_end, fields)
+
+
+def _decode_fixed(buffer: bytes, offset: int, body_end: int,
+                  fields: Sequence[Tuple[str, str]]) -> Optional[Dict[str, np.ndarray]]:
+    """Sabit genişlikli satırları vektörel çözer; NULL varsa None döndürür"""
+    dtype_fields = [('_n_fields', '>i2')]
+    row_size = 2
+    for name, kind in fields:
+        size, dtype = FIELD_KINDS[kind]
+        dtype_fields.append((f'_len_{name}', '>i4'))
+        dtype_fields.append((name, dtype))
+        row_size += 4 + size
+
+    body_size = body_end - offset
+    if body_size % row_size:
+        return None
+
+    rows = np.frombuffer(buffer, dtype=np.dtype(dtype_fields), count=body_size // row_size, offset=offset)
+    if np.any(rows['_n_fields'] != len(fields)):
+        return None
+    for name, kind in fields:
+        if np.any(rows[f'_len_{name}'] != FIELD_KINDS[kind][0]):
+            return None
+
+    columns = {}
+    for name, kind in fields:
+        values = rows[name]
+        if kind == 'timestamptz':
+            columns[name] = _timestamps(values)
+        else:
+            columns[name] = values.astype(values.dtype.newbyteorder('='))
+    return columns
+
+
+def _decode_rows(buffer: bytes, offset: int, body_end: int,
+                 fields: Sequence[Tuple[str, str]]) -> Dict[str, Any]:
+    """Değişken genişlikli veya NULL içeren satırları sırayla çözer"""
+    values: List[List[Any]] = [[] for _ in fields]
+    unpack_short = struct.Struct('>h').unpack_from
+    unpack_int = struct.Struct('>i').unpack_from
+    decoders = {
+        'int4': struct.Struct('>i').unpack_from,
+        'int8': struct.Struct('>q').unpack_from,
+        'float8': struct.Struct('>d').unpack_from,
+        'bool': struct.Struct('?').unpack_from,
+        'timestamptz': struct.Struct('>q').unpack_from
+    }
+
+    while offset < body_end:
+        n_fields = unpack_short(buffer, offset)[0]
+        offset += 2
+        if n_fields != len(fields):
+            raise ValueError("COPY satırındaki alan sayısı beklenenden farklı")
+        for column, (_, kind) in zip(values, fields):
+            length = unpack_int(buffer, offset)[0]
+            offset += 4
+            if length < 0:
+                column.append(None)
+                continue
+            if kind == 'text':
+                column.append(bytes(buffer[offset:offset + length]).decode('utf-8'))
+            else:
+                column.append(decoders[kind](buffer, offset)[0])
+            offset += length
+
+    columns = {}
+    for column, (name, kind) in zip(values, fields):
+        if kind == 'text':
+            columns[name] = column
+        elif kind == 'timestamptz':
+            micros = np.array([value if value is not None else 0 for value in column], dtype=np.int64)
+            stamps = _timestamps(micros)
+            stamps[[i for i, value in enumerate(column) if value is None]] = np.datetime64('NaT')
+            columns[name] = stamps
+        elif None in column:
+            columns[name] = np.array(column, dtype=object)
+        else:
+            columns[name] = np.array(column, dtype=np.dtype(FIELD_KINDS[kind][1]).newbyteorder('='))
+    return columns
+
+
+def _copy_query(table: str, fields: Sequence[Tuple[str, str, str]], order_by: Optional[str] = None) -> str:
+    query = f"SELECT {', '.join(expression for _, _, expression in fields)} FROM {table}"
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    return query
+
+
+async def _copy_out(connection, query: str) -> bytes:
+    """Sorgu sonucunu ikili COPY biçiminde belleğe alır"""
+    buffer = bytearray()
+
+    async def write(chunk):
+        buffer.extend(chunk)
+
+    await connection.copy_from_query(query, output=write, format='binary')
+    return bytes(buffer)
+
+
+async def _copy_columns(connection, table: str, fields: Sequence[Tuple[str, str, str]],
+                        order_by: Optional[str] = None) -> Dict[str, Any]:
+    buffer = await _copy_out(connection, _copy_query(table, fields, order_by))
+    return decode_copy_binary(buffer, [(name, kind) for name, kind, _ in fields])
+
+
+async def copy_post_columns(table: str = "posts") -> Dict[str, Any]:
+    """
+    posts tablosunu iki ikili COPY ile sütun dizilerine okur.
+
+    Sabit genişlikli sütunlar vektörel, metin sütunları satır satır çözülür. İki COPY
+    aynı REPEATABLE READ anlık görüntüsünde ve aynı sırayla çalıştırıldığından
+    satırlar hizalıdır.
+    """
+    order_by = "created_at DESC, id DESC"
+    async with database.connection() as connection:
+        raw = connection.raw_connection
+        async with raw.transaction(isolation='repeatable_read', readonly=True):
+            columns = await _copy_columns(raw, table, POST_FIXED_FIELDS, order_by)
+            columns.update(await _copy_columns(raw, table, POST_TEXT_FIELDS, order_by))
+    return columns
+
+
+async def copy_post_store(table: str = "posts") -> PostStore:
+    """
+    posts tablosunu ikili COPY ile okuyup EnhancedRecommender.fit'in kullandığı
+    PostStore'u (post dict'leri + sütun dizileri) oluşturur
+    """
+    columns = await copy_post_columns(table)
+    n_posts = len(columns['id'])
+
+    created_at = _aware_datetimes(columns['created_at'])
+    updated_at = _aware_datetimes(columns['updated_at'])
+    community_ids = columns['community_id'].tolist()
+    tags = decode_tags(columns['tags'])
+    id_list = columns['id'].tolist()
+    user_ids = columns['user_id'].tolist()
+    counters = {name: columns[name].tolist() for name in PostStore.COUNTER_COLUMNS}
+
+    posts = []
+    for i in range(n_posts):
+        post = {
+            'id': id_list[i],
+            'user_id': user_ids[i],
+            'title': columns['title'][i],
+            'content': columns['content'][i],
+            'media_url': columns['media_url'][i],
+            'created_at': created_at[i],
+            'updated_at': updated_at[i],
+            'visibility': columns['visibility'][i],
+            'tags': tags[i],
+            'allow_comments': columns['allow_comments'][i],
+            'is_pinned': columns['is_pinned'][i],
+            'community_id': community_ids[i] if community_ids[i] != -1 else None
+        }
+        for name in PostStore.COUNTER_COLUMNS:
+            post[name] = counters[name][i]
+        posts.append(post)
+
+    return PostStore.from_columns(posts, {
+        'ids': columns['id'],
+        'created_at': columns['created_at'],
+        'community_ids': columns['community_id'],
+        'visibility': np.array(columns['visibility'], dtype=object),
+        **{name: columns[name] for name in PostStore.COUNTER_COLUMNS}
+    })
+
+
+async def copy_interactions(interaction_type: str, table: Optional[str] = None) -> Dict[str, np.ndarray]:
+    """
+    Likes / Comments tablosunu (user_id, post_id, timestamp) dizilerine okur
+    """
+    default_table, time_column = INTERACTION_TABLES[interaction_type]
+    table = table or default_table
+    fields = (
+        ('user_id', 'int8', 'user_id::int8'),
+        ('post_id', 'int8', 'post_id::int8'),
+        ('timestamp', 'timestamptz', f'{time_column}::timestamptz')
+    )
+    async with database.connection() as connection:
+        return await _copy_columns(connection.raw_connection, table, fields, f"{time_column} DESC")
+
+
+async def copy_user_tag_interactions(table: str = "user_tag_interactions") -> Dict[str, Any]:
+    """
+    user_tag_interactions tablosunu sütun dizilerine okur
+    """
+    async with database.connection() as connection:
+        return await _copy_columns(connection.raw_connection, table, USER_TAG_FIELDS, "id")
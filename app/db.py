@@ -14,4 +14,36 @@ DATABASE_URL = (
     f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
 
-database = Database(DATABASE_URL) 
\ No newline at end of file
+# Ortam değişkeni son eki -> (asyncpg.create_pool parametresi, tür)
+POOL_SETTINGS = {
+    "MIN_SIZE": ("min_size", int),
+    "MAX_SIZE": ("max_size", int),
+    "STATEMENT_CACHE_SIZE": ("statement_cache_size", int),
+    "COMMAND_TIMEOUT": ("command_timeout", float),
+    "CONNECT_TIMEOUT": ("timeout", float),
+    "MAX_INACTIVE_LIFETIME": ("max_inactive_connection_lifetime", float),
+}
+
+
+def pool_options(prefix: str, **defaults) -> dict:
+    """
+    Havuz ayarlarını <prefix>_MIN_SIZE, <prefix>_MAX_SIZE vb. ortam
+    değişkenlerinden okur; tanımlı olmayanlar için defaults (yoksa asyncpg
+    varsayılanları) kullanılır
+    """
+    options = dict(defaults)
+    for suffix, (name, cast) in POOL_SETTINGS.items():
+        value = os.getenv(f"{prefix}_{suffix}")
+        if value:
+            options[name] = cast(value)
+    return options
+
+
+# API isteklerinin kullandığı havuz
+database = Database(DATABASE_URL, **pool_options("DB_POOL"))
+
+# Scheduler görevlerinin kendi thread / event loop'unda kullandığı ayrı havuz;
+# görevler API havuzunu tüketemez veya kapatamaz
+background_database = Database(
+    DATABASE_URL, **pool_options("DB_BACKGROUND_POOL", min_size=1, max_size=2)
+)
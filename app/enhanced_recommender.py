@@ -1,104 +1,364 @@
 import numpy as np
 import json
+import heapq
+import os
+import time
+from scipy import sparse
 from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from collections import defaultdict, Counter
 from app.features import TagFeatureExtractor
 from app.content_analyzer import SmartContentAnalyzer
+from app.scoring import ScoringEngine, resolve_post_tags
+from app.post_store import PostStore, _to_datetime64
+from app.topk import RankedCandidates, diversified_top_k, paged_diversified_top_k, top_k_indices
+from app.tag_index import InvertedTagIndex
+from app.ann import LSHIndex
+from app.cache import LRUCache, UserProfileCache
+from app.feed_store import FeedStore, FeedCursors
+from app.popularity import PopularityIndex
+from app.profiles import InteractionProfile
+from app.post_loader import POST_COLUMNS, load_posts
 from app.db import database
 from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
 from sklearn.cluster import MiniBatchKMeans
 
+# Etkileşim türü ağırlıkları (profil yükleme, etkileşim takibi ve profil güncellemesinde ortak)
+INTERACTION_WEIGHTS = {
+    'view': 1.0,
+    'like': 3.0,
+    'comment': 4.0,
+    'share': 5.0
+}
+
+_INTERACTION_WEIGHT_CASE = "CASE interaction_type {} ELSE 1.0 END".format(
+    " ".join(f"WHEN '{interaction_type}' THEN {weight}"
+             for interaction_type, weight in INTERACTION_WEIGHTS.items())
+)
+
+# Kullanıcı-etiket başına ağırlıklı skor; toplama veritabanında yapılır.
+# Sorgu metinleri sabit olduğundan asyncpg hazırlanmış ifadeyi bağlantı başına önbellekler.
+_TAG_SCORES_QUERY = """
+    SELECT user_id, tag,
+           CAST(SUM(interaction_count * {case}) AS DOUBLE PRECISION) AS score
+    FROM user_tag_interactions
+    {{where}}
+    GROUP BY user_id, tag
+    ORDER BY user_id, MIN(id)
+""".format(case=_INTERACTION_WEIGHT_CASE)
+
+_INTERACTION_SUMMARY_QUERY = """
+    SELECT user_id, interaction_type,
+           SUM(interaction_count) AS interaction_count,
+           MAX(last_interacted_at) AS last_interacted_at
+    FROM user_tag_interactions
+    {where}
+    GROUP BY user_id, interaction_type
+    ORDER BY user_id, MIN(id)
+"""
+
 class EnhancedRecommender:
+    # Aday üretiminde kullanılan en çok tercih edilen etiket sayısı
+    CANDIDATE_TAG_LIMIT = 20
+    # Aday kümesinin yeterli sayılması için öneri başına gereken aday sayısı
+    MIN_CANDIDATES_PER_RESULT = 5
+    # Materialize edilen feed uzunluğu (sonradan görülen postlar çıkarılabilsin diye /feed limitinden fazla)
+    MATERIALIZED_FEED_SIZE = 150
+    # Feed'i önceden hesaplanacak aktif kullanıcı penceresi ve üst sınırı
+    ACTIVE_USER_WINDOW = 24 * 3600
+    MAX_MATERIALIZED_USERS = 5000
+    # Sayfalı /feed'de bir seferde sıralanıp sabitlenen sayfa sayısı; imleç sabit
+    # sıralamanın sonuna geldiğinde sıralama bu kadar sayfa uzatılır
+    FEED_PIN_PAGES = 3
+    # Sabitlenen sıralamanın en fazla uzunluğu
+    FEED_PIN_SIZE = 500
+    # Artımlı post ingest'inde takip edilen sütunlar
+    WATERMARK_FIELDS = ('id', 'created_at', 'updated_at')
+    
     def __init__(self):
         self.posts = []
         self.post_ids = []
+        self.post_store = PostStore()
         self.tag_extractor = TagFeatureExtractor()
         self.content_analyzer = SmartContentAnalyzer()
         self.feature_matrix = None
         self.user_interactions = {}
-        self.user_profiles = {}
+        self.interaction_profiles = {}
+        self.user_profiles = UserProfileCache(max_size=100000, ttl=3600, negative_ttl=300)
+        self.user_cluster_counts = {}
         self.post_analysis = {}
         self.vectorizer = None
+        self.scoring_engine = ScoringEngine()
+        self.tag_index = InvertedTagIndex()
+        # /similar-posts?mode=approx recall / gecikme dengesi (README: Yaklaşık Benzerlik Araması)
+        self.ann_index = LSHIndex(
+            n_bits=int(os.getenv("ANN_BITS", "14")),
+            n_tables=int(os.getenv("ANN_TABLES", "48")),
+            probe=int(os.getenv("ANN_PROBE", "1"))
+        )
+        self.popularity_index = PopularityIndex(self.POPULARITY_WEIGHTS)
+        self.model_version = 0
+        # Kullanıcı -> {(model sürümü, exclude_seen): sıralama}; kullanıcı başına tek anahtar
+        self.ranking_cache = LRUCache(max_size=10000, ttl=300)
+        self.feed_store = FeedStore(max_age=900, path=os.getenv("FEED_STORE_PATH"))
+        self.feed_cursors = FeedCursors(max_size=20000, ttl=1800)
+        self.user_last_active = {}
+        self.ingest_watermark = {}
+        # /topics özeti: (model_version, özet)
+        self.topics_cache = None
         
-    async def load_user_profiles_from_db(self, user_id: Optional[int] = None):
+    async def load_user_profiles_from_db(self, user_id: Optional[int] = None,
+                                         user_ids: Optional[List[int]] = None):
         """
-        user_tag_interactions tablosundan kullanıcı profillerini yükler
+        user_tag_interactions tablosundan kullanıcı profillerini yükler.
+        user_id veya user_ids verilirse yalnızca bu kullanıcıların profilleri
+        yenilenir ve diğer profillere dokunulmaz; verilmezse tüm profiller
+        değiştirilir.
         """
         print("👤 Kullanıcı profilleri veritabanından yükleniyor...")
         
-        query = "SELECT * FROM user_tag_interactions"
-        if user_id:
-            query += f" WHERE user_id = {user_id}"
-            
-        interactions = await database.fetch_all(query)
+        where, values = "", None
+        if user_id is not None:
+            user_ids = [user_id]
+            where, values = "WHERE user_id = :user_id", {"user_id": user_id}
+        elif user_ids is not None:
+            user_ids = list(user_ids)
+            where, values = "WHERE user_id = ANY(:user_ids)", {"user_ids": user_ids}
         
-        self.user_profiles = {}
+        tag_scores = await database.fetch_all(_TAG_SCORES_QUERY.format(where=where), values)
+        summaries = await database.fetch_all(_INTERACTION_SUMMARY_QUERY.format(where=where), values)
         
-        for interaction in interactions:
-            uid = interaction['user_id']
-            if uid not in self.user_profiles:
-                self.user_profiles[uid] = {
-                    'tag_preferences': defaultdict(float),
-                    'interaction_summary': defaultdict(int),
+        profiles = {}
+        for row in tag_scores:
+            uid = row['user_id']
+            if uid not in profiles:
+                prefs = {}
+                profiles[uid] = {
+                    # Veritabanı profillerinde tercihler ham skorlardır
+                    'tag_preferences': prefs,
+                    'tag_scores': prefs,
+                    'interaction_summary': {},
                     'total_interactions': 0
                 }
+            profiles[uid]['tag_preferences'][row['tag']] = row['score']
+        
+        for row in summaries:
+            profile = profiles.get(row['user_id'])
+            if profile is None:
+                continue
+            count = row['interaction_count']
+            profile['interaction_summary'][row['interaction_type']] = count
+            profile['total_interactions'] += count
             
-            tag = interaction['tag']
-            interaction_type = interaction['interaction_type']
-            count = interaction['interaction_count']
-            
-            # Etkileşim türüne göre ağırlık
-            weight_map = {'view': 1.0, 'like': 3.0, 'comment': 4.0, 'share': 5.0}
-            score = count * weight_map.get(interaction_type, 1.0)
-            
-            self.user_profiles[uid]['tag_preferences'][tag] += score
-            self.user_profiles[uid]['interaction_summary'][interaction_type] += count
-            self.user_profiles[uid]['total_interactions'] += count
+            if row['last_interacted_at'] is not None:
+                self._mark_active(row['user_id'], row['last_interacted_at'].timestamp())
+        
+        if user_ids is not None:
+            # Verilen kullanıcılar: mevcut profillere birleştir
+            for uid in user_ids:
+                if uid in profiles:
+                    self.user_profiles[uid] = profiles[uid]
+                else:
+                    self.user_profiles.mark_missing(uid)
+        else:
+            self.user_profiles.replace_all(profiles)
+        
+        # Profiller değiştiği için önbellekteki sıralamaları geçersiz kıl
+        if user_ids is not None:
+            for uid in user_ids:
+                self.invalidate_user_cache(uid)
+        else:
+            self.ranking_cache.clear()
             
-        print(f"✅ {len(self.user_profiles)} kullanıcının profili yüklendi.")
+        print(f"✅ {len(profiles)} kullanıcının profili yüklendi.")
 
-    async def fit(self, posts: List[Dict[str, Any]], use_content_analysis: bool = True):
+    async def fit(self, posts: List[Dict[str, Any]], use_content_analysis: bool = True,
+                  post_store: Optional[PostStore] = None):
         """
         Gelişmiş makine öğrenmesi ile öneri modelini eğitir
+        
+        Args:
+            posts: Post listesi
+            use_content_analysis: İçerik analizi yapılsın mı
+            post_store: Aynı postlar için önceden oluşturulmuş depo (örn. post_loader'dan)
         """
         self.posts = posts
         self.post_ids = [post["id"] for post in posts]
+        self.post_store = post_store if post_store is not None else PostStore(posts)
         
         print(f"🚀 {len(posts)} post için gelişmiş öneri sistemi eğitiliyor...")
         
         if use_content_analysis and len(posts) > 3:
             # İçerik analizi yap
-            analysis_results = self.content_analyzer.analyze_posts(posts)
+            analysis_results = self.content_analyzer.analyze_posts(posts, post_store=self.post_store)
             self.post_analysis = analysis_results['post_analysis']
             
-            # Enhanced tags ile yeni post listesi oluştur
-            enhanced_posts = []
-            for post in posts:
-                enhanced_post = post.copy()
-                post_analysis = self.post_analysis.get(post['id'], {})
-                enhanced_post['tags'] = post_analysis.get('enhanced_tags', post.get('tags', []))
-                enhanced_posts.append(enhanced_post)
-            
             # Enhanced tags ile feature matrix oluştur
-            self.feature_matrix = self.tag_extractor.fit_transform(enhanced_posts)
+            self.feature_matrix = self.tag_extractor.fit_transform(self._enhanced_posts(posts))
         else:
             # Sadece mevcut etiketlerle
             self.feature_matrix = self.tag_extractor.fit_transform(posts)
         
         self.vectorizer = self.tag_extractor.vectorizer
         
+        # Benzer post aramaları için yaklaşık en yakın komşu indeksi
+        self.ann_index.fit(self.feature_matrix)
+        
+        # Skorlama dizilerini hazırla
+        self.scoring_engine.build(self.post_store, self.post_analysis)
+        
+        # Etiket -> post ters indeksini oluştur
+        self.tag_index.build(self._index_tags(post) for post in posts)
+        
+        # Popüler post sıralamasını oluştur
+        self.popularity_index.build(self.post_store)
+        
+        # Küme id'leri ve etiketler değiştiği için histogramlar ve profil birikimleri
+        # ilk ihtiyaçta yeniden oluşturulur
+        self.interaction_profiles = {}
+        self.user_cluster_counts = {}
+        
+        # Artımlı ingest bu noktadan sonraki postları okur
+        self.ingest_watermark = {}
+        self._advance_watermark(posts)
+        
+        # Önceki modelin önbellekteki sıralamaları artık geçersiz
+        self.model_version += 1
+        self.ranking_cache.clear()
+        
         # Tüm kullanıcı profillerini yükle
         await self.load_user_profiles_from_db()
         
         print(f"✅ Öneri sistemi eğitildi. {self.feature_matrix.shape[1]} özellik oluşturuldu.")
     
+    def _enhanced_posts(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Etiketleri içerik analizinin enhanced_tags'i ile değiştirilmiş post kopyaları
+        """
+        enhanced_posts = []
+        for post in posts:
+            enhanced_post = post.copy()
+            post_analysis = self.post_analysis.get(post['id'], {})
+            enhanced_post['tags'] = post_analysis.get('enhanced_tags', post.get('tags', []))
+            enhanced_posts.append(enhanced_post)
+        return enhanced_posts
+    
+    def _advance_watermark(self, posts: List[Dict[str, Any]]):
+        """
+        İndekslenmiş postların en büyük id / created_at / updated_at değerlerini günceller
+        """
+        for post in posts:
+            for field in self.WATERMARK_FIELDS:
+                value = post.get(field)
+                if value is None:
+                    continue
+                current = self.ingest_watermark.get(field)
+                if current is None or value > current:
+                    self.ingest_watermark[field] = value
+    
+    def add_posts(self, posts: List[Dict[str, Any]]) -> int:
+        """
+        Yeni postları modeli yeniden eğitmeden tüm indekslere ekler.
+        
+        İçerik analizi fit edilmiş vectorizer ve KMeans modeliyle yapılır, etiket
+        vektörleri eğitilmiş TF-IDF sözlüğüyle çıkarılır; post deposu, skorlama
+        dizileri, ters etiket indeksi, LSH indeksi ve popülerlik sırası yalnızca yeni
+        satırlar için güncellenir. Zaten indekslenmiş postlar atlanır.
+        
+        Returns:
+            Eklenen post sayısı
+        """
+        posts = [post for post in posts if post['id'] not in self.post_store]
+        if not posts:
+            return 0
+        
+        rows = self.post_store.append(posts)
+        self.posts = self.post_store.posts
+        self.post_ids.extend(post['id'] for post in posts)
+        
+        if self.post_analysis and self.content_analyzer.kmeans_model is not None:
+            self.post_analysis.update(self.content_analyzer.analyze_new_posts(posts, rows))
+            features = self.tag_extractor.transform(self._enhanced_posts(posts))
+        else:
+            features = self.tag_extractor.transform(posts)
+        
+        self.feature_matrix = sparse.vstack([self.feature_matrix, features], format='csr')
+        self.ann_index.add(features)
+        self.scoring_engine.append(self.post_store, rows, self.post_analysis)
+        for row, post in zip(rows.tolist(), posts):
+            self.tag_index.add(row, self._index_tags(post))
+        self.popularity_index.add(rows, self.post_store.popularity(self.POPULARITY_WEIGHTS, rows))
+        self._advance_watermark(posts)
+        
+        # Yeni postlar sıralamalara girebilsin diye önbellekler geçersiz
+        self.model_version += 1
+        self.ranking_cache.clear()
+        return len(posts)
+    
+    def refresh_posts(self, posts: List[Dict[str, Any]]) -> int:
+        """
+        Zaten indekslenmiş, sonradan güncellenmiş postların sayaçlarını eşitler.
+        İçerik değişiklikleri günlük tam eğitimde işlenir.
+        
+        Returns:
+            Sayaçları değişen post sayısı
+        """
+        refreshed = 0
+        for post in posts:
+            row = self.post_store.row_of(post['id'])
+            if row is None:
+                continue
+            deltas = {
+                name: (post.get(name) or 0) - int(self.post_store.counters[name][row])
+                for name in PostStore.COUNTER_COLUMNS
+            }
+            deltas = {name: delta for name, delta in deltas.items() if delta}
+            if deltas:
+                self.update_post_counters(post['id'], deltas)
+                refreshed += 1
+        self._advance_watermark(posts)
+        return refreshed
+    
+    async def ingest_new_posts(self) -> Dict[str, int]:
+        """
+        Watermark'tan (en büyük id / created_at / updated_at) sonraki postları okuyup
+        yeni olanları add_posts ile indekslere ekler, güncellenenlerin sayaçlarını
+        eşitler. Sorgu yalnızca watermark'ı aşan satırları döndürür. Online
+        kümelemede yeni postlar küme kayma eşiğini aşarsa model hafızadaki
+        tüm postlarla yeniden eğitilir (küme id'leri etiketleri, skorları ve
+        profilleri etkilediğinden yalnızca KMeans'i yenilemek yetmez).
+        
+        Returns:
+            {'fetched': okunan, 'added': eklenen, 'refreshed': güncellenen,
+             'reclustered': yeniden kümeleme yapıldı mı}
+        """
+        conditions, values = [], {}
+        for field in self.WATERMARK_FIELDS:
+            if self.ingest_watermark.get(field) is not None:
+                conditions.append(f"{field} > :last_{field}")
+                values[f"last_{field}"] = self.ingest_watermark[field]
+        
+        posts = await load_posts(POST_COLUMNS, where=" OR ".join(conditions), values=values or None,
+                                 order_by="created_at DESC, id DESC")
+        
+        new_posts = [post for post in posts if post['id'] not in self.post_store]
+        updated_posts = [post for post in posts if post['id'] in self.post_store]
+        added = self.add_posts(new_posts)
+        refreshed = self.refresh_posts(updated_posts)
+        
+        reclustered = added > 0 and self.content_analyzer.needs_recluster()
+        if reclustered:
+            print(f"🎯 Küme kayması {self.content_analyzer.cluster_drift():.2f}, tam yeniden kümeleme yapılıyor...")
+            await self.fit(self.post_store.posts, post_store=self.post_store)
+        return {'fetched': len(posts), 'added': added, 'refreshed': refreshed, 'reclustered': reclustered}
+    
     def update_user_interactions(self, user_id: int, post_id: int, interaction_type: str, weight: float = 1.0):
         """
-        Kullanıcı etkileşimini günceller ve kullanıcı profilini yeniden hesaplar
+        Kullanıcı etkileşimini kaydeder ve profili yalnızca postun etiketleri
+        kadar işlemle artımlı günceller
         """
-        if user_id not in self.user_interactions:
-            self.user_interactions[user_id] = []
+        # Birikimler yoksa önceki etkileşimlerden bir kez oluştur
+        profile = self._interaction_profile(user_id)
         
         # Etkileşimi kaydet
         interaction = {
@@ -107,76 +367,205 @@ class EnhancedRecommender:
             'weight': weight,
             'timestamp': np.datetime64('now')
         }
-        self.user_interactions[user_id].append(interaction)
+        self.user_interactions.setdefault(user_id, []).append(interaction)
+        self._mark_active(user_id, time.time())
+        
+        # Küme histogramını güncelle
+        self._count_cluster_interaction(user_id, post_id)
         
         # Kullanıcı profilini güncelle
-        self._update_user_profile(user_id)
+        self._apply_interaction(profile, post_id, interaction_type)
+        profile.count(interaction_type)
+        profile.n_interactions = profile.base_interactions + len(self.user_interactions[user_id])
+        self.user_profiles[user_id] = profile.as_profile()
+        
+        # Kullanıcının önbellekteki sıralaması artık geçersiz
+        self.invalidate_user_cache(user_id)
     
-    def _update_user_profile(self, user_id: int):
+    def ingest_interactions(self, user_ids, post_ids, interaction_types, timestamps=None) -> int:
         """
-        Kullanıcının etkileşimlerinden ilgi profilini oluşturur
+        Etkileşim dizilerini toplu olarak modele ekler.
+        
+        Etkileşimler seyrek (kullanıcı x post) ağırlık matrisine çevrilir ve skorlama
+        motorunun (post x etiket) matrisiyle tek çarpımda kullanıcı başına etiket
+        ağırlıklarına dönüştürülür; küme ağırlıkları ve histogramlar da toplu
+        hesaplanır. Sonuç, etkileşimlerin update_user_interactions ile tek tek
+        eklenmesiyle aynıdır (kayan nokta toplama sırası hariç).
+        
+        Args:
+            user_ids: Kullanıcı id dizisi
+            post_ids: Post id dizisi
+            interaction_types: Etkileşim türü (tüm satırlar için tek değer veya dizi)
+            timestamps: Etkileşim zamanları (None ise şimdi)
+        
+        Returns:
+            Eklenen etkileşim sayısı
         """
-        if user_id not in self.user_interactions:
-            return
+        if self.scoring_engine.post_tag_matrix is None:
+            raise ValueError("Önce fit metodunu çağırmalısınız!")
         
-        tag_weights = defaultdict(float)
-        cluster_weights = defaultdict(float)
-        total_weight = 0
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        post_ids = np.asarray(post_ids, dtype=np.int64)
+        n_events = len(user_ids)
+        if not n_events:
+            return 0
+        if isinstance(interaction_types, str):
+            interaction_types = [interaction_types] * n_events
+        interaction_types = list(interaction_types)
+        weights = np.array([INTERACTION_WEIGHTS.get(t, 1.0) for t in interaction_types], dtype=np.float64)
+        if timestamps is None:
+            stamps = np.full(n_events, np.datetime64('now'))
+        elif isinstance(timestamps, np.ndarray) and timestamps.dtype.kind == 'M':
+            stamps = timestamps.astype('datetime64[us]')
+        else:
+            stamps = np.array([_to_datetime64(t) for t in timestamps], dtype='datetime64[us]')
         
-        # Etkileşim ağırlıkları
-        interaction_weights = {
-            'view': 1.0,
-            'like': 3.0,
-            'comment': 4.0,
-            'share': 5.0
-        }
+        users, user_rows = np.unique(user_ids, return_inverse=True)
+        user_list = users.tolist()
+        
+        # Önceki etkileşimlerin birikimleri yeni satırlar eklenmeden hazırlanmalı
+        profiles = [self._interaction_profile(user_id) for user_id in user_list]
+        profile_of = dict(zip(user_list, profiles))
+        
+        # Etkileşim kayıtları (görülen post maskesi ve kayıt için) ve tür sayaçları
+        for user_id, post_id, interaction_type, weight, stamp in zip(
+                user_ids.tolist(), post_ids.tolist(), interaction_types, weights.tolist(), stamps):
+            profile_of[user_id].count(interaction_type)
+            self.user_interactions.setdefault(user_id, []).append({
+                'post_id': post_id,
+                'interaction_type': interaction_type,
+                'weight': weight,
+                'timestamp': stamp
+            })
+        
+        # Son etkileşim zamanları
+        if timestamps is None:
+            last_active = np.full(len(users), time.time())
+        else:
+            valid = ~np.isnat(stamps)
+            seconds = stamps[valid].astype(np.int64) / 1e6
+            last_active = np.full(len(users), -np.inf)
+            np.maximum.at(last_active, user_rows[valid], seconds)
+        for user_id, timestamp in zip(user_list, last_active.tolist()):
+            self._mark_active(user_id, timestamp)
+        
+        # Bilinmeyen postlar profile katkı yapmaz (tek tek yoldaki gibi)
+        rows = self.post_store.rows_of(post_ids)
+        known = rows >= 0
+        user_rows, rows, weights = user_rows[known], rows[known], weights[known]
         
-        for interaction in self.user_interactions[user_id]:
-            post_id = interaction['post_id']
-            interaction_type = interaction['interaction_type']
-            base_weight = interaction_weights.get(interaction_type, 1.0)
+        # Küme histogramları
+        n_clusters = self.scoring_engine.n_clusters
+        cluster_ids = self.post_store.cluster_ids[rows]
+        in_range = (cluster_ids >= 0) & (cluster_ids < n_clusters)
+        histograms = np.zeros((len(users), max(n_clusters, 1)), dtype=np.int64)
+        np.add.at(histograms, (user_rows[in_range], cluster_ids[in_range]), 1)
+        
+        # (kullanıcı x post) @ (post x etiket) -> kullanıcı başına ham etiket ağırlıkları
+        user_posts = sparse.csr_matrix(
+            (weights, (user_rows, rows)), shape=(len(users), len(self.post_store))
+        )
+        tag_weights = (user_posts @ self.scoring_engine.post_tag_matrix).tocsr()
+        tag_names = np.empty(len(self.scoring_engine.tag_index), dtype=object)
+        for tag, col in self.scoring_engine.tag_index.items():
+            tag_names[col] = tag
+        
+        # Küme ağırlıkları yalnızca içerik analizi yapılmış postlardan
+        analyzed = np.fromiter((post_id in self.post_analysis for post_id in self.post_store.ids[rows].tolist()),
+                               dtype=bool, count=len(rows))
+        cluster_mask = analyzed & (cluster_ids != -1)
+        cluster_weights = sparse.csr_matrix(
+            (weights[cluster_mask], (user_rows[cluster_mask], cluster_ids[cluster_mask])),
+            shape=(len(users), int(cluster_ids.max(initial=0)) + 1)
+        )
+        
+        for i, (user_id, profile) in enumerate(zip(user_list, profiles)):
+            start, end = tag_weights.indptr[i], tag_weights.indptr[i + 1]
+            for tag, value in zip(tag_names[tag_weights.indices[start:end]], tag_weights.data[start:end].tolist()):
+                profile.tag_weights[tag] = profile.tag_weights.get(tag, 0.0) + value
+                profile.total_weight += value
+            start, end = cluster_weights.indptr[i], cluster_weights.indptr[i + 1]
+            for cluster_id, value in zip(cluster_weights.indices[start:end].tolist(),
+                                         cluster_weights.data[start:end].tolist()):
+                profile.cluster_weights[cluster_id] = profile.cluster_weights.get(cluster_id, 0.0) + value
+            profile.n_interactions = profile.base_interactions + len(self.user_interactions[user_id])
+            self.user_profiles[user_id] = profile.as_profile()
             
-            # Bu postun etiketlerini bul
-            post_data = next((p for p in self.posts if p['id'] == post_id), None)
-            if not post_data:
+            # Histogramı henüz oluşturulmamış kullanıcılarınki ilk ihtiyaçta yeni kayıtlarla kurulur
+            counts = self.user_cluster_counts.get(user_id)
+            if counts is None:
                 continue
-            
-            # Enhanced tags kullan
-            if post_id in self.post_analysis:
-                tags = self.post_analysis[post_id].get('enhanced_tags', [])
-                cluster_id = self.post_analysis[post_id].get('cluster_id', -1)
+            if len(counts) != n_clusters:
+                self._rebuild_cluster_counts(user_id)
             else:
-                tags = post_data.get('tags', [])
-                if isinstance(tags, str):
-                    try:
-                        tags = json.loads(tags)
-                    except:
-                        tags = []
-                cluster_id = -1
-            
-            # Etiket ağırlıklarını güncelle
-            for tag in tags:
-                tag_weights[tag] += base_weight
-                total_weight += base_weight
-            
-            # Küme ağırlıklarını güncelle
-            if cluster_id != -1:
-                cluster_weights[cluster_id] += base_weight
-        
-        # Normalize et
-        if total_weight > 0:
-            for tag in tag_weights:
-                tag_weights[tag] /= total_weight
-            for cluster in cluster_weights:
-                cluster_weights[cluster] /= total_weight
-        
-        # Kullanıcı profilini kaydet
-        self.user_profiles[user_id] = {
-            'tag_preferences': dict(tag_weights),
-            'cluster_preferences': dict(cluster_weights),
-            'total_interactions': len(self.user_interactions[user_id]),
-            'last_updated': np.datetime64('now')
-        }
+                counts += histograms[i, :n_clusters]
+        
+        # Etkilenen kullanıcıların önbellekteki sıralamaları geçersiz
+        for user_id in user_list:
+            self.invalidate_user_cache(user_id)
+        return n_events
+    
+    def _interaction_profile(self, user_id: int) -> InteractionProfile:
+        """
+        Kullanıcının profil birikimlerini döndürür; yoksa hafızadaki etkileşimlerinden oluşturur.
+        Kullanıcının veritabanından yüklenmiş profili varsa etkileşimler onun üzerine eklenir.
+        """
+        profile = self.interaction_profiles.get(user_id)
+        if profile is None:
+            profile = InteractionProfile()
+            stored = self.user_profiles.get(user_id)
+            # Hafızadaki birikimlerden üretilen profiller cluster_preferences içerir
+            if stored is not None and 'cluster_preferences' not in stored:
+                profile.merge(stored)
+            for interaction in self.user_interactions.get(user_id, []):
+                self._apply_interaction(profile, interaction['post_id'], interaction['interaction_type'])
+                profile.count(interaction['interaction_type'])
+            profile.n_interactions = profile.base_interactions + len(self.user_interactions.get(user_id, []))
+            self.interaction_profiles[user_id] = profile
+        return profile
+    
+    def _apply_interaction(self, profile: InteractionProfile, post_id: int, interaction_type: str):
+        """
+        Tek bir etkileşimi postun etiketleri ve kümesiyle profile ekler
+        """
+        post_data = self.post_store.get(post_id)
+        if not post_data:
+            return
+        
+        # Enhanced tags kullan
+        if post_id in self.post_analysis:
+            tags = self.post_analysis[post_id].get('enhanced_tags', [])
+            cluster_id = self.post_analysis[post_id].get('cluster_id', -1)
+        else:
+            tags = post_data.get('tags', [])
+            if isinstance(tags, str):
+                try:
+                    tags = json.loads(tags)
+                except:
+                    tags = []
+            cluster_id = -1
+        
+        profile.add(tags, cluster_id, INTERACTION_WEIGHTS.get(interaction_type, 1.0))
+    
+    async def _ensure_user_profile(self, user_id: int):
+        """
+        Profil önbellekte yoksa (ve yakın zamanda profilsiz olduğu doğrulanmadıysa)
+        kullanıcıyı veritabanından yükler
+        """
+        if user_id in self.user_profiles or self.user_profiles.is_missing(user_id):
+            return
+        print(f"👤 Kullanıcı {user_id} profili hafızada değil. Veritabanından yükleniyor...")
+        await self.load_user_profiles_from_db(user_id=user_id)
+    
+    async def _ensure_user_profiles(self, user_ids: List[int]):
+        """
+        Önbellekte olmayan (süresi dolmuş veya hiç yüklenmemiş) profilleri tek
+        sorguyla veritabanından yükler
+        """
+        missing = [user_id for user_id in dict.fromkeys(user_ids)
+                   if user_id not in self.user_profiles and not self.user_profiles.is_missing(user_id)]
+        if missing:
+            await self.load_user_profiles_from_db(user_ids=missing)
     
     async def recommend_for_user(self, user_id: int, top_n: int = 10,
                                exclude_seen: bool = True) -> List[Dict[str, Any]]:
@@ -184,181 +573,419 @@ class EnhancedRecommender:
         Kullanıcıya kişiselleştirilmiş öneriler sunar
         """
         # Eğer kullanıcı profili hafızada yoksa, o kullanıcıyı anlık olarak yükle
-        if user_id not in self.user_profiles:
-            print(f"👤 Kullanıcı {user_id} profili hafızada değil. Veritabanından yükleniyor...")
-            await self.load_user_profiles_from_db(user_id=user_id)
+        await self._ensure_user_profile(user_id)
 
-        if user_id not in self.user_profiles:
+        # Profil TTL ile düşebileceğinden tek okuma yapılır
+        user_profile = self.user_profiles.get(user_id)
+        if user_profile is None:
             # Veritabanından da bulunamadıysa yeni kullanıcıdır
             print(f"⚠️ Kullanıcı {user_id} için profil bulunamadı. Popüler gönderiler öneriliyor.")
             return self._get_diversified_popular_posts(top_n)
         
-        user_profile = self.user_profiles[user_id]
+        ranked = self._rank_candidates(user_id, user_profile, top_n, exclude_seen)
+        recommendations = self._build_recommendations(user_id, ranked, top_n)
+        
+        # Buna rağmen hala öneri yoksa, popülerleri ekle
+        if not recommendations:
+            print(f"ℹ️ Kişiselleştirilmiş öneri bulunamadı, popüler gönderilerle destekleniyor.")
+            return self._get_diversified_popular_posts(top_n)
+            
+        return recommendations
+    
+    def _rank_candidates(self, user_id: int, user_profile: Dict[str, Any], top_n: int,
+                         exclude_seen: bool = True) -> RankedCandidates:
+        """
+        Kullanıcı için skorlanmış aday listesini döndürür.
+        Sonuç kullanıcının önbellek kaydında (model sürümü, exclude_seen) anahtarıyla
+        tutulur; böylece kullanıcının tüm sıralamaları tek anahtarla silinir.
+        """
+        cache_key = (self.model_version, exclude_seen)
+        rankings = self.ranking_cache.get(user_id)
+        cached = rankings.get(cache_key) if rankings is not None else None
+        if cached is not None:
+            ranked, covers_corpus = cached
+            if covers_corpus or len(ranked) >= top_n * self.MIN_CANDIDATES_PER_RESULT:
+                return ranked
+        
         tag_preferences = user_profile['tag_preferences']
         
-        # Kullanıcının daha önce etkileşimde bulunduğu postları bul
-        seen_posts = set()
-        if exclude_seen and user_id in self.user_interactions:
-            seen_posts = {interaction['post_id'] for interaction in self.user_interactions[user_id]}
+        # Kullanıcının daha önce etkileşimde bulunduğu postları hariç tut
+        candidate_mask = self._candidate_mask(user_id, exclude_seen)
         
-        # Her post için gelişmiş benzerlik skoru hesapla
-        post_scores = []
+        # Aday postları kullanıcının en çok tercih ettiği etiketlerden üret
+        candidate_rows = self.tag_index.candidates(
+            heapq.nlargest(self.CANDIDATE_TAG_LIMIT, tag_preferences, key=tag_preferences.get)
+        )
+        candidate_rows = candidate_rows[candidate_mask[candidate_rows]]
         
-        for i, post in enumerate(self.posts):
-            post_id = post['id']
-            
-            # Daha önce görülen postları atla
-            if post_id in seen_posts:
-                continue
-            
-            # 1. KİŞİSELLEŞTİRME SKORU (Etiket ve Küme Bazlı)
-            personalization_score = 0.0
-            
-            # A. Etiket uyumu
-            tag_match_score = 0.0
-            matched_tags = 0
-            unknown_tags = 0
-            
-            if post_id in self.post_analysis:
-                post_tags = self.post_analysis[post_id].get('enhanced_tags', [])
+        covers_corpus = len(candidate_rows) < top_n * self.MIN_CANDIDATES_PER_RESULT
+        if not covers_corpus:
+            scores = self.scoring_engine.score(
+                tag_preferences,
+                self._user_cluster_interactions(user_id),
+                self._most_common_interaction(user_profile),
+                rows=candidate_rows
+            )
+        else:
+            # Aday sayısı yetersizse tüm postları skorla
+            candidate_rows = np.flatnonzero(candidate_mask)
+            scores = self.scoring_engine.score(
+                tag_preferences,
+                self._user_cluster_interactions(user_id),
+                self._most_common_interaction(user_profile)
+            )[candidate_rows]
+        
+        ranked = RankedCandidates(candidate_rows, scores)
+        # Eski model sürümlerinin sıralamaları taşınmaz
+        rankings = {key: value for key, value in (rankings or {}).items() if key[0] == self.model_version}
+        rankings[cache_key] = (ranked, covers_corpus)
+        self.ranking_cache.put(user_id, rankings)
+        return ranked
+    
+    async def recommend_for_users(self, user_ids: List[int], top_n: int = 10,
+                                  exclude_seen: bool = True) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Birden fazla kullanıcıya aynı anda öneri sunar.
+        
+        Kullanıcıların tercihleri (kullanıcı x etiket) matrisine çevrilip post x etiket
+        matrisiyle tek seyrek çarpımda skorlanır; bellek için kullanıcılar
+        scoring_engine.batch_size_for() boyutunda parçalara bölünür. Çeşitlendirme
+        kuralları recommend_for_user ile aynıdır. Önbellekte olmayan profiller tek
+        sorguyla yüklenir; veritabanında da profili olmayan kullanıcılara popüler
+        gönderiler önerilir.
+        """
+        await self._ensure_user_profiles(user_ids)
+        
+        results = {}
+        batch_users, batch_profiles = [], []
+        for user_id in dict.fromkeys(user_ids):
+            profile = self.user_profiles.get(user_id)
+            if profile is not None:
+                batch_users.append(user_id)
+                batch_profiles.append(profile)
             else:
-                post_tags = post.get('tags', [])
-                if isinstance(post_tags, str):
-                    try:
-                        post_tags = json.loads(post_tags)
-                    except:
-                        post_tags = []
-            
-            for tag in post_tags:
-                if tag in tag_preferences:
-                    tag_match_score += tag_preferences[tag]
-                    matched_tags += 1
-                else:
-                    unknown_tags += 1
-            
-            # Eşleşen etiketlerin ortalama ağırlığı
-            if matched_tags > 0:
-                personalization_score += (tag_match_score / matched_tags) * 2.0 # Etiket uyumunu 2x ağırlıklandır
-            
-            # Bilinmeyen etiketler için küçük bir ceza
-            personalization_score -= (unknown_tags / len(post_tags)) * 0.1
-            
-            # B. Küme uyumu (cluster_preferences kaldırıldığı için bu kısım basitleştirildi)
-            cluster_id = self.post_analysis.get(post_id, {}).get('cluster_id', -1)
-            
-            # 2. ÇEŞİTLİLİK BONUSU
-            diversity_bonus = 0.0
-            
-            # Kullanıcının az etkileşimde bulunduğu kümeleri tercih et
-            if cluster_id != -1:
-                user_cluster_interactions = sum(1 for interaction in self.user_interactions.get(user_id, [])
-                                               if self.post_analysis.get(interaction['post_id'], {}).get('cluster_id') == cluster_id)
-                
-                # Az etkileşimde bulunulan kümelere bonus ver
-                if user_cluster_interactions < 2:
-                    diversity_bonus += 0.3
-                elif user_cluster_interactions < 5:
-                    diversity_bonus += 0.1
-            
-            # 3. ETKİLEŞİM TÜRÜ BONUSU
-            interaction_preference_bonus = 0.0
-            
-            # En yaygın etkileşim türünü bul
-            if user_profile['interaction_summary']:
-                most_common_interaction = max(user_profile['interaction_summary'], key=user_profile['interaction_summary'].get)
-                
-                # Bu post türü kullanıcının tercih ettiği etkileşim türüne uygun mu?
-                content = post.get('content', '') or ''
-                if 'comment' in most_common_interaction and len(content) > 100:
-                    interaction_preference_bonus += 0.2
-                elif 'like' in most_common_interaction and post.get('likes_count', 0) > 5:
-                    interaction_preference_bonus += 0.15
-                elif 'share' in most_common_interaction and len(post_tags) > 2:
-                    interaction_preference_bonus += 0.1
-            
-            # 4. ZAMAN BAZLI BONUS (Yeni içeriklere hafif öncelik)
-            time_bonus = 0.0
-            if hasattr(post, 'created_at') and post.get('created_at'):
-                # Yeni postlara küçük bonus ver
-                time_bonus = 0.05
-            
-            # 5. POPÜLERLIK SKORU (Azaltılmış etki)
-            popularity_score = 0.0
-            if any([post.get('likes_count', 0), post.get('comments_count', 0), 
-                   post.get('shares_count', 0), post.get('views_count', 0)]):
-                popularity_score = (
-                    post.get('likes_count', 0) * 0.2 +
-                    post.get('comments_count', 0) * 0.3 +
-                    post.get('shares_count', 0) * 0.4 +
-                    post.get('views_count', 0) * 0.1
-                ) / 50.0  # Daha düşük normalize
-            
-            # 6. RASTGELE ÇEŞİTLİLİK FAKTÖRÜ
-            import random
-            randomness_factor = random.uniform(-0.05, 0.05)  # Küçük rastgelelik
-            
-            # TOPLAM SKOR HESAPLAMA
-            final_score = (
-                personalization_score * 0.70 +      # Ana kişiselleştirme skoru
-                diversity_bonus * 0.15 +             # Çeşitlilik bonusu  
-                interaction_preference_bonus * 0.10 + # Etkileşim tercihi
-                time_bonus * 0.03 +                  # Zaman bonusu
-                popularity_score * 0.02 +            # Popülerlik (çok düşük)
-                randomness_factor                    # Rastgelelik
+                results[user_id] = self._get_diversified_popular_posts(top_n)
+        
+        batch_size = self.scoring_engine.batch_size_for()
+        for start in range(0, len(batch_users), batch_size):
+            batch = batch_users[start:start + batch_size]
+            profiles = batch_profiles[start:start + batch_size]
+            batch_scores = self.scoring_engine.score_batch(
+                [profile['tag_preferences'] for profile in profiles],
+                [self._user_cluster_interactions(user_id) for user_id in batch],
+                [self._most_common_interaction(profile) for profile in profiles]
             )
             
-            post_scores.append((post_id, final_score, post))
-        
-        # Skora göre sırala
-        post_scores.sort(key=lambda x: x[1], reverse=True)
+            for user_id, scores in zip(batch, batch_scores):
+                candidate_rows = np.flatnonzero(self._candidate_mask(user_id, exclude_seen))
+                ranked = RankedCandidates(candidate_rows, scores[candidate_rows])
+                recommendations = self._build_recommendations(user_id, ranked, top_n)
+                results[user_id] = recommendations or self._get_diversified_popular_posts(top_n)
         
+        return results
+    
+    def _candidate_mask(self, user_id: int, exclude_seen: bool = True) -> np.ndarray:
+        """
+        Öneriye aday olabilecek post satırlarının maskesi (görülenler hariç)
+        """
+        candidate_mask = np.ones(len(self.post_store), dtype=bool)
+        if exclude_seen and user_id in self.user_interactions:
+            seen_rows = [self.post_store.row_of(interaction['post_id'])
+                         for interaction in self.user_interactions[user_id]]
+            candidate_mask[[row for row in seen_rows if row is not None]] = False
+        return candidate_mask
+    
+    def _build_recommendations(self, user_id: int, ranked: RankedCandidates,
+                               top_n: int) -> List[Dict[str, Any]]:
+        """
+        Sıralı adaylardan çeşitlendirilmiş öneri listesini oluşturur
+        """
         # ÇEŞİTLİLİK FİLTRELEMESİ - Aynı kümeden çok fazla öneri verme
-        recommendations = []
-        cluster_counts = {}
         max_per_cluster = max(2, top_n // 3)  # Her kümeden maksimum sayısı
+        picked, backfill = diversified_top_k(
+            ranked, self.post_store.cluster_ids, top_n, max_per_cluster
+        )
         
-        for post_id, score, post_data in post_scores:
-            if len(recommendations) >= top_n:
-                break
-                
-            # Bu postun kümesini kontrol et
-            cluster_id = self.post_analysis.get(post_id, {}).get('cluster_id', -1)
-            
-            # Küme limiti kontrolü
-            if cluster_id != -1:
-                if cluster_counts.get(cluster_id, 0) >= max_per_cluster:
-                    continue  # Bu kümeden yeterince öneri var
-                cluster_counts[cluster_id] = cluster_counts.get(cluster_id, 0) + 1
-            
+        recommendations = []
+        for row, score in picked:
+            post_data = self.post_store.posts[row]
             post_copy = post_data.copy()
-            post_copy['recommendation_score'] = float(score)
+            post_copy['recommendation_score'] = score
             post_copy['recommendation_reason'] = self._generate_recommendation_reason(user_id, post_data, score)
             recommendations.append(post_copy)
         
         # Eğer yeterli öneri yoksa, kalan yerleri en iyi skorlarla doldur
-        if len(recommendations) < top_n:
-            remaining_posts = [item for item in post_scores if item[0] not in [r['id'] for r in recommendations]]
-            for post_id, score, post_data in remaining_posts[:top_n - len(recommendations)]:
-                post_copy = post_data.copy()
-                post_copy['recommendation_score'] = float(score)
-                post_copy['recommendation_reason'] = "Genel öneri"
-                recommendations.append(post_copy)
+        for row, score in backfill:
+            post_copy = self.post_store.posts[row].copy()
+            post_copy['recommendation_score'] = score
+            post_copy['recommendation_reason'] = "Genel öneri"
+            recommendations.append(post_copy)
         
-        # Buna rağmen hala öneri yoksa, popülerleri ekle
-        if not recommendations:
-            print(f"ℹ️ Kişiselleştirilmiş öneri bulunamadı, popüler gönderilerle destekleniyor.")
-            return self._get_diversified_popular_posts(top_n)
-            
         return recommendations
     
+    def _mark_active(self, user_id: int, timestamp: float):
+        """
+        Kullanıcının son etkileşim zamanını günceller (feed materialize için)
+        """
+        if timestamp > self.user_last_active.get(user_id, 0.0):
+            self.user_last_active[user_id] = timestamp
+    
+    def active_users(self, window_seconds: Optional[float] = None,
+                     limit: Optional[int] = None) -> List[int]:
+        """
+        Son window_seconds içinde etkileşimde bulunan kullanıcıları en son aktif
+        olandan başlayarak döndürür (profilsiz olduğu doğrulananlar hariç; önbellekten
+        düşmüş profiller feed hesaplanırken yeniden yüklenir)
+        """
+        window_seconds = window_seconds or self.ACTIVE_USER_WINDOW
+        limit = limit or self.MAX_MATERIALIZED_USERS
+        since = time.time() - window_seconds
+        active = [
+            (timestamp, user_id) for user_id, timestamp in self.user_last_active.items()
+            if timestamp >= since and not self.user_profiles.is_missing(user_id)
+        ]
+        return [user_id for _, user_id in heapq.nlargest(limit, active)]
+    
+    async def materialize_feeds(self, user_ids: Optional[List[int]] = None) -> int:
+        """
+        Aktif kullanıcıların feed'lerini toplu skorlamayla hesaplayıp feed_store'a yazar
+        """
+        if user_ids is None:
+            user_ids = self.active_users()
+        await self._ensure_user_profiles(user_ids)
+        user_ids = [user_id for user_id in user_ids if user_id in self.user_profiles]
+        if not user_ids:
+            return 0
+        
+        model_version = self.model_version
+        feeds = await self.recommend_for_users(user_ids, top_n=self.MATERIALIZED_FEED_SIZE)
+        for user_id, recommendations in feeds.items():
+            self.feed_store.put(user_id, model_version, recommendations)
+        self.feed_store.prune()
+        return len(feeds)
+    
+    def get_materialized_feed(self, user_id: int, limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Önceden hesaplanmış feed'i döndürür; güncel değilse veya limit için yetersizse None.
+        Feed hesaplandıktan sonra görülen postlar çıkarılır. limit verilmezse feed'in
+        kalanının tamamı döner.
+        """
+        feed = self.feed_store.get(user_id, self.model_version)
+        if feed is None:
+            return None
+        
+        post_ids, scores, reasons = feed
+        recommendations, _ = self._feed_posts(user_id, post_ids, scores, reasons, 0, limit)
+        if limit is not None and len(recommendations) < limit:
+            return None
+        return recommendations
+    
+    def _feed_posts(self, user_id: int, post_ids: np.ndarray, scores: np.ndarray, reasons: List[str],
+                    offset: int = 0, limit: Optional[int] = None):
+        """
+        Kompakt feed dizilerini offset'ten başlayarak post kopyalarına çevirir;
+        kullanıcının gördüğü ve artık bulunmayan postlar atlanır
+        
+        Returns:
+            (öneriler, okunan son konumdan sonraki offset)
+        """
+        seen = {interaction['post_id'] for interaction in self.user_interactions.get(user_id, [])}
+        recommendations = []
+        position = offset
+        for post_id, score, reason in zip(post_ids[offset:].tolist(), scores[offset:].tolist(), reasons[offset:]):
+            if limit is not None and len(recommendations) >= limit:
+                break
+            position += 1
+            if post_id in seen:
+                continue
+            post_data = self.post_store.get(post_id)
+            if post_data is None:
+                continue
+            post_copy = post_data.copy()
+            post_copy['recommendation_score'] = score
+            post_copy['recommendation_reason'] = reason
+            recommendations.append(post_copy)
+        return recommendations, position
+    
+    def feed_pin_length(self, limit: int) -> int:
+        """
+        İlk feed isteğinde sıralanacak post sayısı (FEED_PIN_PAGES sayfa, en fazla FEED_PIN_SIZE)
+        """
+        return max(limit, min(self.FEED_PIN_SIZE, limit * self.FEED_PIN_PAGES))
+    
+    async def rank_feed(self, user_id: int, top_n: int) -> List[Dict[str, Any]]:
+        """
+        Feed için canlı sıralama; kişisel öneri yoksa popüler postlar
+        """
+        ranking = await self.recommend_for_user(user_id=user_id, top_n=top_n, exclude_seen=True)
+        if not ranking:
+            ranking = self._get_diversified_popular_posts(top_n=top_n)
+        return ranking
+    
+    def pin_feed(self, user_id: int, recommendations: List[Dict[str, Any]],
+                 limit: int, exhausted: bool = True) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Sıralamayı sonraki sayfalar için sabitler ve ilk sayfayı döndürür.
+        
+        Canlı, materialize ve popüler sıralamalar aynı kurala getirilir: küme limiti
+        (limit // 3) her limit'lik sayfaya ayrı uygulanır. Tek sayfaya sığan ve
+        bitmiş (exhausted) sıralama sabitlenmez; bitmemiş sıralama imleç sonuna
+        geldiğinde get_feed_page tarafından uzatılır.
+        
+        Returns:
+            (ilk sayfa, sonraki sayfanın imleci; sıralama bittiyse None)
+        """
+        if not recommendations:
+            return [], None
+        
+        recommendations = self._diversify_pages(recommendations, limit)
+        exhausted = exhausted or len(recommendations) >= self.FEED_PIN_SIZE
+        if exhausted and len(recommendations) <= limit:
+            return recommendations, None
+        
+        pin_id = self.feed_cursors.pin(user_id, self.model_version, recommendations, exhausted)
+        return recommendations[:limit], FeedCursors.encode(pin_id, min(limit, len(recommendations)))
+    
+    async def get_feed_page(self, user_id: int, cursor: str,
+                            limit: int) -> Optional[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        """
+        İmlecin gösterdiği sabit sıralamadan sonraki sayfayı yeniden skorlamadan okur.
+        Sabit sıralama bu sayfaya yetmiyorsa ve bitmemişse önce uzatılır.
+        İmleç hatalıysa ValueError; sıralamanın süresi dolduysa veya başka
+        kullanıcıya aitse None döner.
+        
+        Returns:
+            (sayfa, sonraki sayfanın imleci; sıralama bittiyse None)
+        """
+        pin_id, offset = FeedCursors.decode(cursor)
+        pinned = self.feed_cursors.get(pin_id, user_id)
+        if pinned is None:
+            return None
+        
+        _, post_ids, scores, reasons, exhausted = pinned
+        recommendations, position = [], offset
+        while True:
+            if not exhausted and position + limit - len(recommendations) > len(post_ids):
+                pinned = await self._extend_feed(user_id, pin_id, post_ids, limit)
+                if pinned is None:
+                    return None
+                _, post_ids, scores, reasons, exhausted = pinned
+            page, position = self._feed_posts(user_id, post_ids, scores, reasons, position,
+                                              limit - len(recommendations))
+            recommendations.extend(page)
+            if len(recommendations) >= limit or exhausted:
+                break
+        
+        has_more = position < len(post_ids) or not exhausted
+        return recommendations, FeedCursors.encode(pin_id, position) if has_more else None
+    
+    async def _extend_feed(self, user_id: int, pin_id: str, post_ids: np.ndarray, limit: int):
+        """
+        Sabit sıralamayı FEED_PIN_PAGES sayfa uzatır; sabitlenmiş postlar tekrar
+        eklenmez, önceki sayfalar değişmez
+        """
+        target = min(self.FEED_PIN_SIZE, len(post_ids) + limit * self.FEED_PIN_PAGES)
+        ranking = await self.rank_feed(user_id, target)
+        pinned_ids = set(post_ids.tolist())
+        tail = [post for post in ranking if post['id'] not in pinned_ids][:target - len(post_ids)]
+        exhausted = not tail or len(ranking) < target or len(post_ids) + len(tail) >= self.FEED_PIN_SIZE
+        return self.feed_cursors.extend(pin_id, user_id, self._diversify_pages(tail, limit), exhausted)
+    
+    def _diversify_pages(self, recommendations: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+        """
+        Küme limitini (limit // 3) her limit'lik sayfaya ayrı uygulayarak sıralar
+        """
+        cluster_of = self.post_store.cluster_ids
+        rows = [self.post_store.row_of(post['id']) for post in recommendations]
+        cluster_ids = np.array([cluster_of[row] if row is not None else -1 for row in rows], dtype=np.int64)
+        order = paged_diversified_top_k(
+            ((position, post.get('recommendation_score', 0.0)) for position, post in enumerate(recommendations)),
+            cluster_ids, len(recommendations), limit, max(2, limit // 3)
+        )
+        return [recommendations[position] for position, _ in order]
+    
+    def drop_user_profile(self, user_id: int):
+        """
+        Kullanıcının önbellekteki profilini, sıralamalarını ve feed'ini düşürür;
+        profil bir sonraki istekte veritabanından yüklenir
+        """
+        self.user_profiles.forget(user_id)
+        self.invalidate_user_cache(user_id)
+        self.feed_store.invalidate(user_id)
+    
+    def invalidate_user_cache(self, user_id: int):
+        """
+        Kullanıcının önbellekteki öneri sıralamalarını siler
+        """
+        self.ranking_cache.invalidate(user_id)
+    
+    def _index_tags(self, post: Dict[str, Any]) -> List[str]:
+        """
+        Postun ters indekse eklenecek etiketlerini (enhanced + ham etiketler) döndürür
+        """
+        tags = post.get('tags', []) or []
+        if isinstance(tags, str):
+            try:
+                tags = json.loads(tags)
+            except:
+                tags = []
+        return list(tags) + self.post_analysis.get(post['id'], {}).get('enhanced_tags', [])
+    
+    def _count_cluster_interaction(self, user_id: int, post_id: int):
+        """
+        Etkileşimi kullanıcının küme histogramına ekler (histogram yoksa
+        kaydedilmiş etkileşimlerden oluşturulur)
+        """
+        counts = self.user_cluster_counts.get(user_id)
+        if counts is None:
+            self._rebuild_cluster_counts(user_id)
+            return
+        
+        row = self.post_store.row_of(post_id)
+        if row is None:
+            return
+        cluster_id = self.post_store.cluster_ids[row]
+        if 0 <= cluster_id < len(counts):
+            counts[cluster_id] += 1
+    
+    def _rebuild_cluster_counts(self, user_id: int):
+        """
+        Kullanıcının küme histogramını hafızadaki etkileşimlerinden yeniden oluşturur
+        """
+        self.user_cluster_counts[user_id] = np.zeros(self.scoring_engine.n_clusters, dtype=np.int64)
+        for interaction in self.user_interactions.get(user_id, []):
+            self._count_cluster_interaction(user_id, interaction['post_id'])
+    
+    def _user_cluster_interactions(self, user_id: int) -> np.ndarray:
+        """
+        Kullanıcının küme başına etkileşim sayılarını döndürür. Histogram ilk
+        ihtiyaçta oluşturulur; hafızada etkileşimi olmayan kullanıcılar için sıfırlar.
+        """
+        counts = self.user_cluster_counts.get(user_id)
+        if counts is None:
+            if user_id not in self.user_interactions:
+                return np.zeros(self.scoring_engine.n_clusters, dtype=np.int64)
+            self._rebuild_cluster_counts(user_id)
+            counts = self.user_cluster_counts[user_id]
+        return counts
+    
+    def _most_common_interaction(self, user_profile: Dict[str, Any]) -> Optional[str]:
+        """
+        Kullanıcının en sık yaptığı etkileşim türünü döndürür
+        """
+        interaction_summary = user_profile.get('interaction_summary')
+        if not interaction_summary:
+            return None
+        return max(interaction_summary, key=interaction_summary.get)
+    
     def _generate_recommendation_reason(self, user_id: int, post_data: Dict, score: float) -> str:
         """
         Öneri nedenini açıklar
         """
-        if user_id not in self.user_profiles:
+        user_profile = self.user_profiles.get(user_id)
+        if user_profile is None:
             return "Popüler içerik"
         
-        user_profile = self.user_profiles[user_id]
         post_id = post_data['id']
         
         # Post etiketlerini al
@@ -390,112 +1017,135 @@ class EnhancedRecommender:
         else:
             return "Sizin için seçildi"
     
+    # Popüler içerik sıralamasında kullanılan sayaç ağırlıkları
+    POPULARITY_WEIGHTS = {
+        'likes_count': 0.3,
+        'comments_count': 0.5,
+        'shares_count': 0.7,
+        'views_count': 0.1
+    }
+    
+    # Etkileşim türünün artırdığı post sayacı
+    INTERACTION_COUNTERS = {
+        'view': 'views_count',
+        'like': 'likes_count',
+        'comment': 'comments_count',
+        'share': 'shares_count'
+    }
+    
     def _get_diversified_popular_posts(self, top_n: int = 10) -> List[Dict[str, Any]]:
         """
         Çeşitlendirilmiş popüler postları döndürür (yeni kullanıcılar için)
-        """
-        # Popülerlik skoruna göre sırala
-        posts_with_scores = []
-        for post in self.posts:
-            popularity_score = (
-                post.get('likes_count', 0) * 0.3 +
-                post.get('comments_count', 0) * 0.5 +
-                post.get('shares_count', 0) * 0.7 +
-                post.get('views_count', 0) * 0.1
-            )
-            
-            # Rastgele çeşitlilik ekle
-            import random
-            diversity_factor = random.uniform(0.8, 1.2)
-            final_score = popularity_score * diversity_factor
-            
-            posts_with_scores.append((final_score, post))
         
-        posts_with_scores.sort(key=lambda x: x[0], reverse=True)
+        Rastgele çarpan (0.8-1.2) yalnızca popülerlik sırasının bir önekine uygulanır.
+        Önek dışındaki bir post en fazla sınır skorunun 1.2 katına ulaşabildiğinden,
+        son seçilen postun skoru bu değerin üstündeyse sonuç tüm korpusla aynıdır;
+        değilse önek ikiye katlanır. Önek dışında yalnızca sıfır skorlu postlar
+        kaldıysa (sınır 0) önek büyütülmez; bu postlar birbirinden ayırt edilemez.
+        """
+        if top_n <= 0:
+            return []
         
-        # Çeşitlilik filtresi - farklı kümelerden seç
-        popular_posts = []
-        used_clusters = set()
+        index = self.popularity_index
+        rng = self.scoring_engine.rng
         max_per_cluster = max(2, top_n // 4)
-        cluster_counts = {}
+        size = min(len(index), max(64, top_n * 4))
         
-        for score, post in posts_with_scores:
-            if len(popular_posts) >= top_n:
-                break
-                
-            # Küme kontrolü
-            cluster_id = self.post_analysis.get(post['id'], {}).get('cluster_id', -1)
+        # Rastgele çeşitlilik ekle
+        diversity_factor = rng.uniform(0.8, 1.2, size=size)
+        while True:
+            rows = index.top(size)
+            scores = index.scores[rows] * diversity_factor
             
-            if cluster_id != -1:
-                if cluster_counts.get(cluster_id, 0) >= max_per_cluster:
-                    continue
-                cluster_counts[cluster_id] = cluster_counts.get(cluster_id, 0) + 1
+            # Çeşitlilik filtresi - farklı kümelerden seç
+            picked, backfill = diversified_top_k(
+                RankedCandidates(rows, scores), self.post_store.cluster_ids, top_n, max_per_cluster
+            )
+            
+            bound = index.bound_after(size)
+            if bound is None or bound <= 0 or (len(picked) == top_n and picked[-1][1] > bound * 1.2):
+                break
             
-            post_copy = post.copy()
-            post_copy['recommendation_score'] = float(score)
+            grow = min(len(index), size * 2) - size
+            diversity_factor = np.concatenate([diversity_factor, rng.uniform(0.8, 1.2, size=grow)])
+            size += grow
+        
+        popular_posts = []
+        for row, score in picked + backfill:
+            post_copy = self.post_store.posts[row].copy()
+            post_copy['recommendation_score'] = score
             post_copy['recommendation_reason'] = "Popüler içerik"
             popular_posts.append(post_copy)
         
-        # Eğer yeterli değilse geri kalanları ekle
-        if len(popular_posts) < top_n:
-            remaining = [item for item in posts_with_scores if item[1]['id'] not in [p['id'] for p in popular_posts]]
-            for score, post in remaining[:top_n - len(popular_posts)]:
-                post_copy = post.copy()
-                post_copy['recommendation_score'] = float(score)
-                post_copy['recommendation_reason'] = "Popüler içerik"
-                popular_posts.append(post_copy)
-        
         return popular_posts
     
     def _get_popular_posts(self, top_n: int = 10) -> List[Dict[str, Any]]:
         """
         Popüler postları döndürür (yeni kullanıcılar için)
         """
-        # Popülerlik skoruna göre sırala
-        posts_with_scores = []
-        for post in self.posts:
-            popularity_score = (
-                post.get('likes_count', 0) * 0.3 +
-                post.get('comments_count', 0) * 0.5 +
-                post.get('shares_count', 0) * 0.7 +
-                post.get('views_count', 0) * 0.1
-            )
-            posts_with_scores.append((popularity_score, post))
-        
-        posts_with_scores.sort(key=lambda x: x[0], reverse=True)
-        
         popular_posts = []
-        for score, post in posts_with_scores[:top_n]:
-            post_copy = post.copy()
-            post_copy['recommendation_score'] = float(score)
+        for row in self.popularity_index.top(top_n).tolist():
+            post_copy = self.post_store.posts[row].copy()
+            post_copy['recommendation_score'] = float(self.popularity_index.scores[row])
             popular_posts.append(post_copy)
         
         return popular_posts
     
-    def get_similar_posts(self, post_id: int, top_n: int = 5) -> List[Dict[str, Any]]:
+    def post_tags(self, post_id: int) -> List[str]:
+        """
+        Postun profil ve skorlamada kullanılan etiketleri (varsa enhanced_tags)
+        """
+        post_data = self.post_store.get(post_id)
+        if post_data is None:
+            return []
+        return resolve_post_tags(post_data, self.post_analysis)
+    
+    def update_post_counters(self, post_id: int, deltas: Dict[str, int]) -> bool:
+        """
+        Postun sayaçlarını (likes_count vb.) artırır ve popülerlik sıralamalarını günceller
+        """
+        row = self.post_store.row_of(post_id)
+        if row is None:
+            return False
+        
+        self.post_store.increment_counters(row, deltas)
+        self.popularity_index.update(row, self.popularity_index.score_row(self.post_store, row))
+        self.scoring_engine.update_popularity(self.post_store, row)
+        return True
+    
+    def get_similar_posts(self, post_id: int, top_n: int = 5, mode: str = "exact") -> List[Dict[str, Any]]:
         """
         Belirli bir posta benzer postları bulur
+        
+        Args:
+            post_id: Benzerlik aranacak post ID'si
+            top_n: Döndürülecek post sayısı
+            mode: "exact" içerik analizi varsa küme bazlı, yoksa tüm postlarla TF-IDF
+                benzerliği; "approx" her zaman LSH indeksi üzerinden TF-IDF benzerliği
         """
-        if post_id not in self.post_ids:
+        if post_id not in self.post_store:
             return []
         
-        # İçerik analizi varsa küme bazlı benzerlik
-        if post_id in self.post_analysis:
+        # İçerik analizi varsa küme bazlı benzerlik (yaklaşık modda LSH kullanılır)
+        if mode != "approx" and post_id in self.post_analysis:
             return self.content_analyzer.get_similar_posts(post_id, top_n)
         
-        # Yoksa TF-IDF benzerliği
-        idx = self.post_ids.index(post_id)
-        post_vector = self.feature_matrix[idx]
-        similarities = cosine_similarity(post_vector, self.feature_matrix).flatten()
-        
-        # Kendisi hariç en benzer postları bul
-        similar_indices = np.argsort(similarities)[::-1]
-        similar_indices = [i for i in similar_indices if i != idx][:top_n]
+        # TF-IDF benzerliği
+        idx = self.post_store.row_of(post_id)
+        if mode == "approx":
+            similar_indices, similarity_scores = self.ann_index.query(idx, top_n)
+        else:
+            post_vector = self.feature_matrix[idx]
+            similarities = cosine_similarity(post_vector, self.feature_matrix).flatten()
+            
+            # Kendisi hariç en benzer postları bul
+            similar_indices = top_k_indices(similarities, top_n, exclude=idx)
+            similarity_scores = similarities[similar_indices]
         
         similar_posts = []
-        for i in similar_indices:
-            post = self.posts[i].copy()
-            post["similarity_score"] = float(similarities[i])
+        for i, score in zip(similar_indices, similarity_scores):
+            post = self.post_store.posts[i].copy()
+            post["similarity_score"] = float(score)
             similar_posts.append(post)
         
         return similar_posts
@@ -503,28 +1153,30 @@ class EnhancedRecommender:
     async def get_user_interest_profile(self, user_id: int) -> Dict[str, Any]:
         """
         Kullanıcının ilgi profiline ilişkin bir özet döndürür.
-        Veriyi doğrudan user_tag_interactions tablosundan alır.
+        Profil önbellekte yoksa user_tag_interactions tablosundan yüklenir.
         """
         
-        # Kullanıcı profilini veritabanından anlık olarak yükle
-        await self.load_user_profiles_from_db(user_id=user_id)
+        # Kullanıcı profili hafızada yoksa veritabanından yükle
+        await self._ensure_user_profile(user_id)
         
-        if user_id not in self.user_profiles:
+        profile = self.user_profiles.get(user_id)
+        if profile is None:
             return {
                 "user_id": user_id,
                 "status": "new_user",
                 "message": "Henüz yeterli etkileşim verisi yok"
             }
         
-        profile = self.user_profiles[user_id]
+        # Ham (normalize edilmemiş) etiket skorları; eski kayıtlarda tercihler ham skordur
+        tag_scores = profile.get('tag_scores', profile['tag_preferences'])
         
         # En çok tercih edilen etiketleri sırala
-        top_tags = sorted(profile['tag_preferences'].items(), 
+        top_tags = sorted(tag_scores.items(), 
                               key=lambda item: item[1], 
                               reverse=True)
         
         # Profil gücünü hesapla
-        total_score = sum(profile['tag_preferences'].values())
+        total_score = sum(tag_scores.values())
         profile_strength = min(1.0, total_score / 100.0) # 100 skoru max güç olarak kabul et
         
         return {
@@ -546,31 +1198,37 @@ class EnhancedRecommender:
     
     def get_topics_summary(self) -> Dict[str, Any]:
         """
-        Tüm konuların özetini döndürür
+        Tüm konuların özetini döndürür. Özet model sürümü başına bir kez
+        hesaplanır; küme boyutları post deposundaki küme id'lerinden bincount ile
+        sayılır.
         """
         if not hasattr(self.content_analyzer, 'cluster_keywords'):
             return {'topics': [], 'message': 'İçerik analizi henüz yapılmadı'}
         
+        if self.topics_cache is not None and self.topics_cache[0] == self.model_version:
+            return self.topics_cache[1]
+        
+        cluster_ids = self.post_store.cluster_ids
+        post_counts = np.bincount(cluster_ids[cluster_ids >= 0]).tolist()
+        
         topics = []
         for cluster_id, keywords in self.content_analyzer.cluster_keywords.items():
-            # Bu konudaki post sayısını hesapla
-            post_count = sum(1 for analysis in self.post_analysis.values() 
-                           if analysis.get('cluster_id') == cluster_id)
-            
             topics.append({
                 'topic_id': cluster_id,
                 'keywords': keywords[:8],
-                'post_count': post_count
+                'post_count': post_counts[cluster_id] if cluster_id < len(post_counts) else 0
             })
         
         # Post sayısına göre sırala
         topics.sort(key=lambda x: x['post_count'], reverse=True)
         
-        return {
+        summary = {
             'topics': topics,
             'total_topics': len(topics),
             'total_posts_analyzed': len(self.post_analysis)
         }
+        self.topics_cache = (self.model_version, summary)
+        return summary
     
     def save_models(self, filepath: str = "models/"):
         """
@@ -590,7 +1248,7 @@ class EnhancedRecommender:
         # Kullanıcı profillerini kaydet
         user_data = {
             'user_interactions': self.user_interactions,
-            'user_profiles': self.user_profiles,
+            'user_profiles': self.user_profiles.to_dict(),
             'post_analysis': self.post_analysis
         }
         joblib.dump(user_data, f"{filepath}/user_data.pkl")
@@ -616,9 +1274,14 @@ class EnhancedRecommender:
             if os.path.exists(f"{filepath}/user_data.pkl"):
                 user_data = joblib.load(f"{filepath}/user_data.pkl")
                 self.user_interactions = user_data.get('user_interactions', {})
-                self.user_profiles = user_data.get('user_profiles', {})
+                self.interaction_profiles = {}
+                self.user_profiles.replace_all(user_data.get('user_profiles', {}))
                 self.post_analysis = user_data.get('post_analysis', {})
             
+            # Yüklenen modelle önceki sürümün önbellekteki sonuçları geçersiz
+            self.model_version += 1
+            self.ranking_cache.clear()
+            
             print(f"✅ Tüm modeller {filepath} klasöründen yüklendi.")
             return True
         except Exception as e:
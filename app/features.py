@@ -1,7 +1,7 @@
-import json
 import numpy as np
 from typing import List, Dict, Any
 from sklearn.feature_extraction.text import TfidfVectorizer
+from app.text_pipeline import parse_tags, tag_document
 
 class TagFeatureExtractor:
     def __init__(self):
@@ -22,18 +22,10 @@ class TagFeatureExtractor:
         
         for post in posts:
             # Etiketleri JSON'dan çıkart
-            tags = []
-            if isinstance(post.get("tags"), list):
-                tags = post["tags"]
-            elif isinstance(post.get("tags"), str):
-                try:
-                    tags = json.loads(post["tags"])
-                except:
-                    tags = []
+            tags = parse_tags(post.get("tags"))
             
             # Boşlukla ayrılmış metne dönüştür
-            tag_document = " ".join(tags) if tags else ""
-            tag_documents.append(tag_document)
+            tag_documents.append(tag_document(tags))
             
             # Tüm benzersiz etiketleri topla
             self.all_tags.extend(tags)
@@ -69,18 +61,6 @@ class TagFeatureExtractor:
         if not self.vectorizer:
             raise ValueError("Önce fit_transform metodunu çağırmalısınız!")
             
-        tag_documents = []
-        for post in posts:
-            tags = []
-            if isinstance(post.get("tags"), list):
-                tags = post["tags"]
-            elif isinstance(post.get("tags"), str):
-                try:
-                    tags = json.loads(post["tags"])
-                except:
-                    tags = []
-            
-            tag_document = " ".join(tags) if tags else ""
-            tag_documents.append(tag_document)
+        tag_documents = [tag_document(parse_tags(post.get("tags"))) for post in posts]
         
         return self.vectorizer.transform(tag_documents) 
\ No newline at end of file
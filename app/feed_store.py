@@ -0,0 +1,204 @@
+import base64
+import os
+import secrets
+import threading
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+from app.cache import LRUCache
+
+
+class FeedStore:
+    """
+    Aktif kullanıcılar için önceden hesaplanmış (materialize) feed deposu.
+
+    Her kayıt post id'leri, skorları ve öneri nedenleri olarak kompakt tutulur.
+    Model sürümü değiştiğinde veya max_age süresi dolduğunda kayıt bayat sayılır
+    ve çağıran canlı skorlamaya döner. path verilirse depo joblib ile diske yazılır.
+    """
+
+    def __init__(self, max_age: float = 900.0, path: Optional[str] = None):
+        self.max_age = max_age
+        self.path = path
+        self._feeds: Dict[int, Tuple[int, float, np.ndarray, np.ndarray, List[str]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, user_id: int, model_version: int, recommendations: List[Dict[str, Any]]):
+        """
+        Kullanıcının hesaplanan feed'ini kaydeder
+        """
+        post_ids = np.array([post['id'] for post in recommendations], dtype=np.int64)
+        scores = np.array([post.get('recommendation_score', 0.0) for post in recommendations],
+                          dtype=np.float32)
+        reasons = [post.get('recommendation_reason', '') for post in recommendations]
+        with self._lock:
+            self._feeds[user_id] = (model_version, time.time(), post_ids, scores, reasons)
+
+    def get(self, user_id: int, model_version: int) -> Optional[Tuple[np.ndarray, np.ndarray, List[str]]]:
+        """
+        Güncel feed'i (post id'leri, skorlar, nedenler) döndürür; yoksa veya bayatsa None
+        """
+        with self._lock:
+            entry = self._feeds.get(user_id)
+            if entry is None or entry[0] != model_version or self._expired(entry[1]):
+                if entry is not None:
+                    del self._feeds[user_id]
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[2], entry[3], entry[4]
+
+    def _expired(self, computed_at: float) -> bool:
+        return time.time() - computed_at > self.max_age
+
+    def invalidate(self, user_id: int):
+        """Kullanıcının feed'ini siler"""
+        with self._lock:
+            self._feeds.pop(user_id, None)
+
+    def prune(self) -> int:
+        """Süresi dolmuş feed'leri siler"""
+        with self._lock:
+            expired = [user_id for user_id, entry in self._feeds.items() if self._expired(entry[1])]
+            for user_id in expired:
+                del self._feeds[user_id]
+            return len(expired)
+
+    def clear(self):
+        """Tüm feed'leri siler"""
+        with self._lock:
+            self._feeds.clear()
+
+    def __len__(self) -> int:
+        return len(self._feeds)
+
+    def save(self) -> bool:
+        """
+        Depoyu diske yazar (path tanımlı değilse bir şey yapmaz)
+        """
+        if not self.path:
+            return False
+
+        import joblib
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock:
+            feeds = dict(self._feeds)
+        joblib.dump(feeds, self.path)
+        return True
+
+    def load(self, model_version: int) -> int:
+        """
+        Diskteki feed'leri yükler ve geçerli model sürümüyle işaretler.
+        Yüklenen feed'ler yalnızca hesaplandıkları andan itibaren max_age süresince kullanılır.
+        """
+        if not self.path or not os.path.exists(self.path):
+            return 0
+
+        import joblib
+        feeds = joblib.load(self.path)
+        with self._lock:
+            for user_id, (_, computed_at, post_ids, scores, reasons) in feeds.items():
+                if not self._expired(computed_at):
+                    self._feeds[user_id] = (model_version, computed_at, post_ids, scores, reasons)
+            return len(self._feeds)
+
+    def stats(self) -> Dict[str, Any]:
+        """İzleme için depo sayaçlarını döndürür"""
+        requests = self.hits + self.misses
+        return {
+            "size": len(self._feeds),
+            "max_age_seconds": self.max_age,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / requests, 4) if requests else 0.0
+        }
+
+
+class FeedCursors:
+    """
+    Sayfalı /feed için sabitlenmiş (pinned) sıralamalar.
+
+    İlk sayfada hesaplanan sıralama kompakt dizilerle (post id, skor, neden)
+    boyut ve süre sınırlı bir LRU önbellekte tutulur; sonraki sayfalar imleçteki
+    sabit id ve konumdan yeniden skorlama yapılmadan okunur; bitmemiş sıralamalar
+    imleç sonlarına geldiğinde uzatılır. İmleç, sabit id ile konumun base64
+    kodlamasıdır ve istemci için opaktır.
+    """
+
+    def __init__(self, max_size: int = 20000, ttl: float = 1800.0):
+        self._pins = LRUCache(max_size=max_size, ttl=ttl)
+
+    def pin(self, user_id: int, model_version: int, recommendations: List[Dict[str, Any]],
+            exhausted: bool = True) -> str:
+        """
+        Sıralamayı sabitler ve sabit id'sini döndürür. exhausted False ise sıralama
+        sonuna gelindiğinde extend ile uzatılabilir.
+        """
+        pin_id = secrets.token_urlsafe(12)
+        post_ids, scores, reasons = self._arrays(recommendations)
+        self._pins.put(pin_id, (user_id, model_version, post_ids, scores, reasons, exhausted))
+        return pin_id
+
+    def extend(self, pin_id: str, user_id: int, recommendations: List[Dict[str, Any]],
+               exhausted: bool) -> Optional[Tuple[int, np.ndarray, np.ndarray, List[str], bool]]:
+        """
+        Sabit sıralamanın sonuna postlar ekler; güncel sıralamayı get ile aynı
+        biçimde döndürür (sabit sıralama yoksa None)
+        """
+        entry = self._pins.get(pin_id)
+        if entry is None or entry[0] != user_id:
+            return None
+        post_ids, scores, reasons = self._arrays(recommendations)
+        entry = (user_id, entry[1], np.concatenate([entry[2], post_ids]),
+                 np.concatenate([entry[3], scores]), entry[4] + reasons, exhausted)
+        self._pins.put(pin_id, entry)
+        return entry[1:]
+
+    def get(self, pin_id: str, user_id: int) -> Optional[Tuple[int, np.ndarray, np.ndarray, List[str], bool]]:
+        """
+        Kullanıcıya ait sabit sıralamayı (model sürümü, post id'leri, skorlar, nedenler,
+        sıralama bitti mi) döndürür; yoksa, süresi dolduysa veya başka kullanıcıya aitse None
+        """
+        entry = self._pins.get(pin_id)
+        if entry is None or entry[0] != user_id:
+            return None
+        return entry[1:]
+
+    @staticmethod
+    def _arrays(recommendations: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        post_ids = np.array([post['id'] for post in recommendations], dtype=np.int64)
+        scores = np.array([post.get('recommendation_score', 0.0) for post in recommendations],
+                          dtype=np.float32)
+        reasons = [post.get('recommendation_reason', '') for post in recommendations]
+        return post_ids, scores, reasons
+
+    @staticmethod
+    def encode(pin_id: str, offset: int) -> str:
+        """Sabit id ve konumdan opak imleç oluşturur"""
+        raw = f"{pin_id}:{offset}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode(cursor: str) -> Tuple[str, int]:
+        """
+        İmleci (sabit id, konum) olarak çözer; hatalı imleçte ValueError
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            pin_id, offset = raw.rsplit(":", 1)
+            offset = int(offset)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValueError("Geçersiz imleç") from e
+        if offset < 0 or not pin_id:
+            raise ValueError("Geçersiz imleç")
+        return pin_id, offset
+
+    def clear(self):
+        """Tüm sabit sıralamaları siler"""
+        self._pins.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """İzleme için önbellek sayaçlarını döndürür"""
+        return self._pins.stats()
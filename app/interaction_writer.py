@@ -0,0 +1,163 @@
+import asyncio
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.db import database
+from app.post_loader import utc_datetime
+
+# (user, tag, tür) satırı varsa sayacı artırır, yoksa ekler. Tabloda benzersiz kısıt
+# gerekmez; eşzamanlı replikalar aynı anahtar için iki satır eklerse profil sorgusu
+# SUM ile topladığından sonuç değişmez. Parametre türleri UPDATE'teki sütunlardan çıkarılır.
+# Parametreler: $1 user_id, $2 tag, $3 interaction_type, $4 interaction_count, $5 last_interacted_at
+_UPSERT_QUERY = """
+    WITH updated AS (
+        UPDATE user_tag_interactions
+        SET interaction_count = interaction_count + $4,
+            last_interacted_at = GREATEST(last_interacted_at, $5)
+        WHERE user_id = $1 AND tag = $2 AND interaction_type = $3
+        RETURNING id
+    )
+    INSERT INTO user_tag_interactions (user_id, tag, interaction_type, interaction_count, last_interacted_at)
+    SELECT $1, $2, $3, $4, $5
+    WHERE NOT EXISTS (SELECT 1 FROM updated)
+"""
+
+
+class InteractionWriter:
+    """
+    Etkileşimleri user_tag_interactions tablosuna toplu yazan write-behind tampon.
+
+    Her etkileşim postun etiketleri üzerinden (kullanıcı, etiket, tür) artışlarına
+    açılır ve bellekte birleştirilir; istek yolu veritabanına yazmaz. Tampon
+    flush_interval saniyede bir veya max_pending anahtara ulaşınca tek
+    executemany çağrısıyla yazılır. Başarısız yazımlar tampona geri eklenir.
+    """
+
+    def __init__(self, flush_interval: float = 5.0, max_pending: int = 1000):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[Tuple[int, str, str], List] = {}
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.recorded = 0
+        self.written = 0
+        self.flushes = 0
+        self.failures = 0
+
+    def record(self, user_id: int, tags: Iterable[str], interaction_type: str,
+               timestamp: Optional[datetime] = None):
+        """
+        Etkileşimi etiket başına bir artış olarak tampona ekler. Zaman damgaları
+        timestamptz sütununa UTC timezone'lu yazılır.
+        """
+        timestamp = utc_datetime(timestamp) if timestamp else datetime.now(timezone.utc)
+        with self._lock:
+            for tag in dict.fromkeys(tags):
+                entry = self._pending.get((user_id, tag, interaction_type))
+                if entry is None:
+                    self._pending[(user_id, tag, interaction_type)] = [1, timestamp]
+                else:
+                    entry[0] += 1
+                    entry[1] = max(entry[1], timestamp)
+                self.recorded += 1
+            full = len(self._pending) >= self.max_pending
+
+        if full and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _merge(self, pending: Dict[Tuple[int, str, str], List]):
+        """Yazılamayan artışları tampona geri ekler"""
+        with self._lock:
+            for key, (count, timestamp) in pending.items():
+                entry = self._pending.get(key)
+                if entry is None:
+                    self._pending[key] = [count, timestamp]
+                else:
+                    entry[0] += count
+                    entry[1] = max(entry[1], timestamp)
+
+    async def flush(self) -> int:
+        """
+        Tampondaki artışları toplu olarak yazar
+
+        Returns:
+            Yazılan (kullanıcı, etiket, tür) satırı sayısı
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        values = [
+            (user_id, tag, interaction_type, count, timestamp)
+            for (user_id, tag, interaction_type), (count, timestamp) in pending.items()
+        ]
+        try:
+            await self._write(values)
+        except asyncio.CancelledError:
+            # Kapanışta yarıda kalan yazım geri alınır; stop() içindeki son flush'ta tekrarlanır
+            self._merge(pending)
+            raise
+        except Exception as e:
+            self.failures += 1
+            self._merge(pending)
+            print(f"❌ Etkileşim yazma hatası ({len(values)} satır tamponda bekliyor): {e}")
+            return 0
+
+        self.flushes += 1
+        self.written += len(values)
+        return len(values)
+
+    async def _write(self, values: List[Tuple]):
+        """
+        Satırları tek transaction içinde asyncpg executemany ile yazar; hazırlanmış
+        ifade bir kez oluşturulur ve satırlar tek seferde gönderilir
+        """
+        async with database.connection() as connection:
+            raw = connection.raw_connection
+            async with raw.transaction():
+                await raw.executemany(_UPSERT_QUERY, values)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        """
+        Periyodik yazma görevini mevcut event loop'ta başlatır
+        """
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """
+        Periyodik görevi durdurur ve kalan artışları yazar
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        """Tampon durumu ve yazma sayaçları"""
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'pending': pending,
+            'recorded': self.recorded,
+            'written': self.written,
+            'flushes': self.flushes,
+            'failures': self.failures
+        }
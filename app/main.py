@@ -1,8 +1,10 @@
+import os
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.db import database
-from app.routes import router, load_recommender_data
+from app.routes import router, load_recommender_data, interaction_writer, recommender
+from app.change_listener import ChangeListener, install_triggers
 from app.scheduler import recommendation_scheduler
 
 # API uygulama örneği oluştur
@@ -24,6 +26,9 @@ app.add_middleware(
 # API route'larını ekle
 app.include_router(router, prefix="/api/v1")
 
+# CHANGE_LISTENER=1 ise posts / etkileşim tablolarındaki değişiklikler LISTEN/NOTIFY ile dinlenir
+change_listener = ChangeListener(recommender) if os.getenv("CHANGE_LISTENER") == "1" else None
+
 @app.on_event("startup")
 async def startup():
     """
@@ -37,12 +42,30 @@ async def startup():
     
     # Öneri modelini yükle ve eğit
     try:
-        await load_recommender_data()
+        recommender = await load_recommender_data()
         print("✅ Öneri modeli başlatıldı ve eğitildi")
+        
+        # Önceki çalışmadan kalan (süresi dolmamış) feed'leri yükle
+        loaded = recommender.feed_store.load(recommender.model_version)
+        if loaded:
+            print(f"📰 {loaded} materialize feed diskten yüklendi")
     except Exception as e:
         print(f"⚠️ Öneri modeli başlatma hatası: {e}")
         print("📝 İlk çalıştırma olabilir, model ilk API çağrısında yüklenecek")
     
+    # Etkileşimleri arka planda toplu yazan tamponu başlat
+    interaction_writer.start()
+    print("✅ Etkileşim yazma tamponu başlatıldı")
+    
+    # Değişiklik dinleyicisini başlat (isteğe bağlı)
+    if change_listener is not None:
+        if os.getenv("CHANGE_LISTENER_INSTALL_TRIGGERS") == "1":
+            async with database.connection() as connection:
+                await install_triggers(connection.raw_connection)
+            print("✅ Değişiklik tetikleyicileri kuruldu")
+        change_listener.start()
+        print("✅ Değişiklik dinleyicisi başlatıldı")
+    
     # Scheduler'ı başlat
     recommendation_scheduler.start()
     print("✅ Otomatik görev scheduler'ı başlatıldı")
@@ -68,6 +91,14 @@ async def shutdown():
     recommendation_scheduler.stop()
     print("✅ Scheduler durduruldu")
     
+    # Değişiklik dinleyicisini durdur
+    if change_listener is not None:
+        await change_listener.stop()
+    
+    # Tamponda kalan etkileşimleri yaz
+    await interaction_writer.stop()
+    print("✅ Bekleyen etkileşimler yazıldı")
+    
     # Veritabanı bağlantısını kapat
     await database.disconnect()
     print("✅ Veritabanı bağlantısı kapatıldı")
@@ -115,6 +146,7 @@ async def health_check():
         "status": "healthy" if db_status == "healthy" else "degraded",
         "database": db_status,
         "scheduler": "running" if recommendation_scheduler.running else "stopped",
+        "change_listener": change_listener.stats() if change_listener is not None else "disabled",
         "timestamp": "2024-01-01T00:00:00Z"  # Gerçek timestamp eklenebilir
     }
 
@@ -68,4 +68,8 @@ class UserTagInteractionCreate(BaseModel):
     user_id: int
     tag: str
     interaction_type: str
-    interaction_count: Optional[int] = 1
\ No newline at end of file
+    interaction_count: Optional[int] = 1
+
+class BatchRecommendationRequest(BaseModel):
+    user_ids: List[int] = Field(..., min_length=1, max_length=10000)
+    limit: int = Field(10, ge=1, le=100)
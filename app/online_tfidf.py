@@ -0,0 +1,134 @@
+import numpy as np
+from collections import Counter
+from scipy import sparse
+from typing import Dict, Iterable, List, Optional, Tuple
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+from sklearn.utils import murmurhash3_32
+
+
+class HashedTfidfVectorizer:
+    """
+    Sabit boyutlu hash uzayında, doküman frekansları artımlı güncellenen TF-IDF.
+
+    Terimler (1-2 kelimelik gruplar) murmurhash ile n_features kovadan birine
+    düşer; sözlük tutulmadığı için yeni postlar korpusun geri kalanına dokunmadan
+    vektörleştirilir. Kova başına doküman frekansı ve toplam doküman sayısı
+    partial_fit ile güncellenir, IDF her dönüşümde bu sayaçlardan hesaplanır
+    (TfidfVectorizer ile aynı smooth_idf formülü, min_df / max_df filtreleri).
+
+    Anahtar kelime çıkarımı için her kovaya düşen ilk terim saklanır. Çakışmalar
+    ve artık kullanılmayan terimler yalnızca tam yeniden eğitimde (fit_transform)
+    temizlenir.
+    """
+
+    def __init__(self, n_features: int = 2 ** 16, stop_words: Optional[List[str]] = None,
+                 ngram_range: Tuple[int, int] = (1, 2), token_pattern: str = r"(?u)\b\w\w+\b",
+                 min_df: int = 1, max_df: float = 1.0, sublinear_tf: bool = False):
+        self.n_features = n_features
+        self.min_df = min_df
+        self.max_df = max_df
+        self.sublinear_tf = sublinear_tf
+        # Tokenizasyon TfidfVectorizer ile aynı (küçük harf, stop words, n-gram)
+        self._tokenizer = CountVectorizer(
+            stop_words=stop_words, ngram_range=ngram_range, token_pattern=token_pattern
+        )
+        self._analyzer = self._tokenizer.build_analyzer()
+        self._reset()
+
+    def _reset(self):
+        self.document_frequency = np.zeros(self.n_features, dtype=np.int64)
+        self.n_documents = 0
+        self._feature_names = np.full(self.n_features, '', dtype=object)
+        self.collisions = 0
+
+    def __getstate__(self):
+        # Analyzer bir closure olduğundan pickle edilemez; yüklemede yeniden kurulur
+        state = self.__dict__.copy()
+        del state['_analyzer']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._analyzer = self._tokenizer.build_analyzer()
+
+    def _bucket(self, term: str) -> int:
+        bucket = murmurhash3_32(term, seed=0, positive=True) % self.n_features
+        name = self._feature_names[bucket]
+        if not name:
+            self._feature_names[bucket] = term
+        elif name != term:
+            self.collisions += 1
+        return bucket
+
+    def _counts(self, documents: Iterable[str]) -> sparse.csr_matrix:
+        """Dokümanların (doküman x kova) terim sayıları"""
+        indptr, indices, values = [0], [], []
+        for document in documents:
+            counts = Counter(self._bucket(term) for term in self._analyzer(document))
+            indices.extend(counts.keys())
+            values.extend(counts.values())
+            indptr.append(len(indices))
+        matrix = sparse.csr_matrix(
+            (np.asarray(values, dtype=np.float64), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+            shape=(len(indptr) - 1, self.n_features)
+        )
+        matrix.sort_indices()
+        return matrix
+
+    def _update_frequencies(self, counts: sparse.csr_matrix):
+        self.document_frequency += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_documents += counts.shape[0]
+
+    def idf(self) -> np.ndarray:
+        """
+        Güncel sayaçlardan kova başına IDF; min_df / max_df dışındaki kovalar 0
+        """
+        df = self.document_frequency
+        idf = np.log((1 + self.n_documents) / (1 + df)) + 1.0
+        max_df = self.max_df if isinstance(self.max_df, int) else self.max_df * self.n_documents
+        idf[(df < self.min_df) | (df > max_df)] = 0.0
+        return idf
+
+    def _tfidf(self, counts: sparse.csr_matrix) -> sparse.csr_matrix:
+        matrix = counts.copy()
+        if self.sublinear_tf:
+            np.log(matrix.data, out=matrix.data)
+            matrix.data += 1.0
+        matrix.data *= self.idf()[matrix.indices]
+        matrix.eliminate_zeros()
+        return normalize(matrix, norm='l2', copy=False)
+
+    def fit_transform(self, documents: List[str]) -> sparse.csr_matrix:
+        """
+        Sayaçları sıfırlayıp tüm dokümanlarla yeniden oluşturur (sözlük sıkıştırma)
+        """
+        self._reset()
+        counts = self._counts(documents)
+        self._update_frequencies(counts)
+        return self._tfidf(counts)
+
+    def partial_fit_transform(self, documents: List[str]) -> sparse.csr_matrix:
+        """
+        Yeni dokümanları doküman frekanslarına ekler ve güncel IDF ile vektörleştirir
+        """
+        counts = self._counts(documents)
+        self._update_frequencies(counts)
+        return self._tfidf(counts)
+
+    def transform(self, documents: List[str]) -> sparse.csr_matrix:
+        """Dokümanları sayaçları değiştirmeden vektörleştirir"""
+        return self._tfidf(self._counts(documents))
+
+    def get_feature_names_out(self) -> np.ndarray:
+        """Kova başına (ilk görülen) terim; kullanılmayan kovalar boş"""
+        return self._feature_names
+
+    def stats(self) -> Dict[str, int]:
+        """Hash uzayının doluluğu ve başka terimin kovasına düşen terim geçişi sayısı"""
+        return {
+            'n_features': self.n_features,
+            'n_documents': self.n_documents,
+            'buckets_used': int(np.count_nonzero(self.document_frequency)),
+            'collisions': self.collisions
+        }
@@ -0,0 +1,104 @@
+import numpy as np
+from typing import Dict, Optional
+from app.post_store import PostStore
+
+
+class PopularityIndex:
+    """
+    Post popülerlik skorlarını ve skora göre sıralı satır listesini tutar.
+
+    Sıra (skor azalan, eşitlikte satır artan) fit sırasında bir kez oluşturulur;
+    sayaç değişikliklerinde yalnızca değişen satır eski ve yeni konumu arasında
+    kaydırılır, yeni postlar ise ikili aramayla araya eklenir. Böylece popüler
+    post istekleri korpusun tamamını skorlayıp sıralamadan öneki okur.
+    """
+
+    def __init__(self, weights: Dict[str, float]):
+        self.weights = weights
+        self.scores = np.empty(0, dtype=np.float64)
+        self.order = np.empty(0, dtype=np.int64)
+        # Sıralı skorların negatifi (artan) - ikili arama için
+        self._negated = np.empty(0, dtype=np.float64)
+        self.position = np.empty(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def build(self, post_store: PostStore):
+        """
+        Post deposundaki sayaçlardan skorları ve sırayı oluşturur
+        """
+        self.scores = post_store.popularity(self.weights)
+        rows = np.arange(len(self.scores))
+        self.order = np.lexsort((rows, -self.scores))
+        self._negated = -self.scores[self.order]
+        self.position = np.empty(len(self.order), dtype=np.int64)
+        self.position[self.order] = rows
+
+    def score_row(self, post_store: PostStore, row: int) -> float:
+        """
+        Tek bir satırın skorunu (PostStore.popularity ile aynı toplama sırasıyla) hesaplar
+        """
+        score = 0.0
+        for name, weight in self.weights.items():
+            score += post_store.counters[name][row] * weight
+        return score
+
+    def _insertion_point(self, score: float, row: int) -> int:
+        """(skor azalan, satır artan) sırasında (score, row) anahtarından önce gelen eleman sayısı"""
+        left = int(np.searchsorted(self._negated, -score, side='left'))
+        right = int(np.searchsorted(self._negated, -score, side='right'))
+        return left + int(np.searchsorted(self.order[left:right], row))
+
+    def update(self, row: int, score: float):
+        """
+        Satırın skorunu günceller ve sıradaki yerini kaydırarak düzeltir
+        """
+        old = int(self.position[row])
+        self.scores[row] = score
+        new = self._insertion_point(score, row)
+        if new > old:
+            # Satırın kendisi de önünde sayıldı
+            new -= 1
+
+        if new < old:
+            self.order[new + 1:old + 1] = self.order[new:old]
+            self._negated[new + 1:old + 1] = self._negated[new:old]
+        elif new > old:
+            self.order[old:new] = self.order[old + 1:new + 1]
+            self._negated[old:new] = self._negated[old + 1:new + 1]
+        self.order[new] = row
+        self._negated[new] = -score
+
+        low, high = min(old, new), max(old, new)
+        self.position[self.order[low:high + 1]] = np.arange(low, high + 1)
+
+    def add(self, rows: np.ndarray, scores: np.ndarray):
+        """
+        Yeni eklenen satırları (mevcut tüm satırlardan büyük indeksli) sıraya ekler
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        scores = np.asarray(scores, dtype=np.float64)
+        if not len(rows):
+            return
+
+        self.scores = np.concatenate([self.scores, scores])
+        new_order = np.lexsort((rows, -scores))
+        rows, scores = rows[new_order], scores[new_order]
+
+        # Eşit skorlarda yeni satırlar (daha büyük indeksli) mevcutların arkasına gelir
+        points = np.searchsorted(self._negated, -scores, side='right')
+        self.order = np.insert(self.order, points, rows)
+        self._negated = np.insert(self._negated, points, -scores)
+        self.position = np.empty(len(self.order), dtype=np.int64)
+        self.position[self.order] = np.arange(len(self.order))
+
+    def top(self, k: int) -> np.ndarray:
+        """En popüler k satırı döndürür"""
+        return self.order[:k]
+
+    def bound_after(self, k: int) -> Optional[float]:
+        """İlk k satırın dışında kalan en yüksek skor (yoksa None)"""
+        if k >= len(self._negated):
+            return None
+        return float(-self._negated[k])
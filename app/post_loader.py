@@ -0,0 +1,137 @@
+import json
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+from app.db import database
+from app.post_store import PostStore
+
+# Öneri servisinin döndürdüğü post alanları (Post modeli)
+POST_COLUMNS = (
+    'id', 'user_id', 'title', 'content', 'media_url', 'created_at', 'updated_at',
+    'likes_count', 'comments_count', 'shares_count', 'views_count', 'visibility',
+    'tags', 'allow_comments', 'is_pinned', 'community_id'
+)
+
+# Model eğitimi ve raporlama için gereken alanlar
+TRAINING_COLUMNS = (
+    'id', 'user_id', 'title', 'content', 'tags',
+    'likes_count', 'comments_count', 'shares_count', 'views_count',
+    'created_at', 'visibility'
+)
+
+# Yalnızca etiket analizi için gereken alanlar
+TAG_COLUMNS = ('id', 'title', 'tags')
+
+# Her iki yükleyicide de UTC timezone'lu datetime olarak dönen zaman damgaları
+TIMESTAMP_COLUMNS = ('created_at', 'updated_at')
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def decode_tags(values: List[Any]) -> List[List[str]]:
+    """
+    JSON dizesi olarak gelen etiketleri satır satır çözer.
+
+    Dizelerin birleştirilip tek seferde çözülmesi, hatalı bir değer etiketleri
+    komşu satırlara kaydırabildiği için kullanılmaz. Liste olarak gelenler olduğu
+    gibi, boş/None/hatalı değerler [] olarak döner.
+    """
+    loads = json.loads
+    decoded: List[List[str]] = []
+    for value in values:
+        if isinstance(value, str) and value:
+            try:
+                value = loads(value)
+            except ValueError:
+                value = []
+        decoded.append(value if isinstance(value, list) else [])
+    return decoded
+
+
+def utc_datetime(value: Any) -> Any:
+    """
+    datetime değerini UTC timezone'lu hale getirir; timezone'suz (TIMESTAMP)
+    değerler UTC kabul edilir. Diğer değerler olduğu gibi döner.
+    """
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+    return value
+
+
+def _posts_query(columns: Sequence[str], where: str = "", order_by: Optional[str] = "created_at DESC") -> str:
+    query = f"SELECT {', '.join(columns)} FROM posts"
+    if where:
+        query += f" WHERE {where}"
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    return query
+
+
+async def iterate_posts(columns: Sequence[str] = POST_COLUMNS, where: str = "",
+                        values: Optional[Dict[str, Any]] = None,
+                        order_by: Optional[str] = "created_at DESC",
+                        chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    posts tablosunu database.iterate ile (sunucu tarafı imleç) parça parça okur.
+
+    Yalnızca istenen sütunlar seçilir ve her parça dict listesi olarak,
+    etiketleri çözülmüş ve zaman damgaları UTC timezone'lu halde döner; tüm tablo tek
+    seferde belleğe alınmaz.
+
+    Args:
+        columns: Seçilecek sütunlar
+        where: Parametreli WHERE koşulu (örn. "created_at >= :since")
+        values: WHERE parametreleri
+        order_by: Sıralama
+        chunk_size: Parça başına satır sayısı
+    """
+    query = _posts_query(columns, where, order_by)
+    decode = 'tags' in columns
+    stamps = [column for column in TIMESTAMP_COLUMNS if column in columns]
+    chunk = []
+    async for row in database.iterate(query, values):
+        chunk.append(dict(row))
+        if len(chunk) >= chunk_size:
+            yield _finish_chunk(chunk, decode, stamps)
+            chunk = []
+    if chunk:
+        yield _finish_chunk(chunk, decode, stamps)
+
+
+def _finish_chunk(chunk: List[Dict[str, Any]], decode: bool, stamps: Sequence[str]) -> List[Dict[str, Any]]:
+    if decode:
+        for post, tags in zip(chunk, decode_tags([post['tags'] for post in chunk])):
+            post['tags'] = tags
+    # COPY yoluyla aynı biçim: watermark karşılaştırmaları yükleyiciden bağımsız olur
+    for column in stamps:
+        for post in chunk:
+            post[column] = utc_datetime(post[column])
+    return chunk
+
+
+async def load_posts(columns: Sequence[str] = POST_COLUMNS, where: str = "",
+                     values: Optional[Dict[str, Any]] = None,
+                     order_by: Optional[str] = "created_at DESC",
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Dict[str, Any]]:
+    """
+    Postları parça parça okuyup tek listede döndürür
+    """
+    posts = []
+    async for chunk in iterate_posts(columns, where, values, order_by, chunk_size):
+        posts.extend(chunk)
+    return posts
+
+
+async def load_post_store(columns: Sequence[str] = POST_COLUMNS, where: str = "",
+                          values: Optional[Dict[str, Any]] = None,
+                          order_by: Optional[str] = "created_at DESC",
+                          chunk_size: int = DEFAULT_CHUNK_SIZE) -> PostStore:
+    """
+    Postları parça parça okuyup sütun dizileri parça başına doldurulmuş
+    bir PostStore döndürür
+    """
+    chunks = []
+    async for chunk in iterate_posts(columns, where, values, order_by, chunk_size):
+        chunks.append(chunk)
+    return PostStore.from_chunks(chunks)
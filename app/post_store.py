@@ -0,0 +1,200 @@
+import numpy as np
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Iterable, Optional
+
+
+def _to_datetime64(value: Any) -> np.datetime64:
+    """datetime değerini (timezone varsa UTC'ye çevirerek) datetime64'e dönüştürür"""
+    if value is None:
+        return np.datetime64('NaT', 'us')
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(value, 'us')
+
+
+class PostStore:
+    """
+    Postlar için id -> satır indeksi ve sütun bazlı diziler tutan ortak depo.
+
+    fit() sırasında bir kez oluşturulur ve EnhancedRecommender,
+    ContentBasedRecommender ile SmartContentAnalyzer tarafından paylaşılır;
+    böylece post aramaları O(1) olur ve tüm post listesi taranmaz.
+    """
+
+    COUNTER_COLUMNS = ('likes_count', 'comments_count', 'shares_count', 'views_count')
+
+    def __init__(self, posts: Optional[List[Dict[str, Any]]] = None):
+        self.posts = []
+        self.ids = np.empty(0, dtype=np.int64)
+        self.id_to_row = {}
+        self.counters = {name: np.empty(0, dtype=np.int64) for name in self.COUNTER_COLUMNS}
+        self.cluster_ids = np.empty(0, dtype=np.int64)
+        self.created_at = np.empty(0, dtype='datetime64[us]')
+        self.community_ids = np.empty(0, dtype=np.int64)
+        self.visibility = np.empty(0, dtype=object)
+        self._cluster_rows = None
+
+        if posts is not None:
+            self.build(posts)
+
+    @staticmethod
+    def _columns(posts: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """
+        Post listesinin sütun dizilerini oluşturur
+        """
+        n_posts = len(posts)
+        columns = {
+            'ids': np.fromiter((post['id'] for post in posts), dtype=np.int64, count=n_posts),
+            'created_at': np.array([_to_datetime64(post.get('created_at')) for post in posts],
+                                   dtype='datetime64[us]'),
+            'community_ids': np.fromiter(
+                (post['community_id'] if post.get('community_id') is not None else -1 for post in posts),
+                dtype=np.int64, count=n_posts
+            ),
+            'visibility': np.array([post.get('visibility') for post in posts], dtype=object)
+        }
+        for name in PostStore.COUNTER_COLUMNS:
+            columns[name] = np.fromiter((post.get(name, 0) or 0 for post in posts),
+                                        dtype=np.int64, count=n_posts)
+        return columns
+
+    def _assign(self, posts: List[Dict[str, Any]], columns: Dict[str, np.ndarray]):
+        self.posts = posts
+        self.ids = columns['ids']
+        self.id_to_row = {post_id: row for row, post_id in enumerate(self.ids.tolist())}
+        self.counters = {name: columns[name] for name in self.COUNTER_COLUMNS}
+        self.cluster_ids = np.full(len(posts), -1, dtype=np.int64)
+        self.created_at = columns['created_at']
+        self.community_ids = columns['community_ids']
+        self.visibility = columns['visibility']
+        self._cluster_rows = None
+
+    def build(self, posts: List[Dict[str, Any]]):
+        """
+        Post listesinden indeks ve sütunları oluşturur
+        """
+        self._assign(posts, self._columns(posts))
+
+    @classmethod
+    def from_columns(cls, posts: List[Dict[str, Any]], columns: Dict[str, np.ndarray]) -> 'PostStore':
+        """
+        Hazır sütun dizilerinden (ids, created_at, community_ids, visibility ve
+        sayaçlar) depoyu oluşturur; sütunlar postlardan yeniden hesaplanmaz
+        """
+        columns = dict(columns)
+        for name in ('ids', 'community_ids') + cls.COUNTER_COLUMNS:
+            columns[name] = np.asarray(columns[name], dtype=np.int64)
+        columns['created_at'] = np.asarray(columns['created_at'], dtype='datetime64[us]')
+
+        store = cls()
+        store._assign(posts, columns)
+        return store
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[List[Dict[str, Any]]]) -> 'PostStore':
+        """
+        Parça parça gelen postlardan depoyu oluşturur; sütunlar parça başına
+        diziye çevrilir ve sonunda tek seferde birleştirilir
+        """
+        posts, column_chunks = [], []
+        for chunk in chunks:
+            posts.extend(chunk)
+            column_chunks.append(cls._columns(chunk))
+
+        store = cls()
+        if column_chunks:
+            store._assign(posts, {
+                name: np.concatenate([columns[name] for columns in column_chunks])
+                for name in column_chunks[0]
+            })
+        return store
+
+    def append(self, posts: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Yeni postları deponun sonuna ekler; yalnızca eklenen postların sütunları
+        hesaplanır. Küme id'leri -1 ile başlar (set_clusters ile atanır).
+
+        Returns:
+            Eklenen postların satır indeksleri
+        """
+        start = len(self.posts)
+        columns = self._columns(posts)
+        self.posts.extend(posts)
+        self.ids = np.concatenate([self.ids, columns['ids']])
+        for row, post_id in enumerate(columns['ids'].tolist(), start):
+            self.id_to_row[post_id] = row
+        self.counters = {
+            name: np.concatenate([self.counters[name], columns[name]]) for name in self.COUNTER_COLUMNS
+        }
+        self.cluster_ids = np.concatenate([self.cluster_ids, np.full(len(posts), -1, dtype=np.int64)])
+        self.created_at = np.concatenate([self.created_at, columns['created_at']])
+        self.community_ids = np.concatenate([self.community_ids, columns['community_ids']])
+        self.visibility = np.concatenate([self.visibility, columns['visibility']])
+        self._cluster_rows = None
+        return np.arange(start, len(self.posts), dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.posts)
+
+    def __contains__(self, post_id: int) -> bool:
+        return post_id in self.id_to_row
+
+    def row_of(self, post_id: int) -> Optional[int]:
+        """Post ID'sinin satır indeksini döndürür (yoksa None)"""
+        return self.id_to_row.get(post_id)
+
+    def rows_of(self, post_ids: np.ndarray) -> np.ndarray:
+        """Post ID dizisinin satır indeksleri (bulunmayanlar -1)"""
+        post_ids = np.asarray(post_ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(len(post_ids), -1, dtype=np.int64)
+        sorter = np.argsort(self.ids, kind='stable')
+        positions = np.searchsorted(self.ids, post_ids, sorter=sorter)
+        rows = sorter[np.minimum(positions, len(sorter) - 1)]
+        return np.where(self.ids[rows] == post_ids, rows, -1)
+
+    def get(self, post_id: int) -> Optional[Dict[str, Any]]:
+        """Post ID'sine ait post verisini döndürür (yoksa None)"""
+        row = self.id_to_row.get(post_id)
+        return self.posts[row] if row is not None else None
+
+    def set_clusters(self, cluster_labels: np.ndarray, rows: Optional[np.ndarray] = None):
+        """
+        Satır sırasına göre küme etiketlerini atar (rows verilirse yalnızca o satırlara)
+        """
+        if rows is None:
+            self.cluster_ids = np.asarray(cluster_labels, dtype=np.int64).copy()
+        else:
+            self.cluster_ids[rows] = cluster_labels
+        self._cluster_rows = None
+
+    def rows_in_cluster(self, cluster_id: int) -> np.ndarray:
+        """
+        Belirli bir kümedeki satırları (post sırasıyla) döndürür
+        """
+        if self._cluster_rows is None:
+            # Tüm kümelerin satır listelerini tek seferde grupla
+            order = np.argsort(self.cluster_ids, kind='stable')
+            labels, starts = np.unique(self.cluster_ids[order], return_index=True)
+            self._cluster_rows = dict(zip(labels.tolist(), np.split(order, starts[1:])))
+        return self._cluster_rows.get(cluster_id, np.empty(0, dtype=np.int64))
+
+    def increment_counters(self, row: int, deltas: Dict[str, int]):
+        """
+        Satırın sayaçlarını artırır (post verisi de güncellenir)
+        """
+        post = self.posts[row]
+        for name, delta in deltas.items():
+            self.counters[name][row] += delta
+            post[name] = int(self.counters[name][row])
+
+    def popularity(self, weights: Dict[str, float], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Sayaç sütunlarının ağırlıklı toplamını döndürür (rows verilirse yalnızca o satırlar için)
+        """
+        n_rows = len(self.posts) if rows is None else len(rows)
+        score = np.zeros(n_rows, dtype=np.float64)
+        for name, weight in weights.items():
+            counter = self.counters[name]
+            score += (counter if rows is None else counter[rows]) * weight
+        return score
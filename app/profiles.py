@@ -0,0 +1,95 @@
+import numpy as np
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator
+
+
+class WeightShares(Mapping):
+    """
+    Ham ağırlıkların toplam ağırlığa oranını veren salt okunur görünüm.
+
+    Değerler erişimde bölünür; böylece toplam değiştiğinde tüm etiketleri
+    yeniden normalize etmek gerekmez. Toplam 0 ise ham değerler döner.
+    """
+
+    def __init__(self, weights: Dict[Any, float], profile: 'InteractionProfile'):
+        self._weights = weights
+        self._profile = profile
+
+    def __getitem__(self, key) -> float:
+        total = self._profile.total_weight
+        value = self._weights[key]
+        return value / total if total > 0 else value
+
+    def __iter__(self) -> Iterator:
+        return iter(self._weights)
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def __reduce__(self):
+        # Kaydedilen profiller düz dict olarak yazılır
+        return (dict, (dict(self),))
+
+
+class InteractionProfile:
+    """
+    Kullanıcının hafızadaki etkileşimlerinden oluşan ilgi profili birikimleri.
+
+    Etiket ve küme ağırlıkları ham (normalize edilmemiş) tutulur; yeni bir etkileşim
+    yalnızca postun etiketleri kadar işlem yapar. Profil sözlüğündeki tercih
+    haritaları bu birikimlerin canlı WeightShares görünümleridir; ham skorlar ve
+    tür başına etkileşim sayıları veritabanı profilleriyle aynı anahtarlarda verilir.
+    Veritabanı profili merge ile taban alınabilir; hafızadaki etkileşimler bunun
+    üzerine eklenir.
+    """
+
+    def __init__(self):
+        self.tag_weights: Dict[str, float] = {}
+        self.cluster_weights: Dict[int, float] = {}
+        self.interaction_counts: Dict[str, int] = {}
+        self.total_weight = 0.0
+        self.n_interactions = 0
+        self.base_interactions = 0
+        self.tag_preferences = WeightShares(self.tag_weights, self)
+        self.cluster_preferences = WeightShares(self.cluster_weights, self)
+
+    def add(self, tags, cluster_id: int, weight: float):
+        """
+        Bir etkileşimi ekler (tekrarlanan etiketler ayrı ayrı sayılır)
+        """
+        tag_weights = self.tag_weights
+        for tag in tags:
+            tag_weights[tag] = tag_weights.get(tag, 0.0) + weight
+            self.total_weight += weight
+        if cluster_id != -1:
+            self.cluster_weights[cluster_id] = self.cluster_weights.get(cluster_id, 0.0) + weight
+
+    def merge(self, stored: Dict[str, Any]):
+        """
+        Veritabanı profilinin ham etiket skorlarını ve tür sayaçlarını birikimlere ekler
+        """
+        for tag, score in stored.get('tag_scores', stored.get('tag_preferences', {})).items():
+            self.tag_weights[tag] = self.tag_weights.get(tag, 0.0) + score
+            self.total_weight += score
+        for interaction_type, n in stored.get('interaction_summary', {}).items():
+            self.count(interaction_type, n)
+        self.base_interactions += stored.get('total_interactions', 0)
+        self.n_interactions += stored.get('total_interactions', 0)
+
+    def count(self, interaction_type: str, n: int = 1):
+        """Etkileşim türünün sayacını artırır (etiketi bilinmeyen postlar dahil)"""
+        self.interaction_counts[interaction_type] = self.interaction_counts.get(interaction_type, 0) + n
+
+    def as_profile(self) -> Dict[str, Any]:
+        """EnhancedRecommender.user_profiles biçiminde profil sözlüğü"""
+        return {
+            'tag_preferences': self.tag_preferences,
+            'tag_scores': self.tag_weights,
+            'interaction_summary': self.interaction_counts,
+            'cluster_preferences': self.cluster_preferences,
+            'total_interactions': self.n_interactions,
+            'last_updated': np.datetime64('now')
+        }
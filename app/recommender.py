@@ -2,13 +2,18 @@ import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 from typing import List, Dict, Any
 from app.features import TagFeatureExtractor
+from app.post_store import PostStore
+from app.topk import top_k_indices
+from app.ann import LSHIndex
 
 class ContentBasedRecommender:
     def __init__(self):
         self.posts = []
         self.post_ids = []
+        self.post_store = PostStore()
         self.tag_extractor = TagFeatureExtractor()  # TF-IDF metodu sabit olarak kullanılıyor
         self.feature_matrix = None
+        self.ann_index = LSHIndex()
         self.user_interactions = {}  # Kullanıcı ID'sine göre etkileşimleri saklayacak sözlük
         
     def fit(self, posts: List[Dict[str, Any]]):
@@ -20,9 +25,11 @@ class ContentBasedRecommender:
         """
         self.posts = posts
         self.post_ids = [post["id"] for post in posts]
+        self.post_store = PostStore(posts)
         
         # Etiket vektörlerini hesapla
         self.feature_matrix = self.tag_extractor.fit_transform(posts)
+        self.ann_index.fit(self.feature_matrix)
         print(f"Öneri modeli {len(posts)} gönderi ve {self.feature_matrix.shape[1]} özellik üzerinde eğitildi.")
     
     def update_user_interactions(self, user_id: int, tag: str, interaction_count: int):
@@ -71,38 +78,42 @@ class ContentBasedRecommender:
         
         print(f"Toplam {len(self.user_interactions)} kullanıcı için etkileşim verileri yüklendi.")
         
-    def recommend_similar_posts(self, post_id: int, top_n: int = 10) -> List[Dict[str, Any]]:
+    def recommend_similar_posts(self, post_id: int, top_n: int = 10, mode: str = "exact") -> List[Dict[str, Any]]:
         """
         Belirli bir gönderiye benzer içerikleri önerir
         
         Args:
             post_id: Benzerlik aranacak gönderi ID'si
             top_n: Döndürülecek benzer gönderi sayısı
+            mode: "exact" (tüm gönderilerle kosinüs) veya "approx" (LSH indeksi)
             
         Returns:
             Benzerlik skoruna göre sıralanmış gönderi listesi
         """
-        if post_id not in self.post_ids:
-            raise ValueError(f"ID {post_id} olan gönderi bulunamadı!")
-            
         # Gönderi indeksini bul
-        idx = self.post_ids.index(post_id)
-        
-        # Bu gönderinin özellik vektörünü al
-        post_vector = self.feature_matrix[idx]
-        
-        # Tüm gönderilerle kosinüs benzerliğini hesapla
-        similarities = cosine_similarity(post_vector, self.feature_matrix).flatten()
+        idx = self.post_store.row_of(post_id)
+        if idx is None:
+            raise ValueError(f"ID {post_id} olan gönderi bulunamadı!")
         
-        # Kendisini hariç tut ve en benzer N gönderiyi bul
-        similar_indices = np.argsort(similarities)[::-1]
-        similar_indices = [i for i in similar_indices if i != idx][:top_n]
+        if mode == "approx":
+            # LSH indeksinden aday gönderileri bul ve yalnızca onları sırala
+            similar_indices, similarity_scores = self.ann_index.query(idx, top_n)
+        else:
+            # Bu gönderinin özellik vektörünü al
+            post_vector = self.feature_matrix[idx]
+            
+            # Tüm gönderilerle kosinüs benzerliğini hesapla
+            similarities = cosine_similarity(post_vector, self.feature_matrix).flatten()
+            
+            # Kendisini hariç tut ve en benzer N gönderiyi bul
+            similar_indices = top_k_indices(similarities, top_n, exclude=idx)
+            similarity_scores = similarities[similar_indices]
         
         # Benzer gönderileri ve benzerlik skorlarını döndür
         similar_posts = []
-        for i in similar_indices:
+        for i, score in zip(similar_indices, similarity_scores):
             post = self.posts[i].copy()
-            post["similarity_score"] = float(similarities[i])
+            post["similarity_score"] = float(score)
             similar_posts.append(post)
             
         return similar_posts
@@ -148,7 +159,7 @@ class ContentBasedRecommender:
         similarities = cosine_similarity(user_vector, self.feature_matrix).flatten()
         
         # En benzer N gönderiyi indekslerini al
-        similar_indices = np.argsort(similarities)[::-1][:top_n]
+        similar_indices = top_k_indices(similarities, top_n)
         
         # Önerilen gönderileri ve benzerlik skorlarını döndür
         recommendations = []
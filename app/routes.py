@@ -1,16 +1,32 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from app.db import database
-from app.models import Post, PostCreate, UserTagInteractionCreate
-from app.enhanced_recommender import EnhancedRecommender
-from typing import List, Optional
-import json
-from datetime import datetime, timedelta
+from app.models import Post, PostCreate, UserTagInteractionCreate, BatchRecommendationRequest
+from app.enhanced_recommender import EnhancedRecommender, INTERACTION_WEIGHTS
+from app.post_loader import load_post_store
+from app.copy_loader import copy_post_store, copy_interactions, INTERACTION_TABLES
+from app.interaction_writer import InteractionWriter
+from typing import List, Optional, Literal
+import os
+from datetime import datetime
+import time
 
 router = APIRouter()
 
+# POST_LOADER=copy ise tam eğitimlerde veriler asyncpg ikili COPY ile okunur
+USE_COPY_LOADER = os.getenv("POST_LOADER", "").lower() == "copy"
+
+# LOAD_USER_INTERACTIONS=1 ise ilk yüklemede Likes/Comments geçmişi toplu olarak profillere eklenir
+LOAD_USER_INTERACTIONS = os.getenv("LOAD_USER_INTERACTIONS") == "1"
+
 # Global enhanced model instance
 recommender = EnhancedRecommender()
 
+# Etkileşimleri user_tag_interactions tablosuna toplu yazan tampon (main.py'de başlatılır)
+interaction_writer = InteractionWriter(
+    flush_interval=float(os.getenv("INTERACTION_FLUSH_INTERVAL", "5")),
+    max_pending=int(os.getenv("INTERACTION_FLUSH_SIZE", "1000"))
+)
+
 async def load_recommender_data(force_reload=False):
     """
     Gelişmiş öneri modeli için gerekli verileri yükle ve modeli başlat
@@ -21,24 +37,19 @@ async def load_recommender_data(force_reload=False):
         
     print("🚀 Gelişmiş öneri sistemi yükleniyor...")
         
-    # Gönderileri çek
-    posts_query = "SELECT * FROM posts ORDER BY created_at DESC"
-    posts = await database.fetch_all(posts_query)
-    posts_list = [dict(row) for row in posts]
-    
-    # Etiketleri JSON dizesinden listeye dönüştür
-    for post in posts_list:
-        if isinstance(post.get("tags"), str):
-            try:
-                post["tags"] = json.loads(post["tags"])
-            except:
-                post["tags"] = []
+    # Gönderileri çek (etiketler çözülmüş, sütun dizileri hazır)
+    if USE_COPY_LOADER:
+        post_store = await copy_post_store()
+    else:
+        post_store = await load_post_store()
     
     # Modeli eğit (içerik analizi dahil)
-    await recommender.fit(posts_list, use_content_analysis=True)
+    await recommender.fit(post_store.posts, use_content_analysis=True, post_store=post_store)
     
-    # Kullanıcı etkileşimlerini yükleme (bu artık fit içinde yapılıyor)
-    # await load_user_interactions() # Bu satır gereksiz
+    # Etkileşim geçmişi süreç başına bir kez yüklenir (yeniden eğitimde tekrar eklenmez)
+    if LOAD_USER_INTERACTIONS and not load_user_interactions.done:
+        await load_user_interactions()
+        load_user_interactions.done = True
     
     print("✅ Gelişmiş öneri sistemi hazır!")
     return recommender
@@ -47,40 +58,32 @@ async def load_user_interactions():
     """
     Kullanıcı etkileşimlerini veritabanından yükle
     """
-    # Likes tablosundan etkileşimleri çek
-    likes_query = """
-        SELECT user_id, post_id, 'like' as interaction_type, liked_at as timestamp
-        FROM Likes
-        ORDER BY liked_at DESC
-    """
-    likes = await database.fetch_all(likes_query)
-    
-    # Comments tablosundan etkileşimleri çek
-    comments_query = """
-        SELECT user_id, post_id, 'comment' as interaction_type, created_at as timestamp
-        FROM Comments
-        ORDER BY created_at DESC
-    """
-    comments = await database.fetch_all(comments_query)
-    
-    # Etkileşimleri modele yükle
-    for like in likes:
-        recommender.update_user_interactions(
-            user_id=like['user_id'],
-            post_id=like['post_id'],
-            interaction_type='like',
-            weight=3.0
-        )
-    
-    for comment in comments:
-        recommender.update_user_interactions(
-            user_id=comment['user_id'],
-            post_id=comment['post_id'],
-            interaction_type='comment',
-            weight=4.0
+    counts = {}
+    for interaction_type in ('like', 'comment'):
+        if USE_COPY_LOADER:
+            # İkili COPY ile (user_id, post_id, timestamp) dizileri olarak oku
+            columns = await copy_interactions(interaction_type)
+            user_ids, post_ids, timestamps = columns['user_id'], columns['post_id'], columns['timestamp']
+        else:
+            # Likes / Comments tablosundan etkileşimleri çek
+            table, time_column = INTERACTION_TABLES[interaction_type]
+            rows = await database.fetch_all(f"""
+                SELECT user_id, post_id, {time_column} as timestamp
+                FROM {table}
+                ORDER BY {time_column} DESC
+            """)
+            user_ids = [row['user_id'] for row in rows]
+            post_ids = [row['post_id'] for row in rows]
+            timestamps = [row['timestamp'] for row in rows]
+        
+        # Tüm profiller tek geçişte (seyrek matris çarpımıyla) güncellenir
+        counts[interaction_type] = recommender.ingest_interactions(
+            user_ids, post_ids, interaction_type, timestamps=timestamps
         )
     
-    print(f"✅ {len(likes)} like ve {len(comments)} yorum etkileşimi yüklendi.")
+    print(f"✅ {counts['like']} like ve {counts['comment']} yorum etkileşimi yüklendi.")
+
+load_user_interactions.done = False
 
 @router.post("/track-interaction")
 async def track_interaction(user_id: int, post_id: int, interaction_type: str):
@@ -90,15 +93,8 @@ async def track_interaction(user_id: int, post_id: int, interaction_type: str):
     # Öneri modelini yükle
     await load_recommender_data()
     
-    # Etkileşim ağırlıkları
-    weights = {
-        'view': 1.0,
-        'like': 3.0,
-        'comment': 4.0,
-        'share': 5.0
-    }
-    
-    weight = weights.get(interaction_type, 1.0)
+    # Etkileşim ağırlıkları (profil yükleme sorgusuyla ortak)
+    weight = INTERACTION_WEIGHTS.get(interaction_type, 1.0)
     
     # Modeli güncelle
     recommender.update_user_interactions(
@@ -108,6 +104,14 @@ async def track_interaction(user_id: int, post_id: int, interaction_type: str):
         weight=weight
     )
     
+    # Postun sayacını artırarak popülerlik sıralamasını güncel tut
+    counter = recommender.INTERACTION_COUNTERS.get(interaction_type)
+    if counter:
+        recommender.update_post_counters(post_id, {counter: 1})
+    
+    # Kalıcı kayıt: etiket başına artışlar tamponda toplanıp arka planda yazılır
+    interaction_writer.record(user_id, recommender.post_tags(post_id), interaction_type)
+    
     return {
         "status": "success",
         "message": f"Etkileşim kaydedildi: {interaction_type}",
@@ -138,6 +142,52 @@ async def get_recommendations(user_id: int = Query(...), limit: int = 50):
         "timestamp": datetime.now().isoformat()
     }
 
+@router.post("/recommendations/batch")
+async def get_batch_recommendations(request: BatchRecommendationRequest):
+    """
+    Birden fazla kullanıcıya tek seferde öneri sunar (tek seyrek matris çarpımı)
+    """
+    await load_recommender_data()
+    
+    start = time.perf_counter()
+    results = await recommender.recommend_for_users(
+        user_ids=request.user_ids,
+        top_n=request.limit,
+        exclude_seen=True
+    )
+    elapsed = time.perf_counter() - start
+    
+    return {
+        "results": [
+            {
+                "user_id": user_id,
+                "recommendations": recommendations,
+                "count": len(recommendations)
+            }
+            for user_id, recommendations in results.items()
+        ],
+        "user_count": len(results),
+        "elapsed_seconds": round(elapsed, 4),
+        "users_per_second": round(len(results) / elapsed, 2) if elapsed > 0 else None,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """
+    Öneri önbelleğinin isabet/ıskalama sayaçlarını döndürür (izleme için)
+    """
+    return {
+        "model_version": recommender.model_version,
+        "ranking_cache": recommender.ranking_cache.stats(),
+        "feed_store": recommender.feed_store.stats(),
+        "user_profiles": recommender.user_profiles.stats(),
+        "feed_cursors": recommender.feed_cursors.stats(),
+        "interaction_writer": interaction_writer.stats(),
+        "cluster_drift": round(recommender.content_analyzer.cluster_drift(), 4),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @router.get("/post-analysis/{post_id}")
 async def get_post_analysis(post_id: int):
     """
@@ -168,13 +218,15 @@ async def get_post_analysis(post_id: int):
         }
 
 @router.get("/similar-posts/{post_id}")
-async def get_similar_posts(post_id: int, limit: int = Query(5, ge=1, le=20)):
+async def get_similar_posts(post_id: int, limit: int = Query(5, ge=1, le=20),
+                            mode: Literal["exact", "approx"] = Query("exact")):
     """
-    Belirli bir posta benzer postları döndürür
+    Belirli bir posta benzer postları döndürür.
+    mode=approx, küme bazlı benzerlik yerine TF-IDF benzerliğini LSH indeksi üzerinden hesaplar.
     """
     await load_recommender_data()
     
-    similar = recommender.get_similar_posts(post_id, limit)
+    similar = recommender.get_similar_posts(post_id, limit, mode=mode)
     
     if not similar:
         raise HTTPException(status_code=404, detail="Benzer post bulunamadı veya post mevcut değil")
@@ -182,7 +234,8 @@ async def get_similar_posts(post_id: int, limit: int = Query(5, ge=1, le=20)):
     return {
         "post_id": post_id,
         "similar_posts": similar,
-        "count": len(similar)
+        "count": len(similar),
+        "mode": mode
     }
 
 @router.get("/user-profile/{user_id}")
@@ -223,48 +276,38 @@ async def get_topic_posts(topic_id: int, limit: int = Query(10, le=50)):
 @router.post("/analyze-new-posts")
 async def analyze_new_posts():
     """
-    Son 3 saatte eklenen yeni postları analiz eder
+    Son analizden (watermark) sonra eklenen / güncellenen postları modeli
+    yeniden eğitmeden mevcut indekslere ekler
     """
-    # Son 3 saatteki postları bul
-    three_hours_ago = datetime.now() - timedelta(hours=3)
+    if recommender.feature_matrix is None:
+        # Model henüz eğitilmediyse tüm postlarla eğit
+        await load_recommender_data()
+        return {
+            "status": "success",
+            "message": "Model tüm postlarla eğitildi",
+            "analyzed_count": len(recommender.posts),
+            "total_posts": len(recommender.posts),
+            "timestamp": datetime.now().isoformat()
+        }
     
-    new_posts_query = """
-        SELECT * FROM posts 
-        WHERE created_at >= :since_time
-        ORDER BY created_at DESC
-    """
-    new_posts = await database.fetch_all(new_posts_query, {"since_time": three_hours_ago})
-    new_posts_list = [dict(row) for row in new_posts]
+    start = time.perf_counter()
+    result = await recommender.ingest_new_posts()
     
-    if not new_posts_list:
+    if not result["added"] and not result["refreshed"]:
         return {
             "status": "no_new_posts",
-            "message": "Son 3 saatte yeni post eklenmemiş",
+            "message": "Son analizden sonra yeni post eklenmemiş",
             "analyzed_count": 0
         }
     
-    # Etiketleri düzenle
-    for post in new_posts_list:
-        if isinstance(post.get("tags"), str):
-            try:
-                post["tags"] = json.loads(post["tags"])
-            except:
-                post["tags"] = []
-    
-    # Yeni postları mevcut sisteme ekle ve analiz et
-    await load_recommender_data()
-    
-    # Mevcut postlarla birleştir
-    all_posts = recommender.posts + new_posts_list
-    
-    # Modeli yeniden eğit
-    recommender.fit(all_posts, use_content_analysis=True)
-    
     return {
         "status": "success",
         "message": "Yeni postlar analiz edildi",
-        "analyzed_count": len(new_posts_list),
-        "total_posts": len(all_posts),
+        "analyzed_count": result["added"],
+        "updated_count": result["refreshed"],
+        "reclustered": result["reclustered"],
+        "total_posts": len(recommender.posts),
+        "elapsed_seconds": round(time.perf_counter() - start, 4),
         "timestamp": datetime.now().isoformat()
     }
 
@@ -290,30 +333,52 @@ async def retrain_model():
     }
 
 @router.get("/feed")
-async def feed(user_id: int = Query(...), limit: int = 100):
+async def feed(user_id: int = Query(...), limit: int = Query(100, ge=1),
+               cursor: Optional[str] = None):
     """
-    Kullanıcıya kişiselleştirilmiş ana feed'i döndürür.
-    Bu endpoint, `recommendations` ile aynı mantığı kullanır ancak
-    genellikle daha fazla sayıda sonuç döndürür.
+    Kullanıcıya kişiselleştirilmiş ana feed'i sayfa sayfa döndürür.
+    
+    İlk istekte (cursor yok) FEED_PIN_PAGES sayfalık bir sıralama hesaplanıp
+    sabitlenir ve ilk sayfa ile birlikte `next_cursor` döner. Küme limiti her
+    `limit`'lik sayfaya ayrı uygulanır; sıralama tek sayfaya sığarsa imleç dönmez.
+    Sonraki sayfalar bu imleçle, sabit sıralamadan yeniden skorlama yapılmadan
+    okunur; imleç sıralamanın sonuna gelince sıralama (en fazla FEED_PIN_SIZE
+    posta kadar) uzatılır.
+    Sabit sıralamanın süresi dolduysa 410 döner; istemci feed'i imleçsiz yeniden ister.
     """
     # Öneri modelini yükle ve kullanıcı profillerini hazırla
     await load_recommender_data()
     
-    # Kullanıcıya özel öneriler yap
-    recommendations = await recommender.recommend_for_user(
-        user_id=user_id,
-        top_n=limit,
-        exclude_seen=True
-    )
-    
-    # Eğer hiç öneri yoksa, popüler gönderileri döndür
-    if not recommendations:
-        recommendations = recommender._get_diversified_popular_posts(top_n=limit)
+    if cursor:
+        try:
+            page = await recommender.get_feed_page(user_id, cursor, limit)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Geçersiz imleç")
+        if page is None:
+            raise HTTPException(status_code=410, detail="İmlecin süresi dolmuş, feed'i imleçsiz yeniden isteyin")
+        recommendations, next_cursor = page
+        source = "cursor"
+    else:
+        # Aktif kullanıcılar için scheduler'ın önceden hesapladığı feed'i kullan
+        ranking = recommender.get_materialized_feed(user_id)
+        source = "materialized"
+        exhausted = False
+        
+        if ranking is None or len(ranking) < limit:
+            # Güncel feed yoksa canlı skorla (öneri yoksa popüler gönderiler)
+            source = "live"
+            top_n = recommender.feed_pin_length(limit)
+            ranking = await recommender.rank_feed(user_id, top_n)
+            exhausted = len(ranking) < top_n
+        
+        recommendations, next_cursor = recommender.pin_feed(user_id, ranking, limit, exhausted)
 
     return {
         "user_id": user_id,
         "feed": recommendations,
         "count": len(recommendations),
+        "next_cursor": next_cursor,
+        "source": source,
         "timestamp": datetime.now().isoformat()
     }
 
@@ -2,13 +2,17 @@ import asyncio
 import schedule
 import time
 from datetime import datetime
-from app.db import database
+from app.db import background_database
 import threading
 
 class RecommendationScheduler:
+    # Aktif kullanıcı feed'lerinin yeniden hesaplanma aralığı (saniye)
+    MATERIALIZE_INTERVAL = 600
+    
     def __init__(self):
         self.running = False
         self.scheduler_thread = None
+        self.materialize_task = None
     
     async def analyze_new_posts_job(self):
         """
@@ -17,8 +21,8 @@ class RecommendationScheduler:
         try:
             print(f"🔄 {datetime.now()}: Yeni post analizi başlıyor...")
             
-            # Veritabanına bağlan
-            await database.connect()
+            # Görevlerin ayrı havuzuna bağlan (API havuzu bu thread'den kullanılmaz)
+            await background_database.connect()
             
             # Son 3 saatteki postları analiz et
             # Bu fonksiyon routes.py'den import edilecek
@@ -27,7 +31,7 @@ class RecommendationScheduler:
         except Exception as e:
             print(f"❌ Yeni post analizi hatası: {e}")
         finally:
-            await database.disconnect()
+            await background_database.disconnect()
     
     async def daily_model_training_job(self):
         """
@@ -36,8 +40,8 @@ class RecommendationScheduler:
         try:
             print(f"🚀 {datetime.now()}: Günlük model eğitimi başlıyor...")
             
-            # Veritabanına bağlan
-            await database.connect()
+            # Görevlerin ayrı havuzuna bağlan (API havuzu bu thread'den kullanılmaz)
+            await background_database.connect()
             
             # Model eğitimi burada yapılacak
             print(f"✅ Günlük model eğitimi tamamlandı")
@@ -45,7 +49,39 @@ class RecommendationScheduler:
         except Exception as e:
             print(f"❌ Günlük model eğitimi hatası: {e}")
         finally:
-            await database.disconnect()
+            await background_database.disconnect()
+    
+    async def materialize_feeds_job(self):
+        """
+        Son etkileşimi olan aktif kullanıcıların feed'lerini önceden hesaplayan görev.
+        
+        Recommender'ın durumunu API ile paylaştığından scheduler thread'inde değil,
+        uygulamanın event loop'unda çalışır (bkz. materialize_feeds_loop).
+        """
+        try:
+            from app.routes import recommender
+            
+            # Model henüz eğitilmediyse hesaplanacak bir şey yok
+            if recommender.feature_matrix is None:
+                return
+            
+            start = time.perf_counter()
+            count = await recommender.materialize_feeds()
+            # Diske yazma loop'u bloklamasın
+            await asyncio.to_thread(recommender.feed_store.save)
+            print(f"📰 {datetime.now()}: {count} aktif kullanıcının feed'i hesaplandı "
+                  f"({time.perf_counter() - start:.2f} sn)")
+            
+        except Exception as e:
+            print(f"❌ Feed hesaplama hatası: {e}")
+    
+    async def materialize_feeds_loop(self):
+        """
+        materialize_feeds_job'ı MATERIALIZE_INTERVAL aralıklarla çalıştırır
+        """
+        while True:
+            await asyncio.sleep(self.MATERIALIZE_INTERVAL)
+            await self.materialize_feeds_job()
     
     def run_async_job(self, coro):
         """
@@ -75,6 +111,7 @@ class RecommendationScheduler:
         print("📅 Zamanlanmış görevler ayarlandı:")
         print("   - Yeni post analizi: Her 3 saatte bir")
         print("   - Model eğitimi: Her gün saat 02:00")
+        print("   - Aktif kullanıcı feed'leri: Her 10 dakikada bir (uygulamanın event loop'unda)")
     
     def run_scheduler(self):
         """
@@ -91,8 +128,11 @@ class RecommendationScheduler:
     
     def start(self):
         """
-        Scheduler'ı ayrı thread'de başlat
+        Scheduler'ı ayrı thread'de, feed hesaplama görevini mevcut event loop'ta başlat
         """
+        if self.materialize_task is None:
+            self.materialize_task = asyncio.get_running_loop().create_task(self.materialize_feeds_loop())
+        
         if not self.running:
             self.scheduler_thread = threading.Thread(target=self.run_scheduler)
             self.scheduler_thread.daemon = True
@@ -104,6 +144,9 @@ class RecommendationScheduler:
         Scheduler'ı durdur
         """
         self.running = False
+        if self.materialize_task is not None:
+            self.materialize_task.cancel()
+            self.materialize_task = None
         if self.scheduler_thread:
             self.scheduler_thread.join()
         print("🛑 Scheduler durduruldu")
@@ -0,0 +1,288 @@
+import json
+import numpy as np
+from scipy import sparse
+from typing import List, Dict, Any, Optional
+from app.post_store import PostStore
+
+
+def resolve_post_tags(post: Dict[str, Any], post_analysis: Dict[int, Dict[str, Any]]) -> List[str]:
+    """
+    Postun öneri için kullanılan etiketlerini döndürür
+    (varsa enhanced_tags, yoksa ham etiketler)
+    """
+    post_id = post['id']
+    if post_id in post_analysis:
+        return post_analysis[post_id].get('enhanced_tags', [])
+
+    tags = post.get('tags', [])
+    if isinstance(tags, str):
+        try:
+            tags = json.loads(tags)
+        except:
+            tags = []
+    return tags or []
+
+
+class ScoringEngine:
+    """
+    recommend_for_user skorlamasını tüm postlar için dizi işlemleriyle yapar.
+
+    Post başına etiket id'leri (seyrek post x etiket matrisi), küme id'leri,
+    popülerlik ve içerik uzunluğu fit() sırasında NumPy dizilerine çevrilir;
+    böylece her istekte post başına Python döngüsü çalışmaz.
+    """
+
+    # Son skordaki bileşen ağırlıkları
+    PERSONALIZATION_WEIGHT = 0.70
+    DIVERSITY_WEIGHT = 0.15
+    INTERACTION_WEIGHT = 0.10
+    TIME_WEIGHT = 0.03
+    POPULARITY_WEIGHT = 0.02
+    NOISE_RANGE = 0.05
+
+    # Popülerlik bileşeninde sayaç ağırlıkları
+    POPULARITY_COUNTER_WEIGHTS = {
+        'likes_count': 0.2,
+        'comments_count': 0.3,
+        'shares_count': 0.4,
+        'views_count': 0.1
+    }
+
+    # score_batch çağrısı başına en fazla (kullanıcı x post) hücre sayısı. Her hücre için
+    # iki float64 yoğun dizi (skorlar + ara terim), etiket çarpımının seyrek sonucu
+    # (en kötü durumda hücre başına 12 bayt) ve bir bool maske tutulur; en yüksek
+    # bellek yaklaşık MAX_BATCH_CELLS * 29 bayttır (4M hücre ~ 116 MB)
+    MAX_BATCH_CELLS = 4_000_000
+
+    def __init__(self, seed: Optional[int] = None):
+        self.rng = np.random.default_rng(seed)
+        self.tag_index = {}
+        self.post_tag_matrix = None
+        self.tag_counts = None
+        self.cluster_ids = None
+        self.popularity = None
+        self.content_length = None
+        self.likes_count = None
+        self.n_clusters = 0
+
+    def build(self, post_store: PostStore, post_analysis: Dict[int, Dict[str, Any]]):
+        """
+        Post deposundan skorlama dizilerini oluşturur
+        """
+        posts = post_store.posts
+        n_posts = len(posts)
+        self.tag_index = {}
+        self.post_tag_matrix, self.content_length = self._tag_rows(posts, post_analysis)
+        self.tag_counts = np.asarray(self.post_tag_matrix.sum(axis=1)).ravel()
+        self.cluster_ids = post_store.cluster_ids
+        self.popularity = post_store.popularity(self.POPULARITY_COUNTER_WEIGHTS) / 50.0  # Daha düşük normalize
+        self.likes_count = post_store.counters['likes_count']
+        self.n_clusters = int(self.cluster_ids.max()) + 1 if n_posts else 0
+
+    def _tag_rows(self, posts: List[Dict[str, Any]], post_analysis: Dict[int, Dict[str, Any]]):
+        """
+        Postların seyrek (post x etiket) satırlarını ve içerik uzunluklarını oluşturur;
+        yeni etiketler tag_index'e eklenir
+        """
+        rows, cols = [], []
+        content_length = np.zeros(len(posts), dtype=np.int64)
+
+        for row, post in enumerate(posts):
+            for tag in resolve_post_tags(post, post_analysis):
+                col = self.tag_index.setdefault(tag, len(self.tag_index))
+                rows.append(row)
+                cols.append(col)
+
+            content_length[row] = len(post.get('content', '') or '')
+
+        # Tekrarlanan etiketler toplanır; eski döngüdeki sayım davranışı korunur
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float64), (rows, cols)),
+            shape=(len(posts), len(self.tag_index))
+        )
+        return matrix, content_length
+
+    def append(self, post_store: PostStore, rows: np.ndarray, post_analysis: Dict[int, Dict[str, Any]]):
+        """
+        Post deposunun sonuna eklenen satırları skorlama dizilerine ekler;
+        yalnızca yeni postların etiketleri işlenir
+        """
+        block, content_length = self._tag_rows([post_store.posts[row] for row in rows], post_analysis)
+
+        # Mevcut satırlar yeni etiket sütunları kadar genişletilir (veri kopyalanmaz)
+        current = self.post_tag_matrix
+        current = sparse.csr_matrix(
+            (current.data, current.indices, current.indptr),
+            shape=(current.shape[0], len(self.tag_index))
+        )
+        self.post_tag_matrix = sparse.vstack([current, block], format='csr')
+        self.tag_counts = np.concatenate([self.tag_counts, np.asarray(block.sum(axis=1)).ravel()])
+        self.content_length = np.concatenate([self.content_length, content_length])
+        self.popularity = np.concatenate([
+            self.popularity, post_store.popularity(self.POPULARITY_COUNTER_WEIGHTS, rows) / 50.0
+        ])
+        self.cluster_ids = post_store.cluster_ids
+        self.likes_count = post_store.counters['likes_count']
+        if len(rows):
+            self.n_clusters = max(self.n_clusters, int(self.cluster_ids[rows].max()) + 1)
+
+    def update_popularity(self, post_store: PostStore, row: int):
+        """
+        Sayaçları değişen satırın popülerlik skorunu yeniden hesaplar
+        """
+        score = 0.0
+        for name, weight in self.POPULARITY_COUNTER_WEIGHTS.items():
+            score += post_store.counters[name][row] * weight
+        self.popularity[row] = score / 50.0
+
+    def preference_matrices(self, tag_preferences_list: List[Dict[str, float]]):
+        """
+        Kullanıcıların etiket tercihlerini seyrek (kullanıcı x etiket) ağırlık
+        ve eşleşme matrislerine çevirir
+        """
+        user_rows, cols, values = [], [], []
+        for user_row, tag_preferences in enumerate(tag_preferences_list):
+            for tag, weight in tag_preferences.items():
+                col = self.tag_index.get(tag)
+                if col is not None:
+                    user_rows.append(user_row)
+                    cols.append(col)
+                    values.append(weight)
+
+        shape = (len(tag_preferences_list), len(self.tag_index))
+        weights = sparse.csr_matrix(
+            (np.asarray(values, dtype=np.float64), (user_rows, cols)), shape=shape
+        )
+        known = sparse.csr_matrix(
+            (np.ones(len(cols), dtype=np.float64), (user_rows, cols)), shape=shape
+        )
+        return weights, known
+
+    def batch_size_for(self, n_rows: Optional[int] = None) -> int:
+        """
+        Skor matrisi MAX_BATCH_CELLS hücreyi aşmayacak şekilde tek seferde
+        skorlanabilecek kullanıcı sayısı (bellek sınırı için MAX_BATCH_CELLS açıklamasına bakın)
+        """
+        n_rows = len(self.tag_counts) if n_rows is None else n_rows
+        return max(1, self.MAX_BATCH_CELLS // max(1, n_rows))
+
+    def score(self, tag_preferences: Dict[str, float], cluster_interactions: np.ndarray,
+              most_common_interaction: Optional[str] = None,
+              rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Postlar için son öneri skorunu hesaplar
+
+        Args:
+            tag_preferences: Kullanıcının etiket -> ağırlık haritası
+            cluster_interactions: Küme başına kullanıcı etkileşim sayısı
+            most_common_interaction: Kullanıcının en sık etkileşim türü
+            rows: Skorlanacak post satırları (None ise tüm postlar)
+
+        Returns:
+            rows sırasıyla (veya tüm postlar için) skor dizisi
+        """
+        return self.score_batch(
+            [tag_preferences], [cluster_interactions], [most_common_interaction], rows=rows
+        )[0]
+
+    def score_batch(self, tag_preferences_list: List[Dict[str, float]],
+                    cluster_interactions_list: List[np.ndarray],
+                    most_common_interactions: List[Optional[str]],
+                    rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Birden fazla kullanıcı için skorları tek seyrek matris çarpımıyla hesaplar
+
+        Args:
+            tag_preferences_list: Kullanıcı başına etiket -> ağırlık haritası
+            cluster_interactions_list: Kullanıcı başına küme etkileşim sayıları
+            most_common_interactions: Kullanıcı başına en sık etkileşim türü
+            rows: Skorlanacak post satırları (None ise tüm postlar)
+
+        Returns:
+            (kullanıcı x post) skor matrisi
+        """
+        post_tag_matrix = self.post_tag_matrix
+        tag_counts = self.tag_counts
+        cluster_ids = self.cluster_ids
+        popularity = self.popularity
+        content_length = self.content_length
+        likes_count = self.likes_count
+        if rows is not None:
+            post_tag_matrix = post_tag_matrix[rows]
+            tag_counts = tag_counts[rows]
+            cluster_ids = cluster_ids[rows]
+            popularity = popularity[rows]
+            content_length = content_length[rows]
+            likes_count = likes_count[rows]
+
+        n_users = len(tag_preferences_list)
+        n_posts = len(cluster_ids)
+        weights, known = self.preference_matrices(tag_preferences_list)
+
+        # Bellek: (kullanıcı x post) boyutunda yalnızca iki yoğun dizi tutulur; skorlar
+        # scores üzerinde yerinde biriktirilir, ara terimler scratch'e yazılır
+
+        # 1. KİŞİSELLEŞTİRME: eşleşen etiketlerin ortalama ağırlığı (2x) - bilinmeyen etiket cezası
+        # (kullanıcı x etiket) @ (etiket x post) -> tüm kullanıcılar için tek çarpım
+        tag_post_matrix = post_tag_matrix.T
+        scores = (weights @ tag_post_matrix).toarray()
+        scratch = (known @ tag_post_matrix).toarray()
+
+        # Eşleşme yoksa ağırlık toplamı da 0'dır
+        np.divide(scores, scratch, out=scores, where=scratch > 0)
+        scores *= 2.0
+
+        # Bilinmeyen etiket oranı: (etiket sayısı - eşleşen) / etiket sayısı
+        np.subtract(tag_counts, scratch, out=scratch)
+        np.divide(scratch, tag_counts, out=scratch, where=tag_counts > 0)
+        scratch *= 0.1
+        scores -= scratch
+        scores *= self.PERSONALIZATION_WEIGHT
+
+        # 2. ÇEŞİTLİLİK: kullanıcının az etkileşimde bulunduğu kümelere bonus
+        width = max([self.n_clusters] + [len(c) for c in cluster_interactions_list])
+        histograms = np.zeros((n_users, max(width, 1)), dtype=np.int64)
+        for user_row, cluster_interactions in enumerate(cluster_interactions_list):
+            histograms[user_row, :len(cluster_interactions)] = cluster_interactions
+
+        # Bonus (kullanıcı x küme) tablosundan postların kümelerine dağıtılır
+        bonus = np.where(histograms < 2, 0.3, np.where(histograms < 5, 0.1, 0.0))
+        has_cluster = cluster_ids != -1
+        in_range = has_cluster & (cluster_ids < width)
+        np.take(bonus, np.where(in_range, cluster_ids, 0), axis=1, out=scratch)
+        # Histogram dışındaki kümelerde etkileşim sayısı 0'dır
+        scratch[:, has_cluster & ~in_range] = 0.3
+        scratch[:, ~has_cluster] = 0.0
+        scratch *= self.DIVERSITY_WEIGHT
+        scores += scratch
+
+        # 3. ETKİLEŞİM TÜRÜ: kullanıcının en sık etkileşimine uygun postlar
+        bonus_by_type = {}
+        scratch.fill(0.0)
+        for user_row, most_common_interaction in enumerate(most_common_interactions):
+            if not most_common_interaction:
+                continue
+            if 'comment' in most_common_interaction:
+                kind, mask, value = 'comment', content_length > 100, 0.2
+            elif 'like' in most_common_interaction:
+                kind, mask, value = 'like', likes_count > 5, 0.15
+            elif 'share' in most_common_interaction:
+                kind, mask, value = 'share', tag_counts > 2, 0.1
+            else:
+                continue
+            if kind not in bonus_by_type:
+                bonus_by_type[kind] = np.where(mask, value, 0.0)
+            scratch[user_row] = bonus_by_type[kind]
+        scratch *= self.INTERACTION_WEIGHT
+        scores += scratch
+        del scratch
+
+        # 4. ZAMAN BONUSU: postlar dict olduğundan önceki döngüde de hiç uygulanmıyordu
+        time_bonus = 0.0
+        scores += time_bonus * self.TIME_WEIGHT
+
+        scores += popularity * self.POPULARITY_WEIGHT
+
+        # 5. RASTGELE ÇEŞİTLİLİK
+        scores += self.rng.uniform(-self.NOISE_RANGE, self.NOISE_RANGE, size=(n_users, n_posts))
+        return scores
@@ -0,0 +1,75 @@
+import numpy as np
+from scipy import sparse
+from typing import Dict, Iterable, List
+
+
+class InvertedTagIndex:
+    """
+    Etiketten post satırlarına ters indeks (posting list).
+
+    fit() sırasında seyrek post x etiket matrisinin CSC hali olarak oluşturulur;
+    sonradan eklenen postlar etiket başına ek listelerde tutulur.
+    """
+
+    def __init__(self):
+        self.tag_ids = {}
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.empty(0, dtype=np.int64)
+        self._appended: Dict[int, List[int]] = {}
+
+    def build(self, tag_lists: Iterable[Iterable[str]]):
+        """
+        Satır sırasına göre etiket listelerinden indeksi oluşturur
+        """
+        self.tag_ids = {}
+        self._appended = {}
+        rows, cols = [], []
+        n_rows = 0
+        for row, tags in enumerate(tag_lists):
+            n_rows = row + 1
+            for tag in set(tags):
+                rows.append(row)
+                cols.append(self.tag_ids.setdefault(tag, len(self.tag_ids)))
+
+        matrix = sparse.csc_matrix(
+            (np.ones(len(rows), dtype=np.int8), (rows, cols)),
+            shape=(n_rows, len(self.tag_ids))
+        )
+        matrix.sort_indices()
+        self._indptr = matrix.indptr.astype(np.int64)
+        self._indices = matrix.indices.astype(np.int64)
+
+    def add(self, row: int, tags: Iterable[str]):
+        """
+        Yeni eklenen bir postu indekse ekler
+        """
+        for tag in set(tags):
+            tag_id = self.tag_ids.setdefault(tag, len(self.tag_ids))
+            self._appended.setdefault(tag_id, []).append(row)
+
+    def posting(self, tag: str) -> np.ndarray:
+        """
+        Etiketi içeren post satırlarını döndürür
+        """
+        tag_id = self.tag_ids.get(tag)
+        if tag_id is None:
+            return np.empty(0, dtype=np.int64)
+
+        if tag_id + 1 < len(self._indptr):
+            rows = self._indices[self._indptr[tag_id]:self._indptr[tag_id + 1]]
+        else:
+            rows = np.empty(0, dtype=np.int64)
+
+        appended = self._appended.get(tag_id)
+        if appended:
+            rows = np.concatenate([rows, np.asarray(appended, dtype=np.int64)])
+        return rows
+
+    def candidates(self, tags: Iterable[str]) -> np.ndarray:
+        """
+        Verilen etiketlerin posting listelerinin birleşimini (sıralı, tekil) döndürür
+        """
+        postings = [self.posting(tag) for tag in tags]
+        if not postings:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(postings))
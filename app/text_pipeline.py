@@ -0,0 +1,143 @@
+import json
+import os
+import re
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Ön derlenmiş temizleme kalıpları (önceki re.sub adımlarıyla aynı sırada uygulanır)
+URL_PATTERN = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+MENTION_PATTERN = re.compile(r'[@#]\w+')
+NON_WORD_PATTERN = re.compile(r'[^\w\sçğıöşüÇĞIİÖŞÜ]+')
+
+
+def clean_text(text: str) -> str:
+    """Türkçe ve İngilizce metinleri temizler"""
+    if not text:
+        return ""
+
+    text = text.lower()
+    # URL'leri kaldır
+    text = URL_PATTERN.sub('', text)
+    # Mention ve hashtag'leri temizle
+    text = MENTION_PATTERN.sub('', text)
+    # Türkçe ve İngilizce karakterler dışındakileri kaldır
+    text = NON_WORD_PATTERN.sub(' ', text)
+    # Fazla boşlukları temizle (str.split re'deki \s ile aynı boşluk karakterlerini kullanır)
+    return ' '.join(text.split())
+
+
+def post_document(title: Optional[str], content: Optional[str]) -> str:
+    """
+    Postun vektörleştirilecek metni (title'a 3x ağırlık).
+
+    clean_text(f"{title} {title} {title} {content}") ile aynı sonucu verir;
+    kalıplar boşluk aşmadığından başlık bir kez temizlenip tekrarlanır.
+    """
+    title = clean_text(title or '')
+    content = clean_text(content or '')
+    return ' '.join(part for part in (title, title, title, content) if part)
+
+
+def parse_tags(tags: Any) -> List[str]:
+    """Liste veya JSON dizesi olarak gelen etiketleri listeye çevirir (hatalıysa [])"""
+    if isinstance(tags, str):
+        try:
+            tags = json.loads(tags)
+        except ValueError:
+            return []
+    return tags if isinstance(tags, list) else []
+
+
+def tag_document(tags: List[str]) -> str:
+    """Etiketleri TF-IDF'in beklediği boşlukla ayrılmış metne çevirir"""
+    return " ".join(tags)
+
+
+def _clean_chunk(texts: Sequence[str]) -> List[str]:
+    return [clean_text(text) for text in texts]
+
+
+def _document_chunk(pairs: Sequence[Tuple[Optional[str], Optional[str]]]) -> List[str]:
+    return [post_document(title, content) for title, content in pairs]
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class TextPipeline:
+    """
+    Metin ön işleme hattı: dokümanları parçalara bölüp süreç havuzunda temizler
+    ve sonuçları giriş sırasıyla akıtır.
+
+    Aynı anda en fazla workers * 2 parça işte tutulur; böylece bellek kullanımı
+    korpusa değil parça boyutuna bağlıdır. min_parallel'den az doküman veya tek
+    worker ile havuz açılmadan aynı süreçte çalışır. Havuz ilk paralel çağrıda
+    'spawn' ile oluşturulur (thread'li API sürecinin fork edilmemesi için) ve
+    close() çağrılana kadar yeniden kullanılır.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 2000,
+                 min_parallel: int = 10000):
+        if workers is None:
+            workers = int(os.getenv("TEXT_PIPELINE_WORKERS", "1"))
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        self.min_parallel = min_parallel
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def map(self, function: Callable[[Sequence], List], items: Sequence) -> Iterator:
+        """
+        Parça başına çalışan (modül seviyesinde tanımlı) fonksiyonu uygular ve
+        sonuçları sırayla döndürür
+        """
+        if self.workers == 1 or len(items) < self.min_parallel:
+            for chunk in _chunks(items, self.chunk_size):
+                yield from function(chunk)
+            return
+
+        executor = self._pool()
+        pending = deque()
+        for chunk in _chunks(items, self.chunk_size):
+            pending.append(executor.submit(function, chunk))
+            if len(pending) >= self.workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+    def clean(self, texts: Sequence[str]) -> Iterator[str]:
+        """Metinleri clean_text ile temizler"""
+        return self.map(_clean_chunk, texts)
+
+    def post_documents(self, posts: Sequence[Dict[str, Any]]) -> Iterator[str]:
+        """Postların title + content dokümanlarını üretir (havuza yalnızca metinler gönderilir)"""
+        pairs = [(post.get('title'), post.get('content')) for post in posts]
+        return self.map(_document_chunk, pairs)
+
+    def close(self):
+        """Süreç havuzunu kapatır"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,222 @@
+import numpy as np
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+def _top_positions(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    En yüksek k skorun pozisyonlarını (skor azalan, eşitlikte pozisyon artan) döndürür.
+
+    argpartition ile O(n) seçim yapılır, yalnızca seçilen k eleman sıralanır.
+    Eşit skorlarda sıralama Python'un kararlı sort(reverse=True) davranışıyla aynıdır.
+    """
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    if k < n:
+        # k. en büyük skor eşiği; eşiğin üstündekiler + eşikteki ilk elemanlar
+        threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+        positions = np.concatenate([above, ties])
+    else:
+        positions = np.arange(n)
+
+    return positions[np.lexsort((positions, -scores[positions]))]
+
+
+def top_k_indices(scores: np.ndarray, k: int, exclude: Optional[int] = None) -> np.ndarray:
+    """
+    Skor dizisinde en yüksek k elemanın indekslerini sıralı döndürür
+
+    Args:
+        scores: Skor dizisi
+        k: Döndürülecek eleman sayısı
+        exclude: Sonuçlara dahil edilmeyecek indeks (örn. postun kendisi)
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if exclude is None:
+        return _top_positions(scores, k)
+
+    keep = np.ones(len(scores), dtype=bool)
+    keep[exclude] = False
+    positions = np.flatnonzero(keep)
+    return positions[_top_positions(scores[positions], k)]
+
+
+def sparse_row_top_k(matrix, k: int, chunk_rows: int = 50000) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    CSR matrisin her satırındaki en yüksek k pozitif değeri yalnızca dolu
+    hücreler üzerinden seçer (skor azalan, eşitlikte sütun artan).
+
+    Satırlar parça parça işlenir; her parçada dolu hücreler tek lexsort ile
+    (satır, -skor, sütun) sırasına dizilir ve satır içi sırası k'dan küçük
+    olanlar tutulur. Maliyet satır x sütun değil dolu hücre sayısına bağlıdır.
+
+    Returns:
+        (offsets, columns, scores): i. satırın sonuçları
+        columns[offsets[i]:offsets[i + 1]] aralığındadır
+    """
+    matrix = matrix.tocsr()
+    n_rows = matrix.shape[0]
+    counts = np.zeros(n_rows, dtype=np.int64)
+    columns, scores = [], []
+
+    for start in range(0, n_rows, chunk_rows):
+        end = min(start + chunk_rows, n_rows)
+        low, high = matrix.indptr[start], matrix.indptr[end]
+        data = matrix.data[low:high]
+        indices = matrix.indices[low:high]
+        rows = np.repeat(np.arange(end - start), np.diff(matrix.indptr[start:end + 1]))
+
+        positive = data > 0
+        data, indices, rows = data[positive], indices[positive], rows[positive]
+        order = np.lexsort((indices, -data, rows))
+        rows = rows[order]
+
+        # Satır içi sıra: sıralı dizideki konum - satırın ilk konumu
+        row_counts = np.bincount(rows, minlength=end - start)
+        row_starts = np.cumsum(row_counts) - row_counts
+        keep = np.arange(len(order)) - row_starts[rows] < k
+
+        columns.append(indices[order][keep])
+        scores.append(data[order][keep])
+        counts[start:end] = np.minimum(row_counts, k)
+
+    offsets = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    if not columns:
+        return offsets, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    return offsets, np.concatenate(columns), np.concatenate(scores)
+
+
+class RankedCandidates:
+    """
+    Aday satırlarını skora göre azalan sırada, ihtiyaç oldukça sıralayarak üretir.
+
+    Tüm adaylar baştan sıralanmaz; her adımda kalan adaylar üzerinde argpartition
+    ile bir sonraki parti seçilir ve parti boyutu ikiye katlanır. Sıralanan önek
+    saklanır, böylece aynı nesne üzerinde tekrar yapılan geçişler yeniden
+    hesaplama yapmaz.
+    """
+
+    def __init__(self, rows: np.ndarray, scores: np.ndarray, batch_size: int = 64):
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.scores = np.asarray(scores, dtype=np.float64)
+        self.batch_size = max(1, batch_size)
+        self._order = np.empty(0, dtype=np.int64)
+        self._remaining = np.arange(len(self.rows))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _extend(self):
+        """Kalan adaylardan bir sonraki partiyi sıralı öneke ekler"""
+        size = max(self.batch_size, len(self._order))
+        picked = self._remaining[_top_positions(self.scores[self._remaining], size)]
+
+        mask = np.ones(len(self.scores), dtype=bool)
+        mask[self._order] = False
+        mask[picked] = False
+        self._order = np.concatenate([self._order, picked])
+        self._remaining = np.flatnonzero(mask)
+
+    def __iter__(self) -> Iterator[Tuple[int, float]]:
+        position = 0
+        while True:
+            if position >= len(self._order):
+                if not len(self._remaining):
+                    return
+                self._extend()
+            candidate = self._order[position]
+            yield int(self.rows[candidate]), float(self.scores[candidate])
+            position += 1
+
+
+def diversified_top_k(ranked, cluster_ids: np.ndarray, k: int,
+                      max_per_cluster: int) -> Tuple[List[Tuple[int, float]], List[Tuple[int, float]]]:
+    """
+    Sıralı adaylardan küme başına limit uygulayarak en iyi k satırı seçer.
+
+    Adaylar akış halinde çekilir; k seçim yapıldığında durulur. Adaylar tükenir
+    ve k dolmazsa, limit nedeniyle atlanan adaylar (zaten skor sırasında) ile
+    tamamlanır.
+
+    Returns:
+        (seçilenler, tamamlayıcılar) - her biri (satır, skor) listesi
+    """
+    picked = []
+    skipped = []
+    cluster_counts: Dict[int, int] = {}
+    if k <= 0:
+        return picked, skipped
+
+    for row, score in ranked:
+        cluster_id = int(cluster_ids[row])
+
+        # Küme limiti kontrolü
+        if cluster_id != -1:
+            if cluster_counts.get(cluster_id, 0) >= max_per_cluster:
+                skipped.append((row, score))
+                continue
+            cluster_counts[cluster_id] = cluster_counts.get(cluster_id, 0) + 1
+
+        picked.append((row, score))
+        if len(picked) >= k:
+            return picked, []
+
+    return picked, skipped[:k - len(picked)]
+
+
+def paged_diversified_top_k(ranked, cluster_ids: np.ndarray, k: int, page_size: int,
+                            max_per_cluster: int) -> List[Tuple[int, float]]:
+    """
+    Sıralı adaylardan k satırlık bir liste oluşturur; küme limiti listenin
+    tamamına değil her page_size'lık sayfaya ayrı ayrı uygulanır.
+
+    Bir sayfada limit nedeniyle atlanan adaylar sıralarını koruyarak sonraki
+    sayfanın başında yeniden denenir. Adaylar tükenir ve sayfa dolmazsa sayfa
+    atlananlarla tamamlanır. page_size >= k ise sonuç diversified_top_k'nın
+    seçilenler + tamamlayıcılar listesiyle aynıdır.
+    """
+    results: List[Tuple[int, float]] = []
+    if k <= 0 or page_size <= 0:
+        return results
+
+    stream = iter(ranked)
+    deferred = deque()
+    while len(results) < k:
+        size = min(page_size, k - len(results))
+        page, skipped = [], []
+        cluster_counts: Dict[int, int] = {}
+        while len(page) < size:
+            if deferred:
+                row, score = deferred.popleft()
+            else:
+                candidate = next(stream, None)
+                if candidate is None:
+                    break
+                row, score = candidate
+
+            cluster_id = int(cluster_ids[row])
+            if cluster_id != -1:
+                if cluster_counts.get(cluster_id, 0) >= max_per_cluster:
+                    skipped.append((row, score))
+                    continue
+                cluster_counts[cluster_id] = cluster_counts.get(cluster_id, 0) + 1
+            page.append((row, score))
+
+        if len(page) < size:
+            # Adaylar tükendi: sayfayı atlananlarla tamamla
+            fill = size - len(page)
+            page.extend(skipped[:fill])
+            skipped = skipped[fill:]
+        results.extend(page)
+        if len(page) < size:
+            break
+        # Atlananlar, henüz denenmemiş ertelenenlerden önce gelir (skor sırası)
+        deferred.extendleft(reversed(skipped))
+
+    return results
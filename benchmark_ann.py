@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+/similar-posts için kesin kosinüs araması ile LSH (yaklaşık) aramanın
+recall@k ve gecikme karşılaştırması - sentetik etiket korpusu üzerinde
+"""
+import argparse
+import time
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfTransformer
+
+from app.ann import LSHIndex
+from app.topk import top_k_indices
+
+
+def build_synthetic_corpus(n_posts: int, n_tags: int, seed: int = 0):
+    """Zipf dağılımlı etiketlerle (post başına 2-8 etiket) TF-IDF matrisi üretir"""
+    rng = np.random.default_rng(seed)
+    tags_per_post = rng.integers(2, 9, size=n_posts)
+    rows = np.repeat(np.arange(n_posts), tags_per_post)
+
+    # Az sayıda popüler etiket, uzun kuyrukta nadir etiketler
+    ranks = np.arange(1, n_tags + 1, dtype=np.float64)
+    probabilities = 1.0 / ranks ** 1.1
+    probabilities /= probabilities.sum()
+    cols = rng.choice(n_tags, size=len(rows), p=probabilities)
+
+    counts = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float64), (rows, cols)),
+        shape=(n_posts, n_tags)
+    )
+    return TfidfTransformer().fit_transform(counts).tocsr()
+
+
+def exact_top_k(X, row: int, k: int):
+    """Tüm korpusa karşı kesin kosinüs (satırlar L2 normalize)"""
+    similarities = np.asarray((X @ X[row].T).todense()).ravel()
+    best = top_k_indices(similarities, k, exclude=row)
+    return best, similarities[best]
+
+
+def recall_at_k(exact_scores: np.ndarray, approx_scores: np.ndarray) -> float:
+    """
+    Skor bazlı recall@k: yaklaşık sonuçlardan kesin k. skora ulaşanların oranı.
+    Etiket korpuslarında çok sayıda eşit skor olduğundan id bazlı karşılaştırma yerine kullanılır.
+    """
+    if not len(exact_scores):
+        return 1.0
+    threshold = exact_scores[-1] - 1e-9
+    return min(1.0, np.sum(approx_scores >= threshold) / len(exact_scores))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LSH benzer post araması benchmark'ı")
+    parser.add_argument("--posts", type=int, default=1_000_000, help="Sentetik post sayısı")
+    parser.add_argument("--tags", type=int, default=20_000, help="Etiket sözlüğü boyutu")
+    parser.add_argument("--queries", type=int, default=200, help="Sorgu sayısı")
+    parser.add_argument("--k", type=int, default=10, help="Döndürülecek benzer post sayısı")
+    args = parser.parse_args()
+
+    print(f"📊 {args.posts:,} post / {args.tags:,} etiketlik sentetik korpus oluşturuluyor...")
+    X = build_synthetic_corpus(args.posts, args.tags)
+    query_rows = np.random.default_rng(1).choice(args.posts, size=args.queries, replace=False)
+
+    # Kesin arama referansı
+    start = time.perf_counter()
+    exact = [exact_top_k(X, row, args.k) for row in query_rows]
+    exact_ms = (time.perf_counter() - start) / args.queries * 1000
+    print(f"🎯 Kesin arama: {exact_ms:.2f} ms/sorgu")
+
+    print("-" * 72)
+    print(f"{'n_bits':>6} {'n_tables':>8} {'probe':>5} {'fit (s)':>9} {'ms/sorgu':>9} {'recall@k':>9} {'hız':>7}")
+    print("-" * 72)
+
+    for n_bits, n_tables, probe in [(12, 8, 1), (12, 32, 1), (14, 32, 1), (14, 48, 1), (14, 64, 1), (16, 64, 1)]:
+        index = LSHIndex(n_bits=n_bits, n_tables=n_tables, probe=probe)
+        start = time.perf_counter()
+        index.fit(X)
+        fit_seconds = time.perf_counter() - start
+
+        recalls = []
+        start = time.perf_counter()
+        approx = [index.query(row, args.k) for row in query_rows]
+        approx_ms = (time.perf_counter() - start) / args.queries * 1000
+
+        for (_, exact_scores), (_, approx_scores) in zip(exact, approx):
+            recalls.append(recall_at_k(exact_scores, approx_scores))
+
+        print(f"{n_bits:>6} {n_tables:>8} {probe:>5} {fit_seconds:>9.2f} {approx_ms:>9.2f} "
+              f"{np.mean(recalls):>9.3f} {exact_ms / approx_ms:>6.1f}x")
+
+    print("-" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Tam eğitim veri yüklemesi için fetch_all (satır nesneleri) ile asyncpg ikili COPY
+yolunun karşılaştırması - yerel PostgreSQL'de sentetik verilerle.
+
+Veriler .env'deki veritabanında ayrı bir şemaya (varsayılan: copy_bench) yazılır,
+gerçek tablolara dokunulmaz. Ölçümden sonra şema --keep verilmedikçe silinir.
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+from app.db import database
+from app.post_loader import POST_COLUMNS, decode_tags
+from app.post_store import PostStore
+from app.copy_loader import copy_post_store, copy_interactions, copy_user_tag_interactions
+
+WORDS = ("yapay zeka makine öğrenmesi veri futbol maç müzik sanat bilim uzay seyahat yemek "
+         "learning python code game music art design science travel food market").split()
+TAGS = [f"etiket{i}" for i in range(2000)]
+
+
+def synthetic_posts(n_posts: int, rng: np.random.Generator):
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for post_id in range(1, n_posts + 1):
+        words = rng.choice(WORDS, size=int(rng.integers(10, 60)))
+        tags = rng.choice(TAGS, size=int(rng.integers(1, 6)), replace=False).tolist()
+        yield (
+            post_id, int(rng.integers(1, 10000)), " ".join(words[:5]), " ".join(words), None,
+            base + timedelta(minutes=post_id), None,
+            int(rng.integers(0, 500)), int(rng.integers(0, 100)), int(rng.integers(0, 50)),
+            int(rng.integers(0, 5000)), "public", json.dumps(tags), True, False,
+            int(rng.integers(1, 50)) if post_id % 3 else None
+        )
+
+
+async def seed(raw, schema: str, n_posts: int, n_interactions: int):
+    """Şemayı oluşturup sentetik verileri COPY ile yazar"""
+    rng = np.random.default_rng(0)
+    await raw.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+    await raw.execute(f"CREATE SCHEMA {schema}")
+    await raw.execute(f"""
+        CREATE TABLE {schema}.posts (
+            id BIGINT PRIMARY KEY, user_id BIGINT, title TEXT, content TEXT, media_url TEXT,
+            created_at TIMESTAMPTZ, updated_at TIMESTAMPTZ, likes_count INT, comments_count INT,
+            shares_count INT, views_count INT, visibility TEXT, tags JSONB,
+            allow_comments BOOLEAN, is_pinned BOOLEAN, community_id INT
+        )
+    """)
+    await raw.execute(f"CREATE TABLE {schema}.likes (user_id BIGINT, post_id BIGINT, liked_at TIMESTAMPTZ)")
+    await raw.execute(f"CREATE TABLE {schema}.comments (user_id BIGINT, post_id BIGINT, created_at TIMESTAMPTZ)")
+    await raw.execute(f"""
+        CREATE TABLE {schema}.user_tag_interactions (
+            id BIGSERIAL PRIMARY KEY, user_id BIGINT, tag TEXT, interaction_type TEXT,
+            interaction_count INT, last_interacted_at TIMESTAMPTZ
+        )
+    """)
+
+    await raw.copy_records_to_table("posts", schema_name=schema, columns=list(POST_COLUMNS),
+                                    records=synthetic_posts(n_posts, rng))
+
+    base = datetime(2024, 6, 1, tzinfo=timezone.utc)
+    for table, time_column in (("likes", "liked_at"), ("comments", "created_at")):
+        records = zip(rng.integers(1, 10000, n_interactions).tolist(),
+                      rng.integers(1, n_posts + 1, n_interactions).tolist(),
+                      (base + timedelta(seconds=int(s)) for s in rng.integers(0, 10**7, n_interactions)))
+        await raw.copy_records_to_table(table, schema_name=schema,
+                                        columns=["user_id", "post_id", time_column], records=records)
+
+    types = ["view", "like", "comment", "share"]
+    records = zip(rng.integers(1, 10000, n_interactions).tolist(),
+                  rng.choice(TAGS, n_interactions).tolist(),
+                  rng.choice(types, n_interactions).tolist(),
+                  rng.integers(1, 20, n_interactions).tolist(),
+                  (base + timedelta(seconds=int(s)) for s in rng.integers(0, 10**7, n_interactions)))
+    await raw.copy_records_to_table(
+        "user_tag_interactions", schema_name=schema,
+        columns=["user_id", "tag", "interaction_type", "interaction_count", "last_interacted_at"],
+        records=records
+    )
+    await raw.execute(f"ANALYZE {schema}.posts")
+
+
+async def fetch_all_posts(schema: str) -> PostStore:
+    """Önceki yol: fetch_all + dict + satır satır etiket çözme + PostStore"""
+    rows = await database.fetch_all(
+        f"SELECT {', '.join(POST_COLUMNS)} FROM {schema}.posts ORDER BY created_at DESC, id DESC"
+    )
+    posts = [dict(row) for row in rows]
+    for post in posts:
+        if isinstance(post.get("tags"), str):
+            try:
+                post["tags"] = json.loads(post["tags"])
+            except ValueError:
+                post["tags"] = []
+    return PostStore(posts)
+
+
+async def timed(label: str, coro_factory, repeats: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = await coro_factory()
+        best = min(best, time.perf_counter() - start)
+    return label, best, result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="fetch_all / ikili COPY yükleme benchmark'ı")
+    parser.add_argument("--posts", type=int, default=200_000, help="Sentetik post sayısı")
+    parser.add_argument("--interactions", type=int, default=1_000_000, help="Tablo başına etkileşim sayısı")
+    parser.add_argument("--schema", default="copy_bench", help="Benchmark şeması")
+    parser.add_argument("--repeats", type=int, default=3, help="Ölçüm tekrarı (en iyisi raporlanır)")
+    parser.add_argument("--keep", action="store_true", help="Şemayı silme")
+    args = parser.parse_args()
+    schema = args.schema
+
+    await database.connect()
+    try:
+        async with database.connection() as connection:
+            print(f"🌱 {args.posts:,} post / {args.interactions:,} etkileşim {schema} şemasına yazılıyor...")
+            await seed(connection.raw_connection, schema, args.posts, args.interactions)
+
+        cases = [
+            ("posts", lambda: fetch_all_posts(schema),
+             lambda: copy_post_store(f"{schema}.posts")),
+            ("Likes", lambda: database.fetch_all(f"SELECT user_id, post_id, liked_at FROM {schema}.likes"),
+             lambda: copy_interactions("like", f"{schema}.likes")),
+            ("Comments", lambda: database.fetch_all(f"SELECT user_id, post_id, created_at FROM {schema}.comments"),
+             lambda: copy_interactions("comment", f"{schema}.comments")),
+            ("user_tag_interactions",
+             lambda: database.fetch_all(f"SELECT * FROM {schema}.user_tag_interactions ORDER BY id"),
+             lambda: copy_user_tag_interactions(f"{schema}.user_tag_interactions")),
+        ]
+
+        print("-" * 64)
+        print(f"{'tablo':<24} {'fetch_all (s)':>13} {'COPY (s)':>10} {'hız':>8}")
+        print("-" * 64)
+        for table, fetch_factory, copy_factory in cases:
+            _, fetch_seconds, _ = await timed(table, fetch_factory, args.repeats)
+            _, copy_seconds, _ = await timed(table, copy_factory, args.repeats)
+            print(f"{table:<24} {fetch_seconds:>13.3f} {copy_seconds:>10.3f} {fetch_seconds / copy_seconds:>7.1f}x")
+        print("-" * 64)
+
+        # İki yolun aynı postları ürettiğini doğrula
+        expected = await fetch_all_posts(schema)
+        actual = await copy_post_store(f"{schema}.posts")
+        assert np.array_equal(expected.ids, actual.ids)
+        assert [post["tags"] for post in expected.posts] == [post["tags"] for post in actual.posts]
+        # Zaman damgaları iki yolda da timezone'lu ve aynı olmalı
+        for field in ("created_at", "updated_at"):
+            assert [post[field] for post in expected.posts] == [post[field] for post in actual.posts]
+        assert np.array_equal(expected.created_at, actual.created_at)
+        print("✅ fetch_all ve COPY yolları aynı postları üretti")
+    finally:
+        if not args.keep:
+            await database.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+İçerik analizi ön işlemesi için eski clean_text (derlenmemiş re.sub, başlık 3x
+temizlenir) ile TextPipeline'ın (ön derlenmiş kalıplar, süreç havuzu)
+karşılaştırması - sentetik Türkçe/İngilizce korpus üzerinde.
+
+Tüm varyantların çıktıları eski yolla birebir karşılaştırılır.
+"""
+import argparse
+import re
+import time
+import numpy as np
+
+from app.text_pipeline import TextPipeline
+
+WORDS = ("yapay zeka makine öğrenmesi veri futbol maç müzik sanat bilim uzay seyahat yemek "
+         "şehir İstanbul Ankara ÇALIŞMA güzel büyük öğrenci ışık dağ "
+         "learning python code game music art design science travel food market The AND").split()
+NOISE = ["https://example.com/yazi?id=42&ref=feed", "http://t.co/AbC123", "@kullanici", "#gündem",
+         "!!!", "...", "(bkz: veri)", "%50", "—", "😀", "e-posta:", "3.14", "C++", "a/b"]
+
+
+def synthetic_posts(n_posts: int, seed: int = 0):
+    """Başlık ve içeriği kelime, URL, mention ve noktalama karışımı postlar"""
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array(WORDS + NOISE, dtype=object)
+    probabilities = np.r_[np.full(len(WORDS), 0.9 / len(WORDS)), np.full(len(NOISE), 0.1 / len(NOISE))]
+    posts = []
+    for post_id in range(1, n_posts + 1):
+        title = " ".join(rng.choice(vocabulary, size=int(rng.integers(3, 12)), p=probabilities))
+        content = " ".join(rng.choice(vocabulary, size=int(rng.integers(20, 200)), p=probabilities))
+        posts.append({
+            'id': post_id,
+            'title': title if post_id % 50 else None,
+            'content': content if post_id % 40 else ''
+        })
+    return posts
+
+
+def legacy_clean_text(text: str) -> str:
+    """SmartContentAnalyzer.clean_text'in önceki hali (referans)"""
+    if not text:
+        return ""
+    text = text.lower()
+    text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
+    text = re.sub(r'[@#]\w+', '', text)
+    text = re.sub(r'[^\w\sçğıöşüÇĞIİÖŞÜ]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def legacy_documents(posts):
+    documents = []
+    for post in posts:
+        title = post.get('title', '') or ''
+        content = post.get('content', '') or ''
+        documents.append(legacy_clean_text(f"{title} {title} {title} {content}"))
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metin ön işleme hattı benchmark'ı")
+    parser.add_argument("--posts", type=int, default=200_000, help="Sentetik post sayısı")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Denenecek worker sayıları")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Worker'a gönderilen parça boyutu")
+    args = parser.parse_args()
+
+    print(f"📊 {args.posts:,} postluk sentetik korpus oluşturuluyor...")
+    posts = synthetic_posts(args.posts)
+
+    start = time.perf_counter()
+    reference = legacy_documents(posts)
+    legacy_seconds = time.perf_counter() - start
+    print(f"🐢 Eski clean_text: {legacy_seconds:.2f} s")
+
+    print("-" * 56)
+    print(f"{'workers':>7} {'süre (s)':>9} {'doküman/s':>12} {'hız':>7} {'aynı':>6}")
+    print("-" * 56)
+    for workers in args.workers:
+        with TextPipeline(workers=workers, chunk_size=args.chunk_size, min_parallel=0) as pipeline:
+            if workers > 1:
+                # Havuz açılışını ölçüme katma
+                list(pipeline.post_documents(posts[:workers]))
+            start = time.perf_counter()
+            documents = list(pipeline.post_documents(posts))
+            seconds = time.perf_counter() - start
+        print(f"{workers:>7} {seconds:>9.2f} {args.posts / seconds:>12,.0f} "
+              f"{legacy_seconds / seconds:>6.1f}x {str(documents == reference):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ import numpy as np
 import json
 import os
 from app.db import database
+from app.post_loader import load_posts, TAG_COLUMNS
 from app.features import TagFeatureExtractor
 
 async def extract_tag_features():
@@ -14,11 +15,7 @@ async def extract_tag_features():
         print("Veritabanı bağlantısı başarılı!")
 
         # Posts tablosundaki tüm verileri çek
-        query = "SELECT id, title, tags FROM posts"
-        results = await database.fetch_all(query)
-        
-        # Dict listesine dönüştür
-        posts = [dict(row) for row in results]
+        posts = await load_posts(TAG_COLUMNS, order_by=None)
         print(f"Toplam {len(posts)} gönderi bulundu.")
         
         # Etiket vektörlerini oluştur - TF-IDF ile
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+ChangeListener'ın yerel PostgreSQL'e karşı uçtan uca denemesi.
+
+.env'deki veritabanında ayrı bir şema (varsayılan: listener_test) oluşturulur,
+tetikleyiciler bu şemadaki tablolara kurulur ve eklenen satırların bildirimlerinin
+kayıt tutan sahte bir öneri modeline ulaştığı doğrulanır. Şema --keep verilmedikçe silinir.
+"""
+import argparse
+import asyncio
+import json
+import asyncpg
+
+from app.change_listener import ChangeListener, install_triggers, _dsn
+
+
+class RecordingRecommender:
+    """ChangeListener'ın çağırdığı metotları kaydeden sahte model"""
+    INTERACTION_COUNTERS = {'like': 'likes_count', 'comment': 'comments_count'}
+
+    def __init__(self):
+        self.feature_matrix = object()
+        self.interactions = []
+        self.counters = []
+        self.ingests = 0
+        self.dropped = []
+
+    def update_user_interactions(self, user_id, post_id, interaction_type, weight=1.0):
+        self.interactions.append((user_id, post_id, interaction_type))
+
+    def update_post_counters(self, post_id, deltas):
+        self.counters.append((post_id, deltas))
+
+    async def ingest_new_posts(self):
+        self.ingests += 1
+        return {'fetched': 1, 'added': 1, 'refreshed': 0}
+
+    def drop_user_profile(self, user_id):
+        self.dropped.append(user_id)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="LISTEN/NOTIFY değişiklik dinleyicisi testi")
+    parser.add_argument("--schema", default="listener_test", help="Test şeması")
+    parser.add_argument("--keep", action="store_true", help="Şemayı silme")
+    args = parser.parse_args()
+    schema = args.schema
+
+    connection = await asyncpg.connect(_dsn())
+    recommender = RecordingRecommender()
+    listener = ChangeListener(recommender, debounce=0.2)
+    try:
+        await connection.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        await connection.execute(f"CREATE SCHEMA {schema}")
+        await connection.execute(f"""
+            CREATE TABLE {schema}.posts (id BIGSERIAL PRIMARY KEY, user_id BIGINT, title TEXT,
+                                         content TEXT, tags JSONB, created_at TIMESTAMPTZ DEFAULT now(),
+                                         updated_at TIMESTAMPTZ)
+        """)
+        await connection.execute(f"CREATE TABLE {schema}.likes (user_id BIGINT, post_id BIGINT, liked_at TIMESTAMPTZ DEFAULT now())")
+        await connection.execute(f"CREATE TABLE {schema}.comments (id BIGSERIAL PRIMARY KEY, user_id BIGINT, post_id BIGINT, content TEXT, created_at TIMESTAMPTZ DEFAULT now())")
+        await connection.execute(f"""
+            CREATE TABLE {schema}.user_tag_interactions (id BIGSERIAL PRIMARY KEY, user_id BIGINT, tag TEXT,
+                                                         interaction_type TEXT, interaction_count INT,
+                                                         last_interacted_at TIMESTAMPTZ)
+        """)
+        await install_triggers(connection, schema)
+        print(f"✅ {schema} şeması ve tetikleyiciler hazır")
+
+        listener.start()
+        await asyncio.sleep(1.0)
+
+        await connection.execute(f"INSERT INTO {schema}.posts (user_id, title, content, tags) VALUES (1, 'yeni', 'içerik', $1)",
+                                 json.dumps(["ai"]))
+        await connection.execute(f"INSERT INTO {schema}.likes (user_id, post_id) VALUES (7, 1)")
+        await connection.execute(f"INSERT INTO {schema}.comments (user_id, post_id, content) VALUES (8, 1, 'güzel')")
+        await connection.execute(
+            f"INSERT INTO {schema}.user_tag_interactions (user_id, tag, interaction_type, interaction_count, last_interacted_at) "
+            f"VALUES (9, 'ai', 'like', 1, now())"
+        )
+        await asyncio.sleep(1.5)
+
+        assert recommender.interactions == [(7, 1, 'like'), (8, 1, 'comment')], recommender.interactions
+        assert recommender.counters == [(1, {'likes_count': 1}), (1, {'comments_count': 1})], recommender.counters
+        assert recommender.ingests >= 2, recommender.ingests  # bağlantıda bir kez + yeni post
+        assert recommender.dropped == [9], recommender.dropped
+        print(f"📊 {listener.stats()}")
+        print("✅ Tüm bildirimler öneri modeline ulaştı")
+    finally:
+        await listener.stop()
+        if not args.keep:
+            await connection.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        await connection.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Sayfalı feed'in (pin_feed / get_feed_page) veritabanı gerektirmeyen denemesi.
+
+İlk istek yalnızca FEED_PIN_PAGES sayfa sıralamalı; imleç sabit sıralamanın
+sonuna geldikçe sıralama uzatılmalı, önceki sayfalar değişmemeli, hiçbir post
+iki kez dönmemeli ve toplam uzunluk FEED_PIN_SIZE'ı aşmamalıdır.
+"""
+import argparse
+import asyncio
+
+from test_similar_posts import OfflineRecommender, synthetic_posts
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Sayfalı feed testi")
+    parser.add_argument("--posts", type=int, default=800, help="Sentetik post sayısı")
+    parser.add_argument("--limit", type=int, default=30, help="Sayfa boyutu")
+    args = parser.parse_args()
+
+    recommender = OfflineRecommender()
+    await recommender.fit(synthetic_posts(args.posts))
+
+    # Sıralama isteklerinin boyutlarını say
+    requested = []
+    rank_feed = recommender.rank_feed
+
+    async def counting_rank_feed(user_id, top_n):
+        requested.append(top_n)
+        return await rank_feed(user_id, top_n)
+    recommender.rank_feed = counting_rank_feed
+
+    top_n = recommender.feed_pin_length(args.limit)
+    ranking = await recommender.rank_feed(1, top_n)
+    assert top_n == args.limit * recommender.FEED_PIN_PAGES, f"İlk istekte {top_n} post sıralandı"
+
+    page, cursor = recommender.pin_feed(1, ranking, args.limit, exhausted=len(ranking) < top_n)
+    pages = [[post['id'] for post in page]]
+    while cursor:
+        page, cursor = await recommender.get_feed_page(1, cursor, args.limit)
+        pages.append([post['id'] for post in page])
+
+    post_ids = [post_id for page in pages for post_id in page]
+    assert len(post_ids) == len(set(post_ids)), "Aynı post birden fazla sayfada döndü"
+    assert len(post_ids) <= recommender.FEED_PIN_SIZE, f"{len(post_ids)} post sabitlendi"
+    assert all(len(page) == args.limit for page in pages[:-1]), "Ara sayfalardan biri eksik döndü"
+    assert requested == sorted(requested) and max(requested) <= recommender.FEED_PIN_SIZE, \
+        f"Sıralama boyutları {requested}"
+
+    print(f"✅ {len(pages)} sayfada {len(post_ids)} post, sıralama boyutları {requested}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+EnhancedRecommender.ingest_interactions'ın veritabanı gerektirmeyen denemesi.
+
+Aynı etkileşimler bir modele toplu (ingest_interactions), diğerine tek tek
+(update_user_interactions) eklenir; profil birikimleri, küme histogramları ve
+profil sözlükleri aynı olmalıdır. Bazı kullanıcılara önceden
+user_tag_interactions biçiminde profil verilir; etkileşimler bu profillerin
+üzerine eklenmeli, onları silmemelidir.
+"""
+import argparse
+import asyncio
+import random
+import numpy as np
+
+from app.enhanced_recommender import INTERACTION_WEIGHTS
+from test_similar_posts import OfflineRecommender, synthetic_posts
+
+
+def db_profile(rng: random.Random, tags):
+    """load_user_profiles_from_db biçiminde bir profil"""
+    scores = {tag: float(rng.randint(1, 20)) for tag in rng.sample(tags, 3)}
+    summary = {'like': rng.randint(1, 5), 'view': rng.randint(1, 10)}
+    return {
+        'tag_preferences': scores,
+        'tag_scores': scores,
+        'interaction_summary': summary,
+        'total_interactions': sum(summary.values())
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Toplu etkileşim yükleme testi")
+    parser.add_argument("--posts", type=int, default=400, help="Sentetik post sayısı")
+    parser.add_argument("--users", type=int, default=40, help="Kullanıcı sayısı")
+    parser.add_argument("--events", type=int, default=2000, help="Etkileşim sayısı")
+    args = parser.parse_args()
+
+    posts = synthetic_posts(args.posts)
+    bulk, single = OfflineRecommender(), OfflineRecommender()
+    await bulk.fit(posts)
+    await single.fit(posts)
+
+    rng = random.Random(1)
+    tags = sorted(bulk.scoring_engine.tag_index)
+    stored = {user_id: db_profile(rng, tags) for user_id in range(1, args.users + 1, 3)}
+    for recommender in (bulk, single):
+        for user_id, profile in stored.items():
+            recommender.user_profiles[user_id] = {key: (dict(value) if isinstance(value, dict) else value)
+                                                  for key, value in profile.items()}
+
+    # Bilinmeyen post id'leri de karışsın
+    user_ids = [rng.randint(1, args.users) for _ in range(args.events)]
+    post_ids = [rng.randint(1, args.posts + 20) for _ in range(args.events)]
+    types = [rng.choice(list(INTERACTION_WEIGHTS)) for _ in range(args.events)]
+
+    # Bir kullanıcının histogramı önceden oluşturulmuş olsun
+    for recommender in (bulk, single):
+        recommender.update_user_interactions(2, 1, 'like')
+        recommender._user_cluster_interactions(2)
+
+    added = sum(bulk.ingest_interactions(np.array(user_ids[i::2]), np.array(post_ids[i::2]), types[i::2])
+                for i in range(2))
+    assert added == args.events, f"{added} etkileşim eklendi"
+    for user_id, post_id, interaction_type in zip(user_ids[0::2] + user_ids[1::2],
+                                                  post_ids[0::2] + post_ids[1::2],
+                                                  types[0::2] + types[1::2]):
+        single.update_user_interactions(user_id, post_id, interaction_type, INTERACTION_WEIGHTS[interaction_type])
+
+    for user_id in range(1, args.users + 1):
+        a, b = bulk._interaction_profile(user_id), single._interaction_profile(user_id)
+        assert a.tag_weights.keys() == b.tag_weights.keys(), f"Kullanıcı {user_id}: etiketler farklı"
+        assert all(np.isclose(a.tag_weights[tag], b.tag_weights[tag]) for tag in a.tag_weights), \
+            f"Kullanıcı {user_id}: etiket ağırlıkları farklı"
+        assert a.cluster_weights.keys() == b.cluster_weights.keys() and \
+            all(np.isclose(a.cluster_weights[c], b.cluster_weights[c]) for c in a.cluster_weights), \
+            f"Kullanıcı {user_id}: küme ağırlıkları farklı"
+        assert np.isclose(a.total_weight, b.total_weight), f"Kullanıcı {user_id}: toplam ağırlık farklı"
+        assert a.interaction_counts == b.interaction_counts, f"Kullanıcı {user_id}: tür sayaçları farklı"
+        assert a.n_interactions == b.n_interactions, f"Kullanıcı {user_id}: etkileşim sayısı farklı"
+        assert np.array_equal(bulk._user_cluster_interactions(user_id), single._user_cluster_interactions(user_id)), \
+            f"Kullanıcı {user_id}: küme histogramları farklı"
+        assert bulk.user_profiles[user_id]['total_interactions'] == a.n_interactions
+
+    # Veritabanı profilleri korunmuş olmalı
+    for user_id, profile in stored.items():
+        merged = bulk._interaction_profile(user_id)
+        for tag, score in profile['tag_scores'].items():
+            assert merged.tag_weights[tag] >= score, f"Kullanıcı {user_id}: '{tag}' skoru silindi"
+        for interaction_type, n in profile['interaction_summary'].items():
+            assert merged.interaction_counts[interaction_type] >= n, \
+                f"Kullanıcı {user_id}: '{interaction_type}' sayacı silindi"
+        assert merged.n_interactions == profile['total_interactions'] + len(bulk.user_interactions[user_id])
+
+    print(f"✅ {args.events} etkileşimde toplu ve tek tek yükleme aynı profilleri üretti")
+    print(f"✅ {len(stored)} kullanıcının veritabanı profili korunarak birleştirildi")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+EnhancedRecommender._get_diversified_popular_posts'un çoğu postun sayaçları sıfır
+olan bir korpusta veritabanı gerektirmeyen denemesi.
+
+Popülerlik sırasının öneki, dışında yalnızca sıfır skorlu postlar kaldığında
+büyütülmemeli; sayaçları olan postlar sıfır skorlulardan önce gelmeli ve
+tüm postlar sıfır skorlu olsa da top_n post dönmelidir.
+"""
+import argparse
+import asyncio
+
+from test_similar_posts import OfflineRecommender, synthetic_posts
+
+COUNTERS = ('likes_count', 'comments_count', 'shares_count', 'views_count')
+
+
+def popular_prefixes(recommender: OfflineRecommender, top_n: int):
+    """Popüler postları ve popülerlik indeksinden istenen önek boyutlarını döndürür"""
+    index = recommender.popularity_index
+    prefixes = []
+    top = index.top
+    index.top = lambda k: prefixes.append(k) or top(k)
+    try:
+        return recommender._get_diversified_popular_posts(top_n), prefixes
+    finally:
+        index.top = top
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Sıfır sayaçlı popüler post testi")
+    parser.add_argument("--posts", type=int, default=5000, help="Sentetik post sayısı")
+    parser.add_argument("--popular", type=int, default=30, help="Sayaçları sıfır olmayan post sayısı")
+    parser.add_argument("--limit", type=int, default=20, help="İstenen popüler post sayısı")
+    args = parser.parse_args()
+
+    posts = synthetic_posts(args.posts)
+    for post in posts[args.popular:]:
+        for counter in COUNTERS:
+            post[counter] = 0
+
+    recommender = OfflineRecommender()
+    await recommender.fit(posts)
+
+    popular, prefixes = popular_prefixes(recommender, args.limit)
+    assert len(popular) == args.limit, f"{len(popular)} popüler post döndü"
+    assert max(prefixes) < args.posts, f"Önek tüm korpusa büyütüldü ({max(prefixes)})"
+    popular_ids = {post['id'] for post in posts[:args.popular]}
+    scored = [post['id'] in popular_ids for post in popular]
+    assert scored == sorted(scored, reverse=True), "Sıfır skorlu post sayaçlı posttan önce geldi"
+    print(f"✅ {args.posts - args.popular} sıfır sayaçlı postta önek {max(prefixes)} postta kaldı")
+
+    # Tüm sayaçlar sıfır
+    for post in posts:
+        for counter in COUNTERS:
+            post[counter] = 0
+    recommender = OfflineRecommender()
+    await recommender.fit(posts)
+
+    popular, prefixes = popular_prefixes(recommender, args.limit)
+    assert len(popular) == args.limit, f"{len(popular)} popüler post döndü"
+    assert max(prefixes) < args.posts, f"Önek tüm korpusa büyütüldü ({max(prefixes)})"
+    print(f"✅ Tüm sayaçlar sıfırken {len(popular)} post döndü (önek {max(prefixes)})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
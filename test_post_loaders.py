@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+POST_LOADER=copy ile fetch yolunun karışık kullanımının veritabanı gerektirmeyen
+denemesi.
+
+Model bir yükleyicinin postlarıyla eğitilir, ardından diğer yükleyiciden gelen
+postlar artımlı eklenir. Fetch yolu TIMESTAMP sütunlarında olduğu gibi
+timezone'suz datetime alsa da her iki yükleyici UTC timezone'lu datetime
+döndürmeli; watermark karşılaştırmaları hata vermemeli ve doğru ilerlemelidir.
+İkili COPY çıktısı testte üretilir, fetch satırları sahte bir database.iterate
+ile verilir.
+"""
+import argparse
+import asyncio
+import json
+import struct
+from datetime import datetime, timedelta, timezone
+
+from app import copy_loader, post_loader
+from app.copy_loader import (COPY_SIGNATURE, POST_FIXED_FIELDS, POST_TEXT_FIELDS,
+                             decode_copy_binary, copy_post_store)
+from test_similar_posts import OfflineRecommender, synthetic_posts
+
+PG_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_field(kind: str, value) -> bytes:
+    """Tek bir alanı ikili COPY biçiminde (uzunluk + veri) kodlar"""
+    if value is None:
+        return struct.pack('>i', -1)
+    if kind == 'int8':
+        data = struct.pack('>q', value)
+    elif kind == 'bool':
+        data = struct.pack('?', value)
+    elif kind == 'timestamptz':
+        data = struct.pack('>q', (value - PG_EPOCH) // timedelta(microseconds=1))
+    else:
+        data = str(value).encode('utf-8')
+    return struct.pack('>i', len(data)) + data
+
+
+def encode_copy_binary(rows, fields) -> bytes:
+    """Post satırlarını PostgreSQL ikili COPY çıktısı biçiminde kodlar"""
+    buffer = bytearray(COPY_SIGNATURE + struct.pack('>ii', 0, 0))
+    for row in rows:
+        buffer += struct.pack('>h', len(fields))
+        for name, kind, expression in fields:
+            value = row.get(name)
+            if value is None and expression.startswith('COALESCE('):
+                # Sorgudaki COALESCE(sütun, varsayılan) gibi
+                value = int(expression.split(', ')[1].split(')')[0])
+            buffer += encode_field(kind, value)
+    buffer += struct.pack('>h', -1)
+    return bytes(buffer)
+
+
+def table_rows(posts, offset: int = 0):
+    """Sentetik postları posts tablosu satırlarına çevirir (UTC zaman damgalarıyla)"""
+    rows = []
+    for post in posts:
+        row = dict(post, tags=json.dumps(post['tags']))
+        row['created_at'] = START + timedelta(hours=post['id'] + offset)
+        row['updated_at'] = None
+        row.update(media_url=None, visibility='public', allow_comments=True, is_pinned=False, community_id=None)
+        rows.append(row)
+    return rows
+
+
+class FetchDatabase:
+    """database.iterate'i TIMESTAMP sütunları gibi timezone'suz datetime döndürerek taklit eder"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.values = []
+
+    async def iterate(self, query, values=None):
+        self.values.append(values)
+        for row in self.rows:
+            row = dict(row)
+            for column in ('created_at', 'updated_at'):
+                if row[column] is not None:
+                    row[column] = row[column].astimezone(timezone.utc).replace(tzinfo=None)
+            yield row
+
+
+def use_copy_rows(rows):
+    """copy_post_columns'ı satırlardan üretilen ikili COPY çıktısını çözecek şekilde değiştirir"""
+    async def copy_post_columns(table="posts"):
+        columns = decode_copy_binary(encode_copy_binary(rows, POST_FIXED_FIELDS),
+                                     [(name, kind) for name, kind, _ in POST_FIXED_FIELDS])
+        columns.update(decode_copy_binary(encode_copy_binary(rows, POST_TEXT_FIELDS),
+                                          [(name, kind) for name, kind, _ in POST_TEXT_FIELDS]))
+        return columns
+    copy_loader.copy_post_columns = copy_post_columns
+
+
+def assert_utc(posts, source: str):
+    for post in posts:
+        stamp = post['created_at']
+        assert stamp.tzinfo is not None and stamp.utcoffset() == timedelta(0), \
+            f"{source}: post {post['id']} created_at UTC timezone'lu değil ({stamp!r})"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Karışık post yükleyici testi")
+    parser.add_argument("--posts", type=int, default=300, help="Sentetik post sayısı")
+    parser.add_argument("--new", type=int, default=20, help="Artımlı eklenen post sayısı")
+    args = parser.parse_args()
+
+    posts = synthetic_posts(args.posts + args.new)
+    rows = table_rows(posts)
+    old_rows, new_rows = rows[:args.posts], rows[args.posts:]
+    newest = max(row['created_at'] for row in rows)
+
+    # COPY ile eğit, fetch yoluyla artımlı ekle
+    use_copy_rows(old_rows)
+    store = await copy_post_store()
+    assert_utc(store.posts, "COPY")
+    recommender = OfflineRecommender()
+    await recommender.fit(store.posts, post_store=store)
+
+    post_loader.database = FetchDatabase(new_rows)
+    result = await recommender.ingest_new_posts()
+    assert result['added'] == args.new, f"{result['added']} post eklendi"
+    assert_utc(recommender.post_store.posts, "fetch")
+    assert recommender.ingest_watermark['created_at'] == newest, "created_at watermark'ı ilerlemedi"
+    sent = post_loader.database.values[0]['last_created_at']
+    assert sent.tzinfo is not None, "Watermark sorguya timezone'suz gönderildi"
+    print(f"✅ COPY ile eğitim + fetch ile {result['added']} post: watermark {newest.isoformat()}")
+
+    # Fetch ile eğit, COPY'den gelen postları ekle
+    post_loader.database = FetchDatabase(old_rows)
+    store = await post_loader.load_post_store()
+    assert_utc(store.posts, "fetch")
+    recommender = OfflineRecommender()
+    await recommender.fit(store.posts, post_store=store)
+
+    use_copy_rows(new_rows)
+    added = recommender.add_posts((await copy_post_store()).posts)
+    assert added == args.new, f"{added} post eklendi"
+    assert recommender.ingest_watermark['created_at'] == newest, "created_at watermark'ı ilerlemedi"
+    print(f"✅ fetch ile eğitim + COPY ile {added} post: watermark {newest.isoformat()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+EnhancedRecommender.get_similar_posts'un exact / approx modlarının veritabanı
+gerektirmeyen denemesi.
+
+Sentetik postlarla model eğitilir; içerik analizi yapılmış postlarda da
+mode=approx'un LSH indeksine ulaştığı, dönen skorların kesin kosinüs
+benzerliğiyle aynı olduğu ve mode=exact'in küme bazlı yolu kullandığı doğrulanır.
+"""
+import argparse
+import asyncio
+import random
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from app.enhanced_recommender import EnhancedRecommender
+
+WORDS = ("yapay zeka makine öğrenmesi veri futbol maç takım gol müzik sanat bilim uzay "
+         "seyahat yemek ekonomi borsa python code game music science travel").split()
+TAGS = "ai ml python football gaming music art science space travel food finance".split()
+
+
+class OfflineRecommender(EnhancedRecommender):
+    """Kullanıcı profillerini veritabanından yüklemeyen öneri modeli"""
+
+    async def load_user_profiles_from_db(self, user_id=None, user_ids=None):
+        return None
+
+
+def synthetic_posts(n_posts: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [{
+        'id': post_id,
+        'user_id': rng.randint(1, 50),
+        'title': " ".join(rng.choice(WORDS) for _ in range(4)),
+        'content': " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 40))),
+        'tags': rng.sample(TAGS, rng.randint(1, 4)),
+        'likes_count': rng.randint(0, 20),
+        'comments_count': rng.randint(0, 10),
+        'shares_count': rng.randint(0, 5),
+        'views_count': rng.randint(0, 200)
+    } for post_id in range(1, n_posts + 1)]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benzer post modları testi")
+    parser.add_argument("--posts", type=int, default=500, help="Sentetik post sayısı")
+    parser.add_argument("--limit", type=int, default=5, help="Post başına benzer post sayısı")
+    args = parser.parse_args()
+
+    recommender = OfflineRecommender()
+    await recommender.fit(synthetic_posts(args.posts))
+
+    # LSH sorgularını say
+    queries = []
+    query = recommender.ann_index.query
+    recommender.ann_index.query = lambda row, top_n: queries.append(row) or query(row, top_n)
+
+    post_ids = [post_id for post_id in recommender.post_ids[:20] if post_id in recommender.post_analysis]
+    assert post_ids, "İçerik analizi yapılmış post yok"
+
+    for post_id in post_ids:
+        row = recommender.post_store.row_of(post_id)
+        similar = recommender.get_similar_posts(post_id, args.limit, mode="approx")
+        assert queries and queries[-1] == row, f"Post {post_id}: approx LSH indeksine ulaşmadı"
+        assert all(post['id'] != post_id for post in similar), f"Post {post_id}: kendisi döndü"
+
+        # Skorlar kesin kosinüs benzerliği olmalı ve azalan sırada gelmeli
+        rows = [recommender.post_store.row_of(post['id']) for post in similar]
+        expected = cosine_similarity(recommender.feature_matrix[row], recommender.feature_matrix[rows]).ravel()
+        scores = np.array([post['similarity_score'] for post in similar])
+        assert np.allclose(scores, expected), f"Post {post_id}: skorlar kosinüs benzerliğiyle uyuşmuyor"
+        assert np.all(np.diff(scores) <= 1e-9), f"Post {post_id}: skorlar sıralı değil"
+
+    approx_queries = len(queries)
+    cluster_id = recommender.post_analysis[post_ids[0]]['cluster_id']
+    exact = recommender.get_similar_posts(post_ids[0], args.limit, mode="exact")
+    assert len(queries) == approx_queries, "exact mod LSH indeksini kullandı"
+    assert all(recommender.post_analysis[post['id']]['cluster_id'] == cluster_id for post in exact), \
+        "exact mod küme bazlı benzerliği kullanmadı"
+
+    print(f"✅ {len(post_ids)} postta mode=approx LSH indeksi üzerinden yanıt verdi")
+    print(f"✅ mode=exact küme bazlı yolu kullandı ({len(exact)} post)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -15,8 +15,10 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics.pairwise import cosine_similarity
 
 from app.db import database
+from app.post_loader import load_posts, TRAINING_COLUMNS
 from app.enhanced_recommender import EnhancedRecommender
 from app.content_analyzer import SmartContentAnalyzer
+from app.text_pipeline import TextPipeline
 
 class ModelTrainer:
     def __init__(self):
@@ -29,29 +31,9 @@ class ModelTrainer:
         """Posts tablosundaki tüm verileri yükle"""
         print("📊 Posts tablosundan tüm veriler yükleniyor...")
         
-        # Tüm postları çek
-        query = """
-        SELECT 
-            id, user_id, title, content, tags, 
-            likes_count, comments_count, shares_count, views_count,
-            created_at, visibility
-        FROM posts 
-        ORDER BY created_at DESC
-        """
+        # Tüm postları parça parça çek (etiketler çözülmüş halde)
+        self.posts_data = await load_posts(TRAINING_COLUMNS)
         
-        posts = await database.fetch_all(query)
-        self.posts_data = [dict(row) for row in posts]
-        
-        # Etiketleri düzenle
-        for post in self.posts_data:
-            if isinstance(post.get("tags"), str):
-                try:
-                    post["tags"] = json.loads(post["tags"])
-                except:
-                    post["tags"] = []
-            elif post.get("tags") is None:
-                post["tags"] = []
-                
         print(f"✅ {len(self.posts_data)} post yüklendi")
         return self.posts_data
     
@@ -121,9 +103,14 @@ class ModelTrainer:
         # Model oluştur ve eğit
         self.recommender = EnhancedRecommender()
         
+        # Metin temizleme tüm çekirdeklere dağıtılır (TEXT_PIPELINE_WORKERS ile sınırlanabilir)
+        workers = int(os.getenv("TEXT_PIPELINE_WORKERS", os.cpu_count() or 1))
+        self.recommender.content_analyzer.text_pipeline = TextPipeline(workers=workers)
+        
         # İçerik analizi ile eğitim
         print("🔬 İçerik analizi ve makine öğrenmesi modeli eğitiliyor...")
-        await self.recommender.fit(self.posts_data, use_content_analysis=True)
+        with self.recommender.content_analyzer.text_pipeline:
+            await self.recommender.fit(self.posts_data, use_content_analysis=True)
         
         training_time = time.time() - start_time
         